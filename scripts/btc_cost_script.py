@@ -4,58 +4,11 @@ Script simplu pentru calculul costului de producție al Bitcoin
 și generarea fișierului data/btc_cost_state.json pentru cardul din UI.
 
 Nu folosește niciun API. Toate datele (hashrate, preț BTC etc.)
-sunt introduse manual de utilizator.
+sunt introduse manual de utilizator; calculul și fișierul de stare sunt
+cele din btc_cost_script_auto.py (modelul comun coeziv_cost_model.py).
 """
 
-from dataclasses import dataclass
-from datetime import date
-from pathlib import Path
-import json
-
-
-@dataclass
-class BtcProdCostParams:
-    efficiency_j_per_th: float = 25.0        # eficiența ASIC de referință (J/TH)
-    energy_price_usd_per_kwh: float = 0.05   # preț energie (USD/kWh)
-    blocks_per_day: float = 144.0            # ~144 blocuri/zi
-    block_reward_btc: float = 3.125          # reward curent (după halving 2024)
-    all_in_factor: float = 1.0               # 1.0 = doar energie; ex. 1.2 = +20% capex/opex
-
-
-def btc_production_cost(hashrate_eh_per_s: float, params: BtcProdCostParams) -> dict:
-    """
-    Calculează costul de producție pe BTC, pe baza hashrate-ului rețelei
-    și a parametrilor energetici/economici.
-    """
-    # 1) Conversii
-    hashrate_h_per_s = hashrate_eh_per_s * 1e18           # EH/s -> H/s
-    eta_j_per_hash = params.efficiency_j_per_th / 1e12    # J/TH -> J/hash
-
-    # 2) Puterea totală a rețelei (W)
-    power_w = hashrate_h_per_s * eta_j_per_hash
-
-    # 3) Consum de energie / zi (kWh)
-    energy_kwh_per_day = power_w * 24 / 1000.0
-
-    # 4) BTC minați pe zi
-    btc_per_day = params.blocks_per_day * params.block_reward_btc
-
-    # 5) Energie per BTC
-    energy_kwh_per_btc = energy_kwh_per_day / btc_per_day
-
-    # 6) Cost energie per BTC
-    cost_energy_per_btc = energy_kwh_per_btc * params.energy_price_usd_per_kwh
-
-    # 7) Cost all-in (dacă alegi un factor > 1)
-    cost_allin_per_btc = cost_energy_per_btc * params.all_in_factor
-
-    return {
-        "energy_kwh_per_day": energy_kwh_per_day,
-        "btc_per_day": btc_per_day,
-        "energy_kwh_per_btc": energy_kwh_per_btc,
-        "cost_energy_usd_per_btc": cost_energy_per_btc,
-        "cost_allin_usd_per_btc": cost_allin_per_btc,
-    }
+from btc_cost_script_auto import BtcProdCostParams, build_state, write_state
 
 
 def ask_float(prompt: str, default: float) -> float:
@@ -100,37 +53,10 @@ def main() -> None:
         "Preț BTC (USD/BTC, close)", 85000.0
     )
 
-    # 2) Calcul cost
-    metrics = btc_production_cost(hashrate_eh_per_s, params)
-
-    prod_cost_usd = metrics["cost_allin_usd_per_btc"]
-    prod_margin = close_price_usd / prod_cost_usd if prod_cost_usd > 0 else None
-
-    # 3) Construiește obiectul de stare pentru card
-    state = {
-        "as_of": date.today().isoformat(),         # ex. "2025-12-01"
-        "close": round(close_price_usd, 2),
-        "prod_cost_usd": round(prod_cost_usd, 2),
-        "prod_margin": round(prod_margin, 4) if prod_margin is not None else None,
-        # opțional: parametri, pentru transparență (UI poate să-i ignore)
-        "params": {
-            "hashrate_eh_per_s": hashrate_eh_per_s,
-            "efficiency_j_per_th": params.efficiency_j_per_th,
-            "energy_price_usd_per_kwh": params.energy_price_usd_per_kwh,
-            "blocks_per_day": params.blocks_per_day,
-            "block_reward_btc": params.block_reward_btc,
-            "all_in_factor": params.all_in_factor,
-        },
-    }
-
-    # 4) Scriere fișier JSON în ./data/btc_cost_state.json
-    base_dir = Path(__file__).resolve().parent
-    data_dir = base_dir / "data"
-    data_dir.mkdir(exist_ok=True)
-
-    out_path = data_dir / "btc_cost_state.json"
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(state, f, ensure_ascii=False, indent=2)
+    # 2) Calcul cost + stare pentru card, scrisă în data/btc_cost_state.json
+    #    (rădăcina repo-ului, ca btc_cost_script_auto.py)
+    state = build_state(hashrate_eh_per_s, close_price_usd, params)
+    out_path = write_state(state)
 
     print("\n=== Rezultat ===")
     print(f"Cost producție (prod_cost_usd): {state['prod_cost_usd']} USD/BTC")
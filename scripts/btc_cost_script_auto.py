@@ -9,6 +9,10 @@ Valorile pot fi setate:
 - prin variabile de mediu (HASHRATE_EH_PER_S, PRICE_USD etc.)
 - sau prin valorile implicite de mai jos.
 
+Calculul este cel din coeziv_cost_model.py (comun cu build_btc_cost_state.py),
+pe hashrate în loc de difficulty; all_in_factor are același sens ca
+PRODUCTION_MARKUP acolo (cost electric -> cost total).
+
 ATENȚIE: acest fișier este în folderul scripts/, iar JSON-ul este scris
 în ../data/btc_cost_state.json (rădăcina repo-ului + /data).
 """
@@ -17,8 +21,14 @@ from dataclasses import dataclass
 from datetime import date
 from pathlib import Path
 import json
+import math
 import os
 
+import numpy as np
+
+import coeziv_prom
+from coeziv_cost_model import CostParams, evaluate
+
 
 @dataclass
 class BtcProdCostParams:
@@ -40,60 +50,51 @@ def env_float(key: str, default: float) -> float:
 
 
 def btc_production_cost(hashrate_eh_per_s: float, params: BtcProdCostParams) -> dict:
-    # EH/s -> H/s
-    hashrate_h_per_s = hashrate_eh_per_s * 1e18
-    # J/TH -> J/hash
-    eta_j_per_hash = params.efficiency_j_per_th / 1e12
-
-    # putere totală rețea (W)
-    power_w = hashrate_h_per_s * eta_j_per_hash
-
-    # energie/zi (kWh)
-    energy_kwh_per_day = power_w * 24 / 1000.0
-
-    # BTC/zi
+    """
+    Costul de producție pe BTC din hashrate-ul rețelei, prin modelul comun
+    (coeziv_cost_model.evaluate); hashrate_eh_per_s poate fi și un array
+    (evaluare în lot), caz în care valorile din dict sunt array-uri.
+    """
+    costs = evaluate(
+        hashrate_eh_per_s=hashrate_eh_per_s,
+        params=CostParams(
+            electricity_usd_per_kwh=params.energy_price_usd_per_kwh,
+            all_in_factor=params.all_in_factor,
+            efficiency_j_per_th=params.efficiency_j_per_th,
+            block_subsidy_btc=params.block_reward_btc,
+            blocks_per_day=params.blocks_per_day,
+        ),
+    )
     btc_per_day = params.blocks_per_day * params.block_reward_btc
-
-    # energie/BTC
-    energy_kwh_per_btc = energy_kwh_per_day / btc_per_day
-
-    # cost energie/BTC
-    cost_energy_per_btc = energy_kwh_per_btc * params.energy_price_usd_per_kwh
-
-    # cost all-in (dacă vrei să incluzi capex/opex în mod simplificat)
-    cost_allin_per_btc = cost_energy_per_btc * params.all_in_factor
-
-    return {
-        "energy_kwh_per_day": energy_kwh_per_day,
+    scalar = np.ndim(hashrate_eh_per_s) == 0
+    out = {
+        "energy_kwh_per_day": costs.energy_kwh_per_btc * btc_per_day,
         "btc_per_day": btc_per_day,
-        "energy_kwh_per_btc": energy_kwh_per_btc,
-        "cost_energy_usd_per_btc": cost_energy_per_btc,
-        "cost_allin_usd_per_btc": cost_allin_per_btc,
+        "energy_kwh_per_btc": costs.energy_kwh_per_btc,
+        "cost_energy_usd_per_btc": costs.electric,
+        "cost_allin_usd_per_btc": costs.all_in,
     }
+    if scalar:
+        out = {k: float(v) for k, v in out.items()}
+    return out
 
 
-def main() -> None:
-    # 1) Citește valorile din env sau folosește default-urile
-    hashrate_eh_per_s = env_float("HASHRATE_EH_PER_S", 1065.0)
-    close_price_usd = env_float("PRICE_USD", 85000.0)
-
-    params = BtcProdCostParams(
-        efficiency_j_per_th=env_float("EFFICIENCY_J_PER_TH", 25.0),
-        energy_price_usd_per_kwh=env_float("ENERGY_PRICE_USD_PER_KWH", 0.05),
-        blocks_per_day=env_float("BLOCKS_PER_DAY", 144.0),
-        block_reward_btc=env_float("BLOCK_REWARD_BTC", 3.125),
-        all_in_factor=env_float("ALL_IN_FACTOR", 1.0),
-    )
-
+def build_state(hashrate_eh_per_s: float, close_price_usd: float, params: BtcProdCostParams) -> dict:
+    """Obiectul de stare pentru card (data/btc_cost_state.json)."""
     metrics = btc_production_cost(hashrate_eh_per_s, params)
     prod_cost_usd = metrics["cost_allin_usd_per_btc"]
-    prod_margin = close_price_usd / prod_cost_usd if prod_cost_usd > 0 else None
+    # modelul întoarce NaN pentru intrări degenerate (ex. hashrate 0);
+    # în JSON devine null, nu literalul NaN (invalid)
+    if not math.isfinite(prod_cost_usd):
+        prod_cost_usd = None
+    prod_margin = close_price_usd / prod_cost_usd if prod_cost_usd is not None and prod_cost_usd > 0 else None
 
-    state = {
-        "as_of": date.today().isoformat(),
+    return {
+        "as_of": date.today().isoformat(),         # ex. "2025-12-01"
         "close": round(close_price_usd, 2),
-        "prod_cost_usd": round(prod_cost_usd, 2),
+        "prod_cost_usd": round(prod_cost_usd, 2) if prod_cost_usd is not None else None,
         "prod_margin": round(prod_margin, 4) if prod_margin is not None else None,
+        # opțional: parametri, pentru transparență (UI poate să-i ignore)
         "params": {
             "hashrate_eh_per_s": hashrate_eh_per_s,
             "efficiency_j_per_th": params.efficiency_j_per_th,
@@ -104,21 +105,45 @@ def main() -> None:
         },
     }
 
-    # 2) Scrie JSON în ../data/btc_cost_state.json (rădăcina repo-ului)
-    # __file__ -> scripts/btc_cost_script_auto.py
-    # parent      = scripts/
-    # parent.parent = rădăcina repo-ului
-    base_dir = Path(__file__).resolve().parent.parent
-    data_dir = base_dir / "data"
+
+def write_state(state: dict) -> Path:
+    """
+    Scrie JSON în ../data/btc_cost_state.json (rădăcina repo-ului):
+    __file__ -> scripts/btc_cost_script_auto.py, parent.parent = rădăcina.
+    """
+    data_dir = Path(__file__).resolve().parent.parent / "data"
     data_dir.mkdir(exist_ok=True)
 
     out_path = data_dir / "btc_cost_state.json"
     with out_path.open("w", encoding="utf-8") as f:
-        json.dump(state, f, ensure_ascii=False, indent=2)
+        json.dump(state, f, ensure_ascii=False, indent=2, allow_nan=False)
+    return out_path
+
+
+def main() -> None:
+    coeziv_prom.start_job("btc_cost_script_auto")
+    # 1) Citește valorile din env sau folosește default-urile
+    hashrate_eh_per_s = env_float("HASHRATE_EH_PER_S", 1065.0)
+    close_price_usd = env_float("PRICE_USD", 85000.0)
+
+    params = BtcProdCostParams(
+        efficiency_j_per_th=env_float("EFFICIENCY_J_PER_TH", 25.0),
+        energy_price_usd_per_kwh=env_float("ENERGY_PRICE_USD_PER_KWH", 0.05),
+        blocks_per_day=env_float("BLOCKS_PER_DAY", 144.0),
+        block_reward_btc=env_float("BLOCK_REWARD_BTC", 3.125),
+        all_in_factor=env_float("ALL_IN_FACTOR", 1.0),
+    )
+
+    # 2) Calcul + scriere JSON
+    state = build_state(hashrate_eh_per_s, close_price_usd, params)
+    out_path = write_state(state)
 
     print(
         f"[btc_cost_script_auto] Scris {out_path} cu prod_cost_usd={state['prod_cost_usd']} USD/BTC"
     )
+    # as_of e ziua rulării (intrări din env), deci fără metrici de prospețime
+    coeziv_prom.output(out_path)
+    coeziv_prom.write_job()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Construiește data/btc_cost_sensitivity.json: sensibilitatea costului de
+producție BTC la parametrii modelului, pe tot istoricul zilnic.
+
+Grila de scenarii (produs cartezian, fiecare axă configurabilă din CLI):
+
+- preț energie (USD/kWh):        0.03 – 0.10, pas 0.01
+- eficiența flotei:              multiplicator al tabelului pe date
+                                 (coeziv_cost_model.EFFICIENCY_J_PER_TH),
+                                 0.8 – 1.2 (1.0 = modelul de bază)
+- production markup:             1.0, 1.1, 1.25, 1.4, 1.5
+
+Fiecare scenariu este evaluat pe fiecare zi cu close și difficulty
+cunoscute (aceleași intrări ca data/btc_cost_series.json), prin
+coeziv_cost_model.evaluate cu parametrii ca array-uri (scenarii x zile,
+broadcast NumPy). Zilele se împart în bucăți de cel mult CHUNK_CELLS
+celule; peste POOL_MIN_CELLS bucățile rulează într-un ProcessPoolExecutor.
+
+Fișierul rezultat (format columnar, coeziv_series_format):
+- "columns": pentru fiecare zi, cuantilele (QUANTILES) peste scenarii ale
+  costului total și ale marjei close / cost – benzile din UI;
+- "meta.surface": pentru ultima zi, costul total și marja fiecărui
+  scenariu, plus fracția din istoric cu marja sub 1 (close sub cost),
+  ca liste imbricate [energie][eficiență][markup].
+
+    python scripts/build_btc_cost_sensitivity.py
+    python scripts/build_btc_cost_sensitivity.py --energy 0.02:0.12:0.005 --workers 8
+    python scripts/build_btc_cost_sensitivity.py --markup 1.0,1.25 --efficiency 1.0
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from build_btc_cost_state import BTC_DAILY_CSV, DATA_DIR, load_cost_inputs
+import coeziv_prom
+from coeziv_btc_daily import epoch_ms
+from coeziv_cost_model import CostParams, efficiency_j_per_th_for_dates, evaluate
+from coeziv_metrics import metrics_stage
+from coeziv_series_format import columnar_document, write_json_atomic
+
+
+BTC_COST_SENSITIVITY_JSON = DATA_DIR / "btc_cost_sensitivity.json"
+
+ENERGY_GRID = "0.03:0.10:0.01"
+EFFICIENCY_GRID = "0.8:1.2:0.1"
+MARKUP_GRID = "1.0,1.1,1.25,1.4,1.5"
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# o bucată = scenarii x zile; ~2M celule float64 = 16 MB per array
+CHUNK_CELLS = 2_000_000
+# sub acest număr de celule un singur proces e mai rapid decât pool-ul
+POOL_MIN_CELLS = 8_000_000
+
+
+def log(msg: str) -> None:
+    print(f"[build_btc_cost_sensitivity] {msg}", flush=True)
+
+
+def parse_axis(spec: str) -> np.ndarray:
+    """"0.03:0.10:0.01" (start:stop:pas, stop inclus) sau "1.0,1.25,1.5"."""
+    try:
+        if ":" in spec:
+            start, stop, step = (float(x) for x in spec.split(":"))
+            if step <= 0.0:
+                raise ValueError
+            count = int(np.floor((stop - start) / step + 1e-9)) + 1
+            values = start + step * np.arange(count)
+        else:
+            values = np.array([float(x) for x in spec.split(",") if x.strip()])
+    except ValueError:
+        raise SystemExit(f"Axă invalidă: {spec!r} (format: start:stop:pas sau v1,v2,...)")
+    if not len(values) or np.any(values <= 0.0):
+        raise SystemExit(f"Axă invalidă: {spec!r} (valori pozitive, cel puțin una)")
+    return np.round(values, 10)
+
+
+@dataclass
+class Grid:
+    energy: np.ndarray      # USD/kWh
+    efficiency: np.ndarray  # multiplicator al eficienței pe date
+    markup: np.ndarray      # cost electric -> cost total
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return (len(self.energy), len(self.efficiency), len(self.markup))
+
+    def scenarios(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Axele aplatizate, câte o valoare per scenariu (ordinea din `shape`)."""
+        e, f, m = np.meshgrid(self.energy, self.efficiency, self.markup, indexing="ij")
+        return e.ravel(), f.ravel(), m.ravel()
+
+
+def evaluate_grid(
+    grid: Grid, dates: np.ndarray, difficulty: np.ndarray, fees: np.ndarray, close: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(cost total, marjă), fiecare de formă (scenarii, zile)."""
+    energy, efficiency, markup = grid.scenarios()
+    costs = evaluate(
+        dates=dates,
+        difficulty=difficulty,
+        fees_btc_per_block=fees,
+        close=close,
+        params=CostParams(
+            electricity_usd_per_kwh=energy[:, None],
+            all_in_factor=markup[:, None],
+            efficiency_j_per_th=efficiency[:, None] * efficiency_j_per_th_for_dates(dates)[None, :],
+        ),
+    )
+    return costs.all_in, costs.margin
+
+
+def _chunk_worker(
+    args: Tuple[Grid, np.ndarray, np.ndarray, np.ndarray, np.ndarray, Tuple[float, ...]]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """O bucată de zile: (cuantile cost, cuantile marjă, zile sub cost per scenariu)."""
+    grid, dates, difficulty, fees, close, quantiles = args
+    cost, margin = evaluate_grid(grid, dates, difficulty, fees, close)
+    return (
+        np.quantile(cost, quantiles, axis=0),
+        np.quantile(margin, quantiles, axis=0),
+        np.count_nonzero(margin < 1.0, axis=1),
+    )
+
+
+def sweep(
+    grid: Grid,
+    dates: np.ndarray,
+    difficulty: np.ndarray,
+    fees: np.ndarray,
+    close: np.ndarray,
+    quantiles: Sequence[float] = QUANTILES,
+    workers: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Evaluează grila pe toate zilele, pe bucăți de zile. Întoarce cuantilele
+    per zi (cuantile x zile) pentru cost și marjă și numărul de zile cu
+    marja sub 1 pentru fiecare scenariu.
+    """
+    n_scenarios = int(np.prod(grid.shape))
+    step = max(1, CHUNK_CELLS // n_scenarios)
+    tasks = [
+        (grid, dates[i:i + step], difficulty[i:i + step], fees[i:i + step], close[i:i + step], tuple(quantiles))
+        for i in range(0, len(dates), step)
+    ]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(tasks) > 1 and n_scenarios * len(dates) >= POOL_MIN_CELLS:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(_chunk_worker, tasks))
+    else:
+        results = [_chunk_worker(t) for t in tasks]
+
+    if not results:
+        empty = np.empty((len(quantiles), 0))
+        return empty, empty.copy(), np.zeros(n_scenarios, dtype=np.int64)
+    cost_q = np.concatenate([r[0] for r in results], axis=1)
+    margin_q = np.concatenate([r[1] for r in results], axis=1)
+    below = np.sum([r[2] for r in results], axis=0)
+    return cost_q, margin_q, below
+
+
+def _label(q: float) -> str:
+    return f"q{round(q * 100):02d}"
+
+
+def build_sensitivity(
+    grid: Grid,
+    csv_path: Path = BTC_DAILY_CSV,
+    quantiles: Sequence[float] = QUANTILES,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    with metrics_stage("load") as st:
+        inputs = load_cost_inputs(csv_path)
+        st.rows = len(inputs.dates)
+    keep = (
+        ~np.isnat(inputs.dates) & np.isfinite(inputs.close) & (inputs.close > 0.0)
+        & np.isfinite(inputs.difficulty) & (inputs.difficulty > 0.0)
+    )
+    dates = inputs.dates[keep]
+    close = inputs.close[keep]
+    difficulty = inputs.difficulty[keep]
+    fees = inputs.fees[keep]
+
+    with metrics_stage("sweep", rows=len(dates)):
+        cost_q, margin_q, below = sweep(grid, dates, difficulty, fees, close, quantiles, workers)
+
+    columns: Dict[str, Any] = {"t": epoch_ms(dates), "close": close}
+    for i, q in enumerate(quantiles):
+        columns[f"cost_{_label(q)}"] = cost_q[i]
+    for i, q in enumerate(quantiles):
+        columns[f"margin_{_label(q)}"] = margin_q[i]
+    doc = columnar_document(columns, {})
+
+    # rotunjiri ca în btc_cost_series.json: USD la cenți, marja la 4 zecimale
+    cols = doc["columns"]
+    for name in cols:
+        if name.startswith("cost_"):
+            cols[name] = [round(v, 2) for v in cols[name]]
+        elif name.startswith("margin_"):
+            cols[name] = [round(v, 4) for v in cols[name]]
+
+    surface: Optional[Dict[str, Any]] = None
+    if len(dates):
+        cost_last, margin_last = evaluate_grid(grid, dates[-1:], difficulty[-1:], fees[-1:], close[-1:])
+        surface = {
+            "as_of": str(dates[-1]),
+            "cost_total": np.round(cost_last[:, 0].reshape(grid.shape), 2).tolist(),
+            "margin": np.round(margin_last[:, 0].reshape(grid.shape), 4).tolist(),
+            "share_days_below_cost": np.round((below / len(dates)).reshape(grid.shape), 4).tolist(),
+        }
+
+    doc["meta"] = {
+        "as_of": str(dates[-1]) if len(dates) else None,
+        "source": csv_path.name,
+        "method": "difficulty_energy_model_v2",
+        "quantiles": list(quantiles),
+        "grid": {
+            "axes": ["electricity_usd_per_kwh", "efficiency_scale", "production_markup"],
+            "electricity_usd_per_kwh": grid.energy.tolist(),
+            "efficiency_scale": grid.efficiency.tolist(),
+            "production_markup": grid.markup.tolist(),
+        },
+        "surface": surface,
+    }
+    return doc
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Suprafața de sensibilitate a costului de producție BTC.")
+    parser.add_argument("--energy", default=ENERGY_GRID, help=f"USD/kWh (implicit {ENERGY_GRID})")
+    parser.add_argument("--efficiency", default=EFFICIENCY_GRID, help=f"multiplicator eficiență (implicit {EFFICIENCY_GRID})")
+    parser.add_argument("--markup", default=MARKUP_GRID, help=f"production markup (implicit {MARKUP_GRID})")
+    parser.add_argument("--workers", type=int, default=None, help="procese pentru grilele mari (implicit: nr. CPU)")
+    parser.add_argument("--out", type=Path, default=BTC_COST_SENSITIVITY_JSON)
+    args = parser.parse_args(argv)
+
+    coeziv_prom.start_job("build_btc_cost_sensitivity")
+    grid = Grid(parse_axis(args.energy), parse_axis(args.efficiency), parse_axis(args.markup))
+    t0 = time.perf_counter()
+    doc = build_sensitivity(grid, BTC_DAILY_CSV, QUANTILES, args.workers)
+    with metrics_stage("write", rows=doc["rows"]):
+        size = write_json_atomic(args.out, doc)
+    log(
+        f"Scris {args.out}: {int(np.prod(grid.shape))} scenarii x {doc['rows']} zile "
+        f"({size} bytes, {time.perf_counter() - t0:.2f}s)"
+    )
+    coeziv_prom.freshness("btc_cost_sensitivity", doc["meta"]["as_of"])
+    coeziv_prom.output(args.out)
+    coeziv_prom.write_job()
+
+
+if __name__ == "__main__":
+    main()
@@ -11,19 +11,45 @@ Model Coeziv pentru costul de producție BTC:
 
 Rezultatul NU este o valoare contabilă exactă, ci o ancoră structurală
 pentru ciclurile Bitcoin.
+
+Pe lângă starea zilei curente, scriptul scrie și seria istorică
+data/btc_cost_series.json (format columnar, coeziv_series_format): cost
+electric, cost total și marja close / cost total pentru fiecare zi cu
+difficulty cunoscută, calculate vectorizat (build_cost_series). Modelul
+propriu-zis (tabelele de subsidy / eficiență, calculul pe array-uri) este
+în coeziv_cost_model.py, comun cu btc_cost_script*.py.
+
+Difficulty și fees per block vin din CSV dacă există coloanele, altfel din
+store-ul local data/btc_chain_daily.csv (coeziv_chain_store.py, sincronizat
+separat); difficulty live se cere doar dacă store-ul nu acoperă ziua.
 """
 
 from __future__ import annotations
 
+import argparse
 import json
 import math
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple
-
-import pandas as pd
-import requests
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from coeziv_btc_daily import epoch_ms, load_daily, read_latest_row
+from coeziv_chain_store import ChainData, load_chain_store
+from coeziv_cost_model import (
+    ELECTRICITY_USD_PER_KWH_BASE,
+    PRODUCTION_MARKUP,
+    CostParams,
+    block_subsidy_for_dates,
+    efficiency_j_per_th_for_dates,
+    evaluate,
+)
+import coeziv_prom
+from coeziv_http import get as http_get, source_url
+from coeziv_metrics import metrics_stage
+from coeziv_series_format import columnar_document, write_json_atomic
 
 
 # ---------------------------------------------------------
@@ -34,16 +60,16 @@ ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = ROOT / "data"
 BTC_DAILY_CSV = DATA_DIR / "btc_daily.csv"
 BTC_COST_STATE_JSON = DATA_DIR / "btc_cost_state.json"
-
-# Preț mediu global al energiei pentru mineri (USD/kWh)
-ELECTRICITY_USD_PER_KWH_BASE = 0.05
-
-# Markup electric -> cost total (electric + capex + opex, aproximativ)
-PRODUCTION_MARKUP = 1.25
+BTC_COST_SERIES_JSON = DATA_DIR / "btc_cost_series.json"
 
 # Timeout pentru requestul de difficulty live
 HTTP_TIMEOUT = 10
 
+# difficulty live: răspunsul se păstrează în cache-ul HTTP (coeziv_http) o oră;
+# dacă sursa nu răspunde, se folosește ultima valoare din cache
+DIFFICULTY_TTL = 3600
+BLOCKCHAIN_URL = source_url("COEZIV_BLOCKCHAIN_URL", "https://blockchain.info")
+
 
 # ---------------------------------------------------------
 # MODEL COST DE PRODUCȚIE
@@ -51,16 +77,15 @@ HTTP_TIMEOUT = 10
 
 def get_live_difficulty() -> float:
     """
-    Ia difficulty curentă din blockchain.info.
-    Dacă nu reușește, întoarce NaN (nu aruncă excepție).
+    Ia difficulty curentă din blockchain.info (prin cache-ul HTTP, vezi
+    DIFFICULTY_TTL). Dacă nu reușește, întoarce NaN (nu aruncă excepție).
     """
-    url = "https://blockchain.info/q/getdifficulty"
+    url = f"{BLOCKCHAIN_URL}/q/getdifficulty"
     try:
-        r = requests.get(url, timeout=HTTP_TIMEOUT)
-        if r.status_code == 200:
-            return float(r.text.strip())
+        r = http_get(url, ttl=DIFFICULTY_TTL, timeout=HTTP_TIMEOUT, stale_on_error=True)
+        return float(r.text().strip())
     except Exception:
-        pass
+        coeziv_prom.source_failure("blockchain.info")
     return float("nan")
 
 
@@ -69,56 +94,15 @@ def get_block_subsidy(dt: datetime) -> float:
     Block subsidy (BTC / block) în funcție de dată.
     Halving-urile sunt aproximative, dar suficiente pentru model.
     """
-    if dt < datetime(2012, 11, 28):
-        return 50.0
-    elif dt < datetime(2016, 7, 9):
-        return 25.0
-    elif dt < datetime(2020, 5, 11):
-        return 12.5
-    elif dt < datetime(2024, 4, 20):
-        return 6.25
-    else:
-        return 3.125
+    return float(block_subsidy_for_dates(np.datetime64(dt, "D")))
 
 
 def efficiency_j_per_th_for_date(dt: datetime) -> float:
     """
-    Eficiența medie a flotei (J/TH) în funcție de perioadă.
-
-    Valorile sunt piecewise și aproximative, dar ancorate în evoluția reală:
-    - înainte de ASIC (CPU/GPU) -> ineficiență enormă (doar istoric)
-    - 2013+ -> ASIC-uri, apoi generații tot mai eficiente
+    Eficiența medie a flotei (J/TH) în funcție de perioadă
+    (tabelul EFFICIENCY_BREAKS / EFFICIENCY_J_PER_TH).
     """
-    if dt < datetime(2013, 1, 1):
-        # CPU / GPU – pur istoric, nu contează mult pentru modelul actual
-        return 5_000_000.0  # J/TH (practic inutil pentru prezent)
-
-    if dt < datetime(2016, 1, 1):
-        # primele ASIC-uri comerciale
-        return 600.0
-
-    if dt < datetime(2018, 1, 1):
-        # generații mai bune de ASIC
-        return 120.0
-
-    if dt < datetime(2020, 1, 1):
-        # eficiență în jur de 80 J/TH
-        return 80.0
-
-    if dt < datetime(2023, 1, 1):
-        # 2020–2022 ~45 J/TH rețea
-        return 45.0
-
-    if dt < datetime(2024, 6, 1):
-        # până în 2023 ~33 J/TH, apoi coboară spre 30
-        return 33.0
-
-    if dt < datetime(2025, 1, 1):
-        # aproximativ 28.2 J/TH (date Cambridge 2024)
-        return 28.2
-
-    # 2025+ proiecție conservatoare (rețea mai eficientă)
-    return 26.0
+    return float(efficiency_j_per_th_for_dates(np.datetime64(dt, "D")))
 
 
 def electricity_price_usd_per_kwh_for_date(dt: datetime) -> float:
@@ -139,45 +123,24 @@ def estimate_cost_usd_per_btc(
     production_markup: float = PRODUCTION_MARKUP,
 ) -> Tuple[float, float]:
     """
-    Returnează (electric_cost, full_production_cost) în USD/BTC.
-
-    Pași:
+    Returnează (electric_cost, full_production_cost) în USD/BTC pentru o
+    singură zi; pașii sunt cei din coeziv_cost_model.evaluate:
       - difficulty -> hash-uri per block: D * 2^32
-      - eficiență J/TH -> J/hash
-      - energie -> kWh -> cost electric per block
+      - eficiență J/TH -> energie per block (kWh) -> cost electric per block
       - împărțit la BTC/block (subsidy + fees) -> cost electric per BTC
       - multiplicat cu production_markup -> cost total de producție
     """
-    if not (math.isfinite(difficulty) and difficulty > 0.0):
-        return (float("nan"), float("nan"))
-    if block_subsidy_btc <= 0.0:
-        return (float("nan"), float("nan"))
-
-    eff_j_per_th = efficiency_j_per_th_for_date(when)
-    elec_price = electricity_price_usd_per_kwh_for_date(when)
-
-    # 1. hash-uri per block
-    hashes_per_block = difficulty * (2.0 ** 32)
-
-    # 2. J per hash
-    joules_per_hash = eff_j_per_th / 1e12  # J/TH -> J/hash
-
-    # 3. energie per block
-    energy_joules = hashes_per_block * joules_per_hash
-    energy_kwh = energy_joules / 3_600_000.0  # 1 kWh = 3.6e6 J
-
-    # 4. cost electric per block
-    cost_block_electric = energy_kwh * elec_price
-
-    # 5. BTC per block
-    btc_per_block = block_subsidy_btc + max(fees_btc_per_block, 0.0)
-    if btc_per_block <= 0.0:
-        return (float("nan"), float("nan"))
-
-    cost_electric_per_btc = cost_block_electric / btc_per_block
-    cost_full_per_btc = cost_electric_per_btc * production_markup
-
-    return float(cost_electric_per_btc), float(cost_full_per_btc)
+    costs = evaluate(
+        dates=[np.datetime64(when, "D")],
+        difficulty=[difficulty],
+        fees_btc_per_block=fees_btc_per_block,
+        params=CostParams(
+            electricity_usd_per_kwh=electricity_price_usd_per_kwh_for_date(when),
+            all_in_factor=production_markup,
+            block_subsidy_btc=block_subsidy_btc,
+        ),
+    )
+    return float(costs.electric[0]), float(costs.all_in[0])
 
 
 # ---------------------------------------------------------
@@ -205,25 +168,13 @@ class BtcCostState:
 # PIPELINE
 # ---------------------------------------------------------
 
-def load_latest_row(csv_path: Path) -> pd.Series:
-    if not csv_path.exists():
-        raise FileNotFoundError(f"Nu găsesc fișierul {csv_path}")
-
-    df = pd.read_csv(csv_path)
-
-    # detectăm o coloană de dată
-    date_col = None
-    for cand in ("date", "Date", "time", "Time", "timestamp", "Timestamp"):
-        if cand in df.columns:
-            date_col = cand
-            break
-
-    if date_col is not None:
-        df[date_col] = pd.to_datetime(df[date_col])
-        df = df.sort_values(date_col)
-
-    latest = df.iloc[-1]
-    return latest
+def load_latest_row(csv_path: Path) -> Dict[str, Any]:
+    """
+    Ultimul rând (după dată) din CSV, citit de la coada fișierului
+    (coeziv_btc_daily.read_latest_row, timp constant față de istoric):
+    "date" ca datetime64[D], restul coloanelor numerice ca float (NaN dacă lipsesc).
+    """
+    return read_latest_row(csv_path)
 
 
 def build_btc_cost_state() -> BtcCostState:
@@ -231,51 +182,34 @@ def build_btc_cost_state() -> BtcCostState:
 
     # --- as_of ---
     as_of_dt = datetime.utcnow()
-    for cand in ("date", "Date", "time", "Time", "timestamp", "Timestamp"):
-        if cand in latest.index:
-            try:
-                as_of_dt = pd.to_datetime(latest[cand]).to_pydatetime()
-                break
-            except Exception:
-                pass
+    if not np.isnat(latest["date"]):
+        as_of_dt = latest["date"].astype("datetime64[s]").item()
     as_of_str = as_of_dt.strftime("%Y-%m-%d")
 
     # --- close ---
     close: Optional[float] = None
-    for cand in ("close", "Close", "adj_close", "Adj Close", "AdjClose"):
-        if cand in latest.index:
-            try:
-                close = float(latest[cand])
-                break
-            except Exception:
-                pass
-
-    # --- difficulty: CSV sau live ---
+    for cand in ("close", "adj_close", "adj close", "adjclose"):
+        if math.isfinite(latest.get(cand, float("nan"))):
+            close = latest[cand]
+            break
+
+    # --- difficulty: CSV, store-ul local on-chain sau (ultima variantă) live ---
+    d_store, f_store = (float(v[0]) for v in load_chain_store().lookup([latest["date"]]))
     difficulty: Optional[float] = None
-    if "difficulty" in latest.index:
-        try:
-            d_raw = float(latest["difficulty"])
-        except Exception:
-            d_raw = float("nan")
-
-        if math.isfinite(d_raw) and d_raw > 0.0:
-            difficulty = d_raw
-        else:
-            d_live = get_live_difficulty()
-            if math.isfinite(d_live) and d_live > 0.0:
-                difficulty = d_live
+    d_raw = latest.get("difficulty", float("nan"))
+    if math.isfinite(d_raw) and d_raw > 0.0:
+        difficulty = d_raw
+    elif math.isfinite(d_store) and d_store > 0.0:
+        difficulty = d_store
     else:
         d_live = get_live_difficulty()
         if math.isfinite(d_live) and d_live > 0.0:
             difficulty = d_live
 
-    # --- fees per block (opțional) ---
-    fees_btc = 0.0
-    if "avg_fees_per_block_btc" in latest.index:
-        try:
-            fees_btc = float(latest["avg_fees_per_block_btc"])
-        except Exception:
-            fees_btc = 0.0
+    # --- fees per block (opțional): CSV sau store ---
+    fees_btc = latest.get("avg_fees_per_block_btc", float("nan"))
+    if not math.isfinite(fees_btc):
+        fees_btc = f_store if math.isfinite(f_store) else 0.0
 
     # --- block subsidy ---
     block_subsidy = get_block_subsidy(as_of_dt)
@@ -319,11 +253,106 @@ def build_btc_cost_state() -> BtcCostState:
     )
 
 
-def main() -> None:
-    state = build_btc_cost_state()
-    BTC_COST_STATE_JSON.parent.mkdir(parents=True, exist_ok=True)
-    with BTC_COST_STATE_JSON.open("w", encoding="utf-8") as f:
-        json.dump(asdict(state), f, ensure_ascii=False, indent=2)
+@dataclass
+class CostInputs:
+    """Intrările zilnice ale modelului de cost (array-uri aliniate pe dată)."""
+    dates: np.ndarray
+    close: np.ndarray
+    difficulty: np.ndarray
+    fees: np.ndarray
+
+
+def load_cost_inputs(
+    csv_path: Path = BTC_DAILY_CSV,
+    latest_difficulty: Optional[float] = None,
+    chain: Optional[ChainData] = None,
+) -> CostInputs:
+    """
+    Close, difficulty și fees pe tot istoricul zilnic.
+
+    Difficulty și fees vin din coloanele CSV-ului ("difficulty",
+    "avg_fees_per_block_btc") când există, altfel din store-ul local
+    on-chain (data/btc_chain_daily.csv, lookup as-of pe dată); ultima zi
+    poate primi difficulty live (`latest_difficulty`, ca în
+    btc_cost_state.json).
+    """
+    data = load_daily(csv_path)
+    dates = data.date
+    n = len(dates)
+    close = data.columns.get("close", np.full(n, np.nan))
+    difficulty = data.columns.get("difficulty", np.full(n, np.nan)).copy()
+    fees = data.columns.get("avg_fees_per_block_btc", np.full(n, np.nan)).copy()
+
+    chain = load_chain_store() if chain is None else chain
+    d_store, f_store = chain.lookup(dates)
+    missing = ~(np.isfinite(difficulty) & (difficulty > 0.0))
+    difficulty[missing] = d_store[missing]
+    fees_missing = ~np.isfinite(fees)
+    fees[fees_missing] = f_store[fees_missing]
+
+    if n and latest_difficulty is not None and not (
+        math.isfinite(difficulty[-1]) and difficulty[-1] > 0.0
+    ):
+        difficulty[-1] = latest_difficulty
+    return CostInputs(dates, close, difficulty, fees)
+
+
+def build_cost_series(
+    csv_path: Path = BTC_DAILY_CSV,
+    latest_difficulty: Optional[float] = None,
+    chain: Optional[ChainData] = None,
+) -> Dict[str, Any]:
+    """
+    Seria istorică cost / marjă, vectorizat pe tot istoricul zilnic
+    (intrările din load_cost_inputs). Se păstrează doar zilele cu close și
+    cost valide.
+    """
+    inputs = load_cost_inputs(csv_path, latest_difficulty, chain)
+    dates, close, difficulty, fees = inputs.dates, inputs.close, inputs.difficulty, inputs.fees
+
+    costs = evaluate(dates=dates, difficulty=difficulty, fees_btc_per_block=fees, close=close)
+    cost_electric, cost_full, margin = costs.electric, costs.all_in, costs.margin
+    keep = ~np.isnat(dates) & np.isfinite(close) & np.isfinite(cost_full) & (cost_full > 0.0)
+
+    doc = columnar_document(
+        {
+            "t": epoch_ms(dates[keep]),
+            "close": close[keep],
+            "difficulty": difficulty[keep],
+            "cost_electric": cost_electric[keep],
+            "cost_total": cost_full[keep],
+            "margin": margin[keep],
+        },
+        {},
+    )
+    # rotunjiri ca în btc_cost_state.json: USD la cenți, marja la 4 zecimale
+    cols = doc["columns"]
+    cols["cost_electric"] = [round(v, 2) for v in cols["cost_electric"]]
+    cols["cost_total"] = [round(v, 2) for v in cols["cost_total"]]
+    cols["margin"] = [round(v, 4) for v in cols["margin"]]
+    doc["meta"] = {
+        "as_of": str(dates[keep][-1]) if keep.any() else None,
+        "source": csv_path.name,
+        "method": "difficulty_energy_model_v2",
+        "params": {
+            "electricity_usd_per_kwh_base": ELECTRICITY_USD_PER_KWH_BASE,
+            "production_markup": PRODUCTION_MARKUP,
+            "efficiency_model": "piecewise_time_dependent",
+        },
+    }
+    return doc
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Costul de producție BTC: stare curentă și serie istorică.")
+    parser.parse_args(argv)
+    coeziv_prom.start_job("build_btc_cost_state")
+    with metrics_stage("state"):
+        state = build_btc_cost_state()
+    with metrics_stage("write_state"):
+        BTC_COST_STATE_JSON.parent.mkdir(parents=True, exist_ok=True)
+        with BTC_COST_STATE_JSON.open("w", encoding="utf-8") as f:
+            json.dump(asdict(state), f, ensure_ascii=False, indent=2)
 
     print(f"[build_btc_cost_state] Scris {BTC_COST_STATE_JSON}")
     print(f"  as_of: {state.as_of}")
@@ -338,6 +367,19 @@ def main() -> None:
     if state.prod_margin is not None:
         print(f"  marjă vs cost total: {state.prod_margin:.2f}x")
 
+    with metrics_stage("series") as st:
+        series = build_cost_series(BTC_DAILY_CSV, latest_difficulty=state.difficulty)
+        st.rows = series["rows"]
+    with metrics_stage("write_series", rows=series["rows"]):
+        size = write_json_atomic(BTC_COST_SERIES_JSON, series)
+    print(f"[build_btc_cost_state] Scris {BTC_COST_SERIES_JSON} ({series['rows']} zile, {size} bytes)")
+
+    coeziv_prom.freshness("btc_cost_state", state.as_of)
+    coeziv_prom.freshness("btc_cost_series", series["meta"]["as_of"])
+    coeziv_prom.output(BTC_COST_STATE_JSON)
+    coeziv_prom.output(BTC_COST_SERIES_JSON)
+    coeziv_prom.write_job()
+
 
 if __name__ == "__main__":
     main()
@@ -25,19 +25,45 @@ Patch 2026:
 - folosește concat outer + forward-fill limitat pentru diferențe de calendar;
 - refuză să publice JSON gol sau fără latest/series;
 - scrie atomic, ca un build eșuat să nu suprascrie ultimul JSON valid.
+
+Format (--format legacy|columnar|both, vezi coeziv_series_format.py):
+- legacy: data/global_coeziv_state.json cu series[] (implicit);
+- columnar: data/global_coeziv_state.columnar.json cu columns{} și
+  macro_signal / global_regime codate prin dicționare.
+
+Mereu se scrie și data/global_coeziv_state.bin (store binar memmap,
+vezi coeziv_binary_store.py).
+
+Cu --partition year|month se scrie și data/global_coeziv_state/<an|lună>.json
++ manifest.json (vezi coeziv_partitions.py), cu IC / ICD point-in-time.
 """
 
 from __future__ import annotations
 
+import argparse
 import json
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
 
+import coeziv_prom
+from coeziv_binary_store import write_store
+from coeziv_metrics import metrics_stage
+from coeziv_indicators import expanding_percentile_ranks, rolling_correlation
+from coeziv_partitions import add_partition_arguments, write_partitions
+from coeziv_series_format import (
+    add_format_arguments,
+    columnar_document,
+    columnar_path,
+    dictionary_encode,
+    wants_columnar,
+    wants_legacy,
+)
+
 
 # ---- locaţii fişiere --------------------------------------------------------
 
@@ -45,6 +71,8 @@ ROOT = Path(__file__).resolve().parents[1]
 DATA_GLOBAL = ROOT / "data_global"
 DATA_OUT = ROOT / "data"
 OUTPUT_JSON = DATA_OUT / "global_coeziv_state.json"
+OUTPUT_BIN = DATA_OUT / "global_coeziv_state.bin"
+OUTPUT_PARTITIONS = DATA_OUT / "global_coeziv_state"
 
 # numele fişierelor din data_global/*.csv
 SERIES = ["spx", "vix", "dxy", "gold", "oil"]
@@ -53,6 +81,11 @@ SERIES = ["spx", "vix", "dxy", "gold", "oil"]
 WINDOW_STRUCT = 120  # structură / corelaţii
 WINDOW_DIR = 60      # direcţionalitate / fluxuri de risc
 
+# ponderi pentru coşul de risc global (ICD_GLOBAL) şi sensul fiecărei pieţe:
+#   + SPX, GOLD, OIL (active ciclice / pro-creștere), - VIX, DXY (tensiune)
+ICD_WEIGHTS: Dict[str, float] = {"spx": 0.40, "gold": 0.15, "oil": 0.15, "vix": 0.15, "dxy": 0.15}
+ICD_SIGNS: Dict[str, float] = {"spx": 1.0, "gold": 1.0, "oil": 1.0, "vix": -1.0, "dxy": -1.0}
+
 # toleranță pentru piețe cu calendar diferit / sărbători / weekend
 MAX_FORWARD_FILL_ROWS = 7
 MAX_LATEST_STALENESS_DAYS = 10
@@ -264,11 +297,14 @@ def load_all_series() -> pd.DataFrame:
 
 # ---- IC_GLOBAL structură (coeziune între pieţe) ------------------------------
 
-def compute_ic_global_structural(df: pd.DataFrame) -> pd.Series:
+def compute_ic_global_raw(df: pd.DataFrame) -> pd.Series:
     """
-    IC_GLOBAL: măsoară coeziunea structurală dintre pieţele de active
-    folosind media corelaţiilor absolute dintre randamentele zilnice,
-    pe o fereastră rulantă de WINDOW_STRUCT zile, normalizată pe 0–100.
+    Media corelaţiilor absolute dintre randamentele zilnice, pe o fereastră
+    rulantă de WINDOW_STRUCT zile (valoarea brută din spatele IC_GLOBAL).
+
+    Corelațiile pentru toate perechile vin dintr-o singură trecere
+    (coeziv_indicators.rolling_correlation), deci costul nu mai crește
+    cu un apel pandas per pereche când SERIES are mai multe piețe.
     """
     rets = df.pct_change().dropna()
     assets = list(df.columns)
@@ -278,50 +314,62 @@ def compute_ic_global_structural(df: pd.DataFrame) -> pd.Series:
 
     log(f"Calculez IC_GLOBAL structural (corelații, {WINDOW_STRUCT} zile)...")
 
-    num_assets = len(assets)
-    pair_count = num_assets * (num_assets - 1) // 2
-
-    ic_raw = pd.Series(index=rets.index, dtype=float)
-    ic_raw[:] = 0.0
+    # matricea completă de corelații rulante, într-o singură trecere
+    corr = rolling_correlation(rets[assets].to_numpy(dtype=float), WINDOW_STRUCT)
 
-    # sumă de |corr| pe toate perechile
-    for i in range(num_assets):
-        for j in range(i + 1, num_assets):
-            a, b = assets[i], assets[j]
-            c = rets[a].rolling(WINDOW_STRUCT).corr(rets[b]).abs()
-            ic_raw = ic_raw.add(c, fill_value=0.0)
+    # ca în varianta pe perechi cu pandas: ferestrele incomplete contribuie cu 0
+    return pd.Series(np.nan_to_num(corr.mean_abs, nan=0.0), index=rets.index)
 
-    ic_raw = (ic_raw / float(pair_count)).dropna()
 
-    hist_vals = [float(x) for x in ic_raw.values if np.isfinite(x)]
+def rank_full_history(raw: pd.Series, name: str) -> pd.Series:
+    """Percentila 0–100 a fiecărei zile față de toată istoria seriei brute."""
+    hist_vals = [float(x) for x in raw.values if np.isfinite(x)]
     sorted_hist = sorted(hist_vals)
 
-    ic_idx_vals: Dict[pd.Timestamp, float] = {}
+    idx_vals: Dict[pd.Timestamp, float] = {}
 
-    for ts, v in ic_raw.items():
+    for ts, v in raw.items():
         if not np.isfinite(v):
             continue
 
         p = percentile_from_sorted(sorted_hist, float(v))
-        ic_idx_vals[ts] = clamp(p, 0.0, 100.0)
+        idx_vals[ts] = clamp(p, 0.0, 100.0)
 
-    ic_index = pd.Series(ic_idx_vals).sort_index()
-    ic_index.name = "ic_global"
+    index = pd.Series(idx_vals).sort_index()
+    index.name = name
+    return index
+
+
+def rank_point_in_time(raw: pd.Series, name: str) -> pd.Series:
+    """
+    Percentila 0–100 a fiecărei zile față de istoricul de până la ea
+    (inclusiv). Zilele trecute nu se mai schimbă când istoria crește, deci
+    partițiile închise rămân identice de la o rulare la alta.
+    """
+    raw = raw[np.isfinite(raw.to_numpy(dtype=float))].sort_index()
+    values = raw.to_numpy(dtype=float)
+    pos = np.arange(len(values))
+    ranks = np.clip(expanding_percentile_ranks(pos, values, pos, values), 0.0, 100.0)
+    return pd.Series(ranks, index=raw.index, name=name)
 
-    log(f"IC_GLOBAL calculat: {len(ic_index)} puncte")
 
+def compute_ic_global_structural(df: pd.DataFrame) -> pd.Series:
+    """
+    IC_GLOBAL: măsoară coeziunea structurală dintre pieţele de active
+    folosind media corelaţiilor absolute dintre randamentele zilnice,
+    pe o fereastră rulantă de WINDOW_STRUCT zile, normalizată pe 0–100.
+    """
+    ic_index = rank_full_history(compute_ic_global_raw(df), "ic_global")
+    log(f"IC_GLOBAL calculat: {len(ic_index)} puncte")
     return ic_index
 
 
 # ---- ICD_GLOBAL direcțional (flux de risc) -----------------------------------
 
-def compute_icd_global_directional(df: pd.DataFrame) -> pd.Series:
+def compute_icd_global_raw(df: pd.DataFrame) -> pd.Series:
     """
-    ICD_GLOBAL: direcţionalitatea globală (bias de risc) definită ca
-    randament cumulativ pe 60 de zile al unui coş:
-      + SPX, GOLD, OIL  (active ciclice / pro-creștere)
-      - VIX, DXY        (tensiune / presiune defensivă)
-    Normalizăm apoi în percentilă 0–100.
+    Randamentul cumulativ pe WINDOW_DIR zile al coşului de risc global
+    (valoarea brută din spatele ICD_GLOBAL).
     """
     if len(df) < WINDOW_DIR + 1:
         raise RuntimeError("Insuficiente date pentru fereastra direcțională.")
@@ -337,34 +385,23 @@ def compute_icd_global_directional(df: pd.DataFrame) -> pd.Series:
 
     cum_df = pd.DataFrame(cum).dropna()
 
-    # ponderi pentru coşul de risc global
-    w_spx, w_gold, w_oil, w_vix, w_dxy = 0.40, 0.15, 0.15, 0.15, 0.15
-
-    dir_raw = (
-        w_spx * cum_df["spx"]
-        + w_gold * cum_df["gold"]
-        + w_oil * cum_df["oil"]
-        - w_vix * cum_df["vix"]
-        - w_dxy * cum_df["dxy"]
-    ).dropna()
-
-    hist_vals = [float(x) for x in dir_raw.values if np.isfinite(x)]
-    sorted_hist = sorted(hist_vals)
+    # coşul de risc global (ICD_WEIGHTS / ICD_SIGNS), însumat în ordinea din dicţionar
+    basket = 0.0
+    for name, weight in ICD_WEIGHTS.items():
+        basket = basket + (ICD_SIGNS[name] * weight) * cum_df[name]
+    return basket.dropna()
 
-    icd_vals: Dict[pd.Timestamp, float] = {}
-
-    for ts, v in dir_raw.items():
-        if not np.isfinite(v):
-            continue
-
-        p = percentile_from_sorted(sorted_hist, float(v))
-        icd_vals[ts] = clamp(p, 0.0, 100.0)
-
-    icd_index = pd.Series(icd_vals).sort_index()
-    icd_index.name = "icd_global"
 
+def compute_icd_global_directional(df: pd.DataFrame) -> pd.Series:
+    """
+    ICD_GLOBAL: direcţionalitatea globală (bias de risc) definită ca
+    randament cumulativ pe 60 de zile al unui coş:
+      + SPX, GOLD, OIL  (active ciclice / pro-creștere)
+      - VIX, DXY        (tensiune / presiune defensivă)
+    Normalizăm apoi în percentilă 0–100.
+    """
+    icd_index = rank_full_history(compute_icd_global_raw(df), "icd_global")
     log(f"ICD_GLOBAL calculat: {len(icd_index)} puncte")
-
     return icd_index
 
 
@@ -455,6 +492,110 @@ def compute_risk_score_and_macro(ic_val: float, icd_val: float) -> Tuple[float,
     return risk_score, macro_signal
 
 
+@dataclass
+class GlobalColumns:
+    """Seria globală în format columnar (câte un array NumPy per câmp)."""
+    t: np.ndarray              # int64, ms UNIX
+    date: np.ndarray           # str, YYYY-MM-DD
+    ic_global: np.ndarray
+    icd_global: np.ndarray
+    coeziv_phase: np.ndarray
+    coeziv_energy: np.ndarray
+    risk_score: np.ndarray
+    macro_signal: np.ndarray   # str
+    global_regime: np.ndarray  # str
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+
+def compute_global_columns(ic_series: pd.Series, icd_series: pd.Series) -> GlobalColumns:
+    """
+    Varianta vectorizată a lui coeziv_phase / coeziv_energy /
+    classify_global_regime_coeziv / compute_risk_score_and_macro pentru tot
+    indexul deodată (np.sin, np.select), cu aceleași praguri.
+    """
+    index = pd.DatetimeIndex(ic_series.index)
+    ic = ic_series.to_numpy(dtype=float)
+    icd = icd_series.to_numpy(dtype=float)
+
+    for name, arr in (("ic_global", ic), ("icd_global", icd)):
+        if not np.all(np.isfinite(arr)):
+            raise ValueError(f"Valoare numerică nevalidă pentru JSON în {name}.")
+
+    ic_n = np.clip(ic / 100.0, 0.0, 1.0)
+    icd_n = np.clip(icd / 100.0, 0.0, 1.0)
+    phase = 2.0 * np.pi * (ic_n * icd_n)
+    energy = np.sin(phase)
+    risk_score = np.clip(energy, -1.0, 1.0)
+
+    regime = np.select([energy > 0.35, energy < -0.35], ["bull", "bear"], default="neutral")
+    macro_signal = np.select(
+        [risk_score > 0.2, risk_score < -0.2], ["risk-on", "risk-off"], default="echilibrat"
+    )
+
+    return GlobalColumns(
+        t=index.as_unit("ms").asi8,
+        date=np.asarray(index.strftime("%Y-%m-%d")),
+        ic_global=ic,
+        icd_global=icd,
+        coeziv_phase=phase,
+        coeziv_energy=energy,
+        risk_score=risk_score,
+        macro_signal=macro_signal,
+        global_regime=regime,
+    )
+
+
+def records_from_columns(cols: GlobalColumns) -> List[Dict[str, object]]:
+    """Serializează direct din array-uri lista de obiecte pentru series[]."""
+    keys = (
+        "t", "date", "ic_global", "icd_global", "coeziv_phase",
+        "coeziv_energy", "risk_score", "macro_signal", "global_regime",
+    )
+    columns = [getattr(cols, k).tolist() for k in keys]
+    return [dict(zip(keys, row)) for row in zip(*columns)]
+
+
+# codurile întregi ale câmpurilor text în formatul columnar
+MACRO_SIGNAL_TABLE = ["risk-on", "echilibrat", "risk-off"]
+GLOBAL_REGIME_TABLE = ["bull", "neutral", "bear"]
+ROUNDED_COLUMNS = ("ic_global", "icd_global", "coeziv_phase", "coeziv_energy", "risk_score")
+
+
+def encoded_columns(
+    cols: GlobalColumns,
+) -> Tuple[Dict[str, np.ndarray], Dict[str, List[Dict[str, str]]]]:
+    """Coloanele numerice, cu macro_signal / global_regime codate + dicționarele lor."""
+    macro_codes, macro_table = dictionary_encode(cols.macro_signal.tolist(), MACRO_SIGNAL_TABLE)
+    regime_codes, regime_table = dictionary_encode(cols.global_regime.tolist(), GLOBAL_REGIME_TABLE)
+
+    columns = {
+        "t": cols.t,
+        "ic_global": cols.ic_global,
+        "icd_global": cols.icd_global,
+        "coeziv_phase": cols.coeziv_phase,
+        "coeziv_energy": cols.coeziv_energy,
+        "risk_score": cols.risk_score,
+        "macro_signal": macro_codes,
+        "global_regime": regime_codes,
+    }
+    dictionaries = {
+        "macro_signal": [{"macro_signal": v} for v in macro_table],
+        "global_regime": [{"global_regime": v} for v in regime_table],
+    }
+    return columns, dictionaries
+
+
+def columnar_from_columns(cols: GlobalColumns, precision: Optional[int] = None) -> Dict[str, object]:
+    """Blocul columnar (coloane + dicționare) pentru global_coeziv_state.columnar.json."""
+    columns, dictionaries = encoded_columns(cols)
+    columns = {"t": columns.pop("t"), "date": cols.date, **columns}
+    return columnar_document(
+        columns, dictionaries, rounded=ROUNDED_COLUMNS, precision=precision
+    )
+
+
 def validate_state(state: Dict[str, object]) -> None:
     """Nu permite publicarea unui JSON gol sau structural invalid."""
     if not isinstance(state, dict):
@@ -462,13 +603,22 @@ def validate_state(state: Dict[str, object]) -> None:
 
     latest = state.get("latest")
     series = state.get("series")
+    columns = state.get("columns")
 
     if not isinstance(latest, dict) or not latest.get("date"):
         raise RuntimeError("State invalid: lipsește latest/date.")
 
-    if not isinstance(series, list) or len(series) < MIN_SERIES_COUNT:
+    # formatul legacy are series[], cel columnar are columns{t: [...], ...}
+    if isinstance(columns, dict) and isinstance(columns.get("t"), list):
+        points = len(columns["t"])
+    elif isinstance(series, list):
+        points = len(series)
+    else:
+        points = None
+
+    if points is None or points < MIN_SERIES_COUNT:
         raise RuntimeError(
-            f"State invalid: series are {len(series) if isinstance(series, list) else 'N/A'} puncte."
+            f"State invalid: series are {points if points is not None else 'N/A'} puncte."
         )
 
     for key in ["ic_global", "icd_global", "risk_score"]:
@@ -477,77 +627,124 @@ def validate_state(state: Dict[str, object]) -> None:
             raise RuntimeError(f"State invalid: latest.{key} este nevalid ({value!r}).")
 
 
-def write_state_atomically(state: Dict[str, object]) -> None:
+def write_state_atomically(
+    state: Dict[str, object], path: Optional[Path] = None, indent: Optional[int] = 2
+) -> None:
+    path = path or OUTPUT_JSON
     validate_state(state)
 
-    DATA_OUT.mkdir(parents=True, exist_ok=True)
+    path.parent.mkdir(parents=True, exist_ok=True)
 
-    text = json.dumps(state, ensure_ascii=False, indent=2)
-    parsed = json.loads(text)
-    validate_state(parsed)
+    with metrics_stage("serialize"):
+        if indent is None:
+            text = json.dumps(state, ensure_ascii=False, separators=(",", ":"))
+        else:
+            text = json.dumps(state, ensure_ascii=False, indent=indent)
+        parsed = json.loads(text)
+        validate_state(parsed)
 
     if len(text.strip()) < 200:
-        raise RuntimeError("Refuz să scriu global_coeziv_state.json: conținut prea scurt.")
+        raise RuntimeError(f"Refuz să scriu {path.name}: conținut prea scurt.")
 
-    tmp_path = OUTPUT_JSON.with_suffix(".json.tmp")
+    tmp_path = path.with_suffix(".json.tmp")
     with open(tmp_path, "w", encoding="utf-8") as f:
         f.write(text)
         f.write("\n")
 
-    tmp_path.replace(OUTPUT_JSON)
+    tmp_path.replace(path)
 
 
 # ---- orchestrare ------------------------------------------------------------
 
-def main() -> None:
+def align_ic_icd(ic_series: pd.Series, icd_series: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """Aliniază IC / ICD pe intersecția indexurilor."""
+    common_index = ic_series.index.intersection(icd_series.index)
+    return ic_series.loc[common_index], icd_series.loc[common_index]
+
+
+def write_partitioned(
+    ic_raw: pd.Series,
+    icd_raw: pd.Series,
+    by: str,
+    precision: Optional[int] = None,
+) -> Dict[str, object]:
+    """
+    Scrie data/global_coeziv_state/<an|lună>.json + manifest.json, cu
+    IC / ICD point-in-time. Meta nu conține updated_at, ca partițiile și
+    manifest-ul să rămână neschimbate la o rulare fără date noi.
+    """
+    ic_pit, icd_pit = align_ic_icd(
+        rank_point_in_time(ic_raw, "ic_global"),
+        rank_point_in_time(icd_raw, "icd_global"),
+    )
+    cols = compute_global_columns(ic_pit, icd_pit)
+    columns, dictionaries = encoded_columns(cols)
+    columns = {"t": columns.pop("t"), "date": cols.date, **columns}
+    return write_partitions(
+        OUTPUT_PARTITIONS,
+        columns,
+        dictionaries,
+        by,
+        rounded=ROUNDED_COLUMNS,
+        precision=precision,
+        meta={
+            "model": "global_coeziv_state",
+            "series": SERIES,
+            "window_struct": WINDOW_STRUCT,
+            "window_dir": WINDOW_DIR,
+            "ranking": "point-in-time",
+            "latest_date": str(cols.date[-1]) if len(cols) else None,
+        },
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build global_coeziv_state.json")
+    add_format_arguments(parser)
+    add_partition_arguments(parser)
+    args = parser.parse_args(argv)
+
+    coeziv_prom.start_job("build_global_coeziv_state")
     log("Pornesc build_global_coeziv_state.py (model coeziv extins)")
 
-    df = load_all_series()
+    with metrics_stage("load") as st:
+        df = load_all_series()
+        st.rows = len(df)
+
+    with metrics_stage("ic") as st:
+        ic_raw = compute_ic_global_raw(df)
+        ic_series = rank_full_history(ic_raw, "ic_global")
+        st.rows = len(ic_series)
+    log(f"IC_GLOBAL calculat: {len(ic_series)} puncte")
 
-    ic_series = compute_ic_global_structural(df)
-    icd_series = compute_icd_global_directional(df)
+    with metrics_stage("icd") as st:
+        icd_raw = compute_icd_global_raw(df)
+        icd_series = rank_full_history(icd_raw, "icd_global")
+        st.rows = len(icd_series)
+    log(f"ICD_GLOBAL calculat: {len(icd_series)} puncte")
 
     # aliniază pe acelaşi index
-    common_index = ic_series.index.intersection(icd_series.index)
-    ic_series = ic_series.loc[common_index]
-    icd_series = icd_series.loc[common_index]
+    with metrics_stage("align") as st:
+        ic_series, icd_series = align_ic_icd(ic_series, icd_series)
+        common_index = ic_series.index
+        st.rows = len(common_index)
 
     if not len(common_index):
         raise RuntimeError("Nu există intersecție de date IC/ICD.")
 
     log(f"Intersecție IC/ICD: {len(common_index)} puncte")
 
-    records: List[Dict[str, object]] = []
-
-    for ts in common_index:
-        t_ms = int(ts.timestamp() * 1000)
-        ic_val = json_safe_float(ic_series.loc[ts])
-        icd_val = json_safe_float(icd_series.loc[ts])
-
-        regime = classify_global_regime_coeziv(ic_val, icd_val)
-        risk_score, macro_signal = compute_risk_score_and_macro(ic_val, icd_val)
-        energy = json_safe_float(coeziv_energy(ic_val, icd_val))
-        phase = json_safe_float(coeziv_phase(ic_val, icd_val))
-
-        records.append({
-            "t": t_ms,
-            "date": ts.strftime("%Y-%m-%d"),
-            "ic_global": ic_val,
-            "icd_global": icd_val,
-            "coeziv_phase": phase,
-            "coeziv_energy": energy,
-            "risk_score": json_safe_float(risk_score),
-            "macro_signal": macro_signal,
-            "global_regime": regime.regime,
-        })
+    with metrics_stage("columns", rows=len(common_index)):
+        cols = compute_global_columns(ic_series, icd_series)
 
     latest_ts = common_index[-1]
-    latest_ic = json_safe_float(ic_series.loc[latest_ts])
-    latest_icd = json_safe_float(icd_series.loc[latest_ts])
+    latest_ic = json_safe_float(cols.ic_global[-1])
+    latest_icd = json_safe_float(cols.icd_global[-1])
     latest_regime = classify_global_regime_coeziv(latest_ic, latest_icd)
-    latest_risk_score, latest_macro_signal = compute_risk_score_and_macro(latest_ic, latest_icd)
-    latest_energy = json_safe_float(coeziv_energy(latest_ic, latest_icd))
-    latest_phase = json_safe_float(coeziv_phase(latest_ic, latest_icd))
+    latest_risk_score = json_safe_float(cols.risk_score[-1])
+    latest_macro_signal = str(cols.macro_signal[-1])
+    latest_energy = json_safe_float(cols.coeziv_energy[-1])
+    latest_phase = json_safe_float(cols.coeziv_phase[-1])
 
     thresholds = dynamic_thresholds(ic_series, icd_series)
 
@@ -578,13 +775,49 @@ def main() -> None:
             "description": latest_regime.description,
         },
         "thresholds": thresholds,
-        "series_count": len(records),
-        "series": records,
+        "series_count": len(cols),
     }
 
-    write_state_atomically(state)
+    if wants_legacy(args.format):
+        with metrics_stage("records", rows=len(cols)):
+            state["series"] = records_from_columns(cols)
+        with metrics_stage("write_legacy", rows=len(cols)):
+            write_state_atomically(state)
+        coeziv_prom.output(OUTPUT_JSON)
+        log(f"✅ Salvat {OUTPUT_JSON}")
+
+    if wants_columnar(args.format):
+        path = columnar_path(OUTPUT_JSON)
+        columnar_state = {k: v for k, v in state.items() if k != "series"}
+        columnar_state["version"] = "2.0"
+        columnar_state["source"] = {
+            **state["source"],
+            "output": f"data/{path.name}",
+        }
+        with metrics_stage("columnar", rows=len(cols)):
+            columnar_state.update(columnar_from_columns(cols, precision=args.precision))
+        with metrics_stage("write_columnar", rows=len(cols)):
+            write_state_atomically(columnar_state, path=path, indent=None)
+        coeziv_prom.output(path)
+        log(f"✅ Salvat {path} (columnar)")
+
+    with metrics_stage("write_store", rows=len(cols)):
+        columns, dictionaries = encoded_columns(cols)
+        size = write_store(
+            OUTPUT_BIN,
+            columns,
+            dictionaries,
+            meta={"model": state["model"], "updated_at": state["updated_at"], "latest_date": state["latest"]["date"]},
+        )
+    coeziv_prom.output(OUTPUT_BIN)
+    log(f"✅ Salvat {OUTPUT_BIN} (store binar, {size} bytes)")
+
+    if args.partition:
+        with metrics_stage("write_partitions"):
+            manifest = write_partitioned(ic_raw, icd_raw, args.partition, precision=args.precision)
+        written = ", ".join(manifest["_written"]) or "niciuna"
+        log(f"✅ {len(manifest['partitions'])} partiții în {OUTPUT_PARTITIONS} (rescrise: {written})")
 
-    log(f"✅ Salvat {OUTPUT_JSON}")
     log(
         "Latest global state: "
         f"date={state['latest']['date']}, "
@@ -595,6 +828,8 @@ def main() -> None:
         f"signal={latest_macro_signal}, "
         f"regime={latest_regime.regime}"
     )
+    coeziv_prom.freshness("global_coeziv_state", state["latest"]["date"])
+    coeziv_prom.write_job()
 
 
 if __name__ == "__main__":
@@ -1,11 +1,16 @@
+import argparse
 import json
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 
+import coeziv_prom
+from coeziv_latest import read_latest
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 
 SERIES_FILE = DATA_DIR / "ic_btc_series.json"
+STORE_FILE = DATA_DIR / "ic_btc_series.bin"
 OUT_FILE = DATA_DIR / "ic_btc_mega_latest.json"
 
 
@@ -87,9 +92,44 @@ def build_mega_score(icc, ic_struct, ic_flux):
     return round(clamp(raw, 0, 100), 1)
 
 
-def main():
+def read_store_last(path):
+    """
+    Ultimul rând din store-ul binar (coeziv_binary_store.py), sau None dacă
+    store-ul lipsește, e gol ori e mai vechi decât ic_btc_series.json.
+    """
+    if not path.exists():
+        return None
+    # export_ic_btc_series scrie store-ul după JSON, în aceeași rulare
+    if SERIES_FILE.exists() and path.stat().st_mtime < SERIES_FILE.stat().st_mtime:
+        return None
+    # importat aici: numpy nu intră în importul scriptului
+    from coeziv_binary_store import open_store
+
+    try:
+        store = open_store(path)
+    except (OSError, ValueError):
+        return None
+    if len(store) == 0:
+        return None
+    return store.row(len(store) - 1)
+
+
+def load_last_point():
+    """
+    Ultimul punct din seria IC BTC: din store-ul binar ic_btc_series.bin
+    (memmap, se citește un singur rând), apoi din sidecar-ul
+    ic_btc_series_latest.json, cu fallback la citirea completă a seriei.
+    """
+    last = read_store_last(STORE_FILE)
+    if last is not None:
+        return last
+
     if not SERIES_FILE.exists():
-        raise RuntimeError("Lipsă ic_btc_series.json")
+        raise RuntimeError("Lipsă ic_btc_series.bin și ic_btc_series.json")
+
+    last = read_latest(SERIES_FILE)
+    if last is not None:
+        return last
 
     with open(SERIES_FILE, "r", encoding="utf-8") as f:
         data = json.load(f)
@@ -98,7 +138,14 @@ def main():
     if not series:
         raise RuntimeError("Seria IC BTC este goală")
 
-    last = series[-1]
+    return series[-1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mega Coeziv state din ultimul punct IC BTC.")
+    parser.parse_args(argv)
+    coeziv_prom.start_job("build_ic_btc_mega_state")
+    last = load_last_point()
 
     icc = safe_float(last.get("icc") or last.get("ic_cycle"))
     ic_struct = safe_float(last.get("ic_struct") or last.get("ic_btc"))
@@ -126,6 +173,11 @@ def main():
 
     OUT_FILE.write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
     print(f"[OK] Mega Coeziv state salvat în {OUT_FILE}")
+    if last.get("t") is not None:
+        # data punctului din serie, nu ziua rulării din "date"
+        coeziv_prom.freshness("ic_btc_mega", datetime.fromtimestamp(last["t"] / 1000, timezone.utc))
+    coeziv_prom.output(OUT_FILE)
+    coeziv_prom.write_job()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,415 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+coeziv.py
+
+Runner-ul pipeline-ului Coeziv: rulează etapele din workflow-ul
+coeziv-global.yml într-un singur proces Python, în ordinea dependențelor:
+
+    global_download -> global_build -> btc_state
+    chain_sync -> btc_cost, btc_cost_sensitivity
+    series -> mega
+
+    python scripts/coeziv.py run              # rulează ce s-a schimbat
+    python scripts/coeziv.py run --force      # rulează tot
+    python scripts/coeziv.py run --only series,mega
+    python scripts/coeziv.py status           # ce ar rula, fără să ruleze
+
+Fiecare etapă are o amprentă sha256 a intrărilor: conținutul fișierelor de
+intrare, codul sursă al scriptului și al modulelor locale importate de el
+(găsite prin AST) și argumentele. Dacă amprenta coincide cu cea salvată în
+data/coeziv_pipeline_state.json și toate ieșirile există, etapa e sărită.
+
+- etapele cu surse externe (descărcări) rulează mereu (ALWAYS);
+- etapele care depind de data curentă (difficulty live, data din mega)
+  au ziua UTC în amprentă (DAILY): rulează cel mult o dată pe zi dacă
+  intrările nu se schimbă;
+- la prima eroare runner-ul se oprește (ca workflow-ul), dar amprentele
+  etapelor reușite rămân salvate.
+
+Modulele etapelor se importă o singură dată, deci pandas / numpy și
+motorul comun se încarcă o dată pe rulare, nu o dată pe script.
+
+`run --metrics` (sau COEZIV_METRICS=1) pornește coeziv_metrics: timp și
+memorie de vârf pe etapă și pe sub-etapele scripturilor, scrise la final
+în data/_metrics/run-<timestamp>.json.
+
+`run --prom-dir DIR` (sau COEZIV_PROM_DIR) pornește coeziv_prom: fiecare
+script scrie DIR/coeziv_<script>.prom, iar runner-ul DIR/coeziv_pipeline.prom
+(starea și durata fiecărei etape, inclusiv după o eroare).
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import hashlib
+import importlib
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+import coeziv_metrics
+import coeziv_prom
+from coeziv_metrics import metrics_stage
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = ROOT / "scripts"
+DATA_DIR = ROOT / "data"
+DATA_GLOBAL = ROOT / "data_global"
+STATE_PATH = DATA_DIR / "coeziv_pipeline_state.json"
+STATE_VERSION = 1
+
+# ieșirile publicate, aceleași ca în workflow
+PUBLISH_ARGS = ["--format", "both", "--precision", "4", "--partition", "year"]
+
+ALWAYS = "always"
+DAILY = "daily"
+ON_CHANGE = "on-change"
+
+
+def log(msg: str) -> None:
+    print(f"[Coeziv] {msg}", flush=True)
+
+
+@dataclass
+class Stage:
+    name: str
+    module: str
+    inputs: List[Path] = field(default_factory=list)
+    outputs: List[Path] = field(default_factory=list)
+    args: List[str] = field(default_factory=list)
+    deps: List[str] = field(default_factory=list)
+    policy: str = ON_CHANGE
+
+
+STAGES: List[Stage] = [
+    Stage(
+        name="global_download",
+        module="update_global_coeziv_state",
+        outputs=[DATA_GLOBAL / f"{n}.csv" for n in ("spx", "vix", "dxy", "gold", "oil")],
+        policy=ALWAYS,
+    ),
+    Stage(
+        name="global_build",
+        module="build_global_coeziv_state",
+        inputs=[DATA_GLOBAL / f"{n}.csv" for n in ("spx", "vix", "dxy", "gold", "oil")],
+        outputs=[
+            DATA_DIR / "global_coeziv_state.json",
+            DATA_DIR / "global_coeziv_state.columnar.json",
+            DATA_DIR / "global_coeziv_state" / "manifest.json",
+        ],
+        args=PUBLISH_ARGS,
+        deps=["global_download"],
+    ),
+    Stage(
+        name="btc_state",
+        module="update_btc_state_latest_from_daily",
+        inputs=[DATA_DIR / "btc_daily.csv", DATA_GLOBAL / "global_coeziv_state.json"],
+        outputs=[DATA_DIR / "btc_state_latest.json"],
+        deps=["global_build"],
+    ),
+    Stage(
+        name="chain_sync",
+        module="coeziv_chain_store",
+        outputs=[DATA_DIR / "btc_chain_daily.csv"],
+        policy=ALWAYS,
+    ),
+    Stage(
+        name="btc_cost",
+        module="build_btc_cost_state",
+        inputs=[DATA_DIR / "btc_daily.csv", DATA_DIR / "btc_chain_daily.csv"],
+        outputs=[DATA_DIR / "btc_cost_state.json", DATA_DIR / "btc_cost_series.json"],
+        deps=["chain_sync"],
+        policy=DAILY,
+    ),
+    Stage(
+        name="btc_cost_sensitivity",
+        module="build_btc_cost_sensitivity",
+        inputs=[DATA_DIR / "btc_daily.csv", DATA_DIR / "btc_chain_daily.csv"],
+        outputs=[DATA_DIR / "btc_cost_sensitivity.json"],
+        deps=["chain_sync"],
+    ),
+    Stage(
+        name="series",
+        module="export_ic_btc_series",
+        inputs=[DATA_DIR / "btc_daily.csv"],
+        outputs=[
+            DATA_DIR / "ic_btc_series.json",
+            DATA_DIR / "ic_btc_series_latest.json",
+            DATA_DIR / "ic_btc_series.columnar.json",
+            DATA_DIR / "ic_btc_series" / "manifest.json",
+            DATA_DIR / "ic_btc_series_state.json",
+            DATA_DIR / "ic_btc_series.bin",
+        ],
+        args=["--incremental"] + PUBLISH_ARGS,
+    ),
+    Stage(
+        name="mega",
+        module="build_ic_btc_mega_state",
+        # mega citește doar ultimul punct: din store-ul binar, altfel din sidecar
+        inputs=[DATA_DIR / "ic_btc_series.bin", DATA_DIR / "ic_btc_series_latest.json"],
+        outputs=[DATA_DIR / "ic_btc_mega_latest.json"],
+        deps=["series"],
+        policy=DAILY,
+    ),
+]
+STAGES_BY_NAME: Dict[str, Stage] = {s.name: s for s in STAGES}
+
+
+# ---------- amprente ----------
+
+def local_imports(module: str) -> Set[str]:
+    """Modulul + toate modulele locale din scripts/ importate (tranzitiv)."""
+    seen: Set[str] = set()
+    todo = [module]
+    while todo:
+        name = todo.pop()
+        path = SCRIPTS_DIR / f"{name}.py"
+        if name in seen or not path.exists():
+            continue
+        seen.add(name)
+        tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                todo.extend(alias.name.split(".")[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                todo.append(node.module.split(".")[0])
+    return seen
+
+
+def _hash_file(h: Any, path: Path) -> None:
+    h.update(str(path.relative_to(ROOT)).encode("utf-8"))
+    if not path.exists():
+        h.update(b"\0<missing>")
+        return
+    h.update(b"\0")
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+
+
+def stage_fingerprint(stage: Stage, today: Optional[str] = None) -> Optional[str]:
+    """Amprenta sha256 a etapei; None pentru etapele ALWAYS."""
+    if stage.policy == ALWAYS:
+        return None
+    h = hashlib.sha256()
+    h.update(json.dumps([stage.name, stage.module, stage.args]).encode("utf-8"))
+    for name in sorted(local_imports(stage.module)):
+        _hash_file(h, SCRIPTS_DIR / f"{name}.py")
+    for path in stage.inputs:
+        _hash_file(h, path)
+    if stage.policy == DAILY:
+        h.update((today or datetime.now(timezone.utc).strftime("%Y-%m-%d")).encode("utf-8"))
+    return h.hexdigest()
+
+
+def load_state(path: Path = STATE_PATH) -> Dict[str, Dict[str, str]]:
+    if not path.exists():
+        return {}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return {}
+    if data.get("version") != STATE_VERSION:
+        return {}
+    return data.get("stages", {})
+
+
+def save_state(stages: Dict[str, Dict[str, str]], path: Path = STATE_PATH) -> None:
+    # fără coeziv_series_format: runner-ul nu importă NumPy decât prin etape
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": STATE_VERSION, "stages": dict(sorted(stages.items()))}, f, indent=2)
+        f.write("\n")
+    tmp_path.replace(path)
+
+
+# ---------- graf ----------
+
+def ordered_stages(names: Optional[Iterable[str]] = None) -> List[Stage]:
+    """Etapele cerute, în ordine topologică (ordinea din STAGES la egalitate)."""
+    wanted = set(names) if names is not None else set(STAGES_BY_NAME)
+    unknown = wanted - set(STAGES_BY_NAME)
+    if unknown:
+        raise ValueError(f"Etape necunoscute: {', '.join(sorted(unknown))}")
+
+    order: List[Stage] = []
+    done: Set[str] = set()
+    visiting: Set[str] = set()
+
+    def visit(stage: Stage) -> None:
+        if stage.name in done:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"Ciclu de dependențe la etapa {stage.name}")
+        visiting.add(stage.name)
+        for dep in stage.deps:
+            visit(STAGES_BY_NAME[dep])
+        visiting.discard(stage.name)
+        done.add(stage.name)
+        order.append(stage)
+
+    for stage in STAGES:
+        visit(stage)
+    return [s for s in order if s.name in wanted]
+
+
+def skip_reason(
+    stage: Stage, fingerprint: Optional[str], state: Dict[str, Dict[str, str]]
+) -> Optional[str]:
+    """Motivul pentru care etapa poate fi sărită, sau None dacă trebuie rulată."""
+    if fingerprint is None:
+        return None
+    if state.get(stage.name, {}).get("fingerprint") != fingerprint:
+        return None
+    if not all(p.exists() for p in stage.outputs):
+        return None
+    return "intrări neschimbate"
+
+
+# ---------- rulare ----------
+
+def run_stage(stage: Stage) -> None:
+    with metrics_stage(stage.name):
+        module = importlib.import_module(stage.module)
+        # argumentele se dau mereu explicit: fără ele argparse ar citi
+        # sys.argv-ul runner-ului ("run", "--only", ...)
+        module.main(list(stage.args))
+
+
+def run_pipeline(
+    names: Optional[Iterable[str]] = None, force: bool = False, dry_run: bool = False
+) -> Dict[str, str]:
+    """Rulează etapele; întoarce {etapă: "ran" | "skipped" | "would-run"}."""
+    state = load_state()
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    results: Dict[str, str] = {}
+    durations: Dict[str, float] = {}
+    try:
+        _run_stages(ordered_stages(names), state, today, force, dry_run, results, durations)
+    finally:
+        if not dry_run:
+            write_pipeline_metrics(results, durations)
+    return results
+
+
+def _run_stages(
+    stages: List[Stage],
+    state: Dict[str, Dict[str, str]],
+    today: str,
+    force: bool,
+    dry_run: bool,
+    results: Dict[str, str],
+    durations: Dict[str, float],
+) -> None:
+    for stage in stages:
+        # amprenta se calculează după ce dependențele au rulat
+        fingerprint = stage_fingerprint(stage, today)
+        reason = None if force else skip_reason(stage, fingerprint, state)
+        if reason is not None:
+            log(f"⏭  {stage.name}: sărit ({reason})")
+            results[stage.name] = "skipped"
+            continue
+        if dry_run:
+            log(f"•  {stage.name}: ar rula")
+            results[stage.name] = "would-run"
+            continue
+
+        log(f"▶  {stage.name} ({stage.module})")
+        start = time.perf_counter()
+        try:
+            run_stage(stage)
+        except BaseException:
+            durations[stage.name] = time.perf_counter() - start
+            results[stage.name] = "failed"
+            log(f"✖  {stage.name}: eșuat după {durations[stage.name]:.2f}s")
+            raise
+        durations[stage.name] = time.perf_counter() - start
+        log(f"✔  {stage.name}: {durations[stage.name]:.2f}s")
+        results[stage.name] = "ran"
+
+        if fingerprint is not None:
+            state[stage.name] = {"fingerprint": fingerprint}
+            save_state(state)
+
+
+def write_pipeline_metrics(results: Dict[str, str], durations: Dict[str, float]) -> None:
+    """coeziv_pipeline.prom: starea și durata etapelor din această rulare."""
+    if not coeziv_prom.enabled() or not results:
+        return
+    registry = coeziv_prom.Registry()
+    for name, status in results.items():
+        registry.set(
+            "coeziv_pipeline_stage_success", int(status != "failed"),
+            "1 dacă etapa a reușit sau a fost sărită.", stage=name,
+        )
+        registry.set(
+            "coeziv_pipeline_stage_skipped", int(status == "skipped"),
+            "1 dacă etapa a fost sărită (amprentă neschimbată).", stage=name,
+        )
+        if name in durations:
+            registry.set(
+                "coeziv_pipeline_stage_duration_seconds", durations[name],
+                "Durata etapei în runner (secunde).", stage=name,
+            )
+    registry.set(
+        "coeziv_pipeline_last_run_timestamp_seconds", time.time(),
+        "Momentul ultimei rulări a pipeline-ului (epoch).",
+    )
+    path = coeziv_prom.write_textfile("pipeline", registry)
+    log(f"Metrici Prometheus -> {path}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Pipeline Coeziv într-un singur proces.")
+    sub = parser.add_subparsers(dest="command")
+
+    p_run = sub.add_parser("run", help="rulează etapele modificate")
+    p_run.add_argument("--force", action="store_true", help="ignoră amprentele, rulează tot")
+    p_run.add_argument("--only", default=None, help="listă de etape separate prin virgulă")
+    p_run.add_argument(
+        "--metrics", action="store_true",
+        help="timp și memorie pe etape -> data/_metrics/run-<timestamp>.json",
+    )
+    p_run.add_argument(
+        "--prom-dir", type=Path, default=None,
+        help="director textfile node_exporter pentru fișierele .prom (implicit: $COEZIV_PROM_DIR)",
+    )
+
+    p_status = sub.add_parser("status", help="arată ce etape ar rula")
+    p_status.add_argument("--only", default=None, help="listă de etape separate prin virgulă")
+
+    args = parser.parse_args(argv)
+    command = args.command or "run"
+    only = getattr(args, "only", None)
+    names = [n.strip() for n in only.split(",") if n.strip()] if only else None
+    if getattr(args, "metrics", False):
+        coeziv_metrics.enable()
+    if getattr(args, "prom_dir", None) is not None:
+        coeziv_prom.enable(args.prom_dir)
+
+    start = time.perf_counter()
+    results = run_pipeline(
+        names,
+        force=getattr(args, "force", False),
+        dry_run=command == "status",
+    )
+    counts = {r: sum(1 for v in results.values() if v == r) for r in ("ran", "would-run", "skipped")}
+    if command == "status":
+        log(f"Pipeline: {counts['would-run']} ar rula, {counts['skipped']} sărite")
+    else:
+        log(
+            f"Pipeline: {counts['ran']} rulate, {counts['skipped']} sărite "
+            f"în {time.perf_counter() - start:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+coeziv_bench.py
+
+Benchmark pentru funcțiile fierbinți ale pipeline-ului Coeziv, pe istorii
+sintetice mari (deterministe), cu rezultate JSON și comparație cu un
+baseline salvat.
+
+Date sintetice (gbm_panel): prețuri GBM zilnice, seed fix, cu un factor
+comun (corelație între piețe) și drift / volatilitate diferite pe piață;
+aceleași argumente dau mereu exact aceleași prețuri.
+
+Cazuri (CASES), fiecare pe dimensiunile din preset (rânduri x piețe):
+
+    ema, rolling_std, percentile_rank        coeziv_indicators
+    compute_state_from_prices                update_btc_state_latest_from_daily
+    build_ic_series                          export_ic_btc_series (CSV rece)
+    compute_ic_global_structural,
+    compute_icd_global_directional,
+    load_all_series                          build_global_coeziv_state
+    write_json_columnar, write_json_legacy   scriitorii JSON ai seriei globale
+
+Presetări: quick (10k rânduri, 5 piețe), default (10k–100k, 5–50),
+large (10k–1M, 5–500). Cazurile pe mai multe piețe sunt limitate la
+MAX_PANEL_CELLS celule (rânduri x piețe), iar cele care trec prin pandas
+la MAX_PANDAS_ROWS zile (datele trebuie să încapă în intervalul
+pd.Timestamp); combinațiile peste limite sunt sărite.
+
+    python scripts/coeziv_bench.py run                      # preset default
+    python scripts/coeziv_bench.py run --preset quick --only ema,rolling_std
+    python scripts/coeziv_bench.py run --save-baseline      # devine baseline
+    python scripts/coeziv_bench.py compare data/_bench/bench-<ts>.json
+    python scripts/coeziv_bench.py compare CURENT --baseline ALT.json --threshold 0.25
+
+`compare` compară mediana fiecărui caz comun cu baseline-ul și iese cu
+codul 1 dacă vreun caz e mai lent cu peste --threshold (relativ) și cu
+peste --min-delta secunde (zgomotul cazurilor foarte scurte).
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+ROOT = Path(__file__).resolve().parents[1]
+BENCH_DIR = ROOT / "data" / "_bench"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+SCHEMA = "coeziv-bench/1"
+
+PRESETS: Dict[str, Tuple[Tuple[int, ...], Tuple[int, ...]]] = {
+    "quick": ((10_000,), (5,)),
+    "default": ((10_000, 100_000), (5, 50)),
+    "large": ((10_000, 100_000, 1_000_000), (5, 50, 500)),
+}
+REPEAT = 5
+THRESHOLD = 0.15
+MIN_DELTA = 0.002  # secunde
+
+MAX_PANEL_CELLS = 20_000_000
+MAX_PANDAS_ROWS = 100_000   # 1900-01-01 + 100k zile < pd.Timestamp.max
+START_DATE = "1900-01-01"
+
+
+def log(msg: str) -> None:
+    print(f"[coeziv_bench] {msg}", flush=True)
+
+
+# ---------- date sintetice ----------
+
+def gbm_panel(
+    rows: int, markets: int = 1, seed: int = 42,
+    s0: float = 100.0, rho: float = 0.4,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (date datetime64[D] zilnice de la START_DATE, prețuri (rows, markets)):
+    GBM cu pas dt = 1/365, drift 0–15% și volatilitate 15–90% anual pe
+    piață, șocuri corelate printr-un factor comun (rho).
+    """
+    rng = np.random.default_rng(seed)
+    dt = 1.0 / 365.0
+    mu = np.linspace(0.0, 0.15, markets)
+    sigma = np.linspace(0.15, 0.90, markets)
+    common = rng.standard_normal((rows - 1, 1))
+    shocks = rho * common + np.sqrt(1.0 - rho ** 2) * rng.standard_normal((rows - 1, markets))
+    log_ret = (mu - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * shocks
+    log_prices = np.vstack([np.zeros((1, markets)), np.cumsum(log_ret, axis=0)])
+    prices = s0 * np.exp(log_prices)
+    dates = np.datetime64(START_DATE, "D") + np.arange(rows)
+    return dates, prices
+
+
+def write_daily_csv(path: Path, dates: np.ndarray, closes: np.ndarray) -> None:
+    """CSV în formatul data/btc_daily.csv / data_global/*.csv (date,close)."""
+    text = "\n".join(f"{d},{c!r}" for d, c in zip(dates.astype(str), closes.tolist()))
+    path.write_text("date,close\n" + text + "\n", encoding="utf-8")
+
+
+def panel_frame(dates: np.ndarray, prices: np.ndarray, names: Sequence[str]) -> Any:
+    import pandas as pd
+
+    index = pd.DatetimeIndex(dates.astype("datetime64[ns]"), tz="UTC")
+    return pd.DataFrame(prices, index=index, columns=list(names))
+
+
+# ---------- cazuri ----------
+
+@dataclass
+class Prepared:
+    """Funcția de cronometrat (fără argumente) + un hook opțional înainte de fiecare rulare."""
+    call: Callable[[], Any]
+    before_each: Optional[Callable[[], None]] = None
+    cleanup: Optional[Callable[[], None]] = None
+
+
+@dataclass
+class Case:
+    name: str
+    prepare: Callable[[int, int, Path], Prepared]  # (rows, markets, tmp_dir)
+    multi_market: bool = False   # altfel rulează doar cu markets = 1
+    pandas: bool = False         # limitat la MAX_PANDAS_ROWS
+    markets: Optional[int] = None  # număr fix de piețe (ex. coșul ICD)
+
+    def sizes(self, rows: Sequence[int], markets: Sequence[int]) -> List[Tuple[int, int]]:
+        if self.markets is not None:
+            market_list: Sequence[int] = (self.markets,)
+        elif self.multi_market:
+            market_list = markets
+        else:
+            market_list = (1,)
+        out = []
+        for r in rows:
+            for m in market_list:
+                if self.pandas and r > MAX_PANDAS_ROWS:
+                    continue
+                if m > 1 and r * m > MAX_PANEL_CELLS:
+                    continue
+                out.append((r, m))
+        return out
+
+
+def _prep_ema(rows: int, markets: int, tmp: Path) -> Prepared:
+    from coeziv_indicators import ema
+
+    closes = gbm_panel(rows)[1][:, 0]
+    return Prepared(lambda: ema(closes, 200))
+
+
+def _prep_rolling_std(rows: int, markets: int, tmp: Path) -> Prepared:
+    from coeziv_indicators import rolling_std
+
+    closes = gbm_panel(rows)[1][:, 0]
+    return Prepared(lambda: rolling_std(closes, 200))
+
+
+def _prep_percentile_rank(rows: int, markets: int, tmp: Path) -> Prepared:
+    from coeziv_indicators import percentile_rank
+
+    closes = gbm_panel(rows)[1][:, 0]
+    return Prepared(lambda: percentile_rank(closes, float(closes[-1])))
+
+
+def _prep_state(rows: int, markets: int, tmp: Path) -> Prepared:
+    from update_btc_state_latest_from_daily import compute_state_from_prices
+
+    dates, prices = gbm_panel(rows)
+    closes = prices[:, 0]
+    return Prepared(lambda: compute_state_from_prices(dates, closes))
+
+
+def _prep_ic_series(rows: int, markets: int, tmp: Path) -> Prepared:
+    import coeziv_btc_daily
+    import export_ic_btc_series
+
+    dates, prices = gbm_panel(rows)
+    csv_path = tmp / "btc_daily.csv"
+    write_daily_csv(csv_path, dates, prices[:, 0])
+    original = export_ic_btc_series.INPUT_DAILY
+    export_ic_btc_series.INPUT_DAILY = csv_path
+
+    def cold() -> None:
+        # CSV rece: fără memo-ul din proces și fără cache-ul .npz
+        coeziv_btc_daily._MEMO.clear()
+        shutil.rmtree(tmp / coeziv_btc_daily.CACHE_DIR_NAME, ignore_errors=True)
+
+    def restore() -> None:
+        export_ic_btc_series.INPUT_DAILY = original
+
+    return Prepared(export_ic_btc_series.build_ic_series, before_each=cold, cleanup=restore)
+
+
+def _prep_ic_structural(rows: int, markets: int, tmp: Path) -> Prepared:
+    from build_global_coeziv_state import compute_ic_global_structural
+
+    dates, prices = gbm_panel(rows, markets)
+    df = panel_frame(dates, prices, [f"m{i:03d}" for i in range(markets)])
+    return Prepared(lambda: compute_ic_global_structural(df))
+
+
+def _prep_icd_directional(rows: int, markets: int, tmp: Path) -> Prepared:
+    from build_global_coeziv_state import SERIES, compute_icd_global_directional
+
+    dates, prices = gbm_panel(rows, len(SERIES))
+    df = panel_frame(dates, prices, SERIES)
+    return Prepared(lambda: compute_icd_global_directional(df))
+
+
+def _prep_load_all_series(rows: int, markets: int, tmp: Path) -> Prepared:
+    import build_global_coeziv_state as bg
+
+    dates, prices = gbm_panel(rows, markets)
+    names = [f"m{i:03d}" for i in range(markets)]
+    for i, name in enumerate(names):
+        write_daily_csv(tmp / f"{name}.csv", dates, prices[:, i])
+    original = (bg.DATA_GLOBAL, bg.SERIES)
+    bg.DATA_GLOBAL, bg.SERIES = tmp, names
+
+    def restore() -> None:
+        bg.DATA_GLOBAL, bg.SERIES = original
+
+    return Prepared(bg.load_all_series, cleanup=restore)
+
+
+def _global_columns(rows: int) -> Any:
+    import build_global_coeziv_state as bg
+
+    dates, prices = gbm_panel(rows, 2)
+    df = panel_frame(dates, prices, ["ic", "icd"])
+    ic = bg.rank_point_in_time(df["ic"], "ic_global")
+    icd = bg.rank_point_in_time(df["icd"], "icd_global")
+    return bg.compute_global_columns(ic, icd)
+
+
+def _prep_write_columnar(rows: int, markets: int, tmp: Path) -> Prepared:
+    from build_global_coeziv_state import columnar_from_columns
+    from coeziv_series_format import write_json_atomic
+
+    cols = _global_columns(rows)
+    path = tmp / "global_coeziv_state.columnar.json"
+    return Prepared(lambda: write_json_atomic(path, columnar_from_columns(cols, precision=4)))
+
+
+def _prep_write_legacy(rows: int, markets: int, tmp: Path) -> Prepared:
+    from build_global_coeziv_state import records_from_columns, write_state_atomically
+
+    cols = _global_columns(rows)
+    latest = {"date": str(cols.date[-1]), "ic_global": 50.0, "icd_global": 50.0, "risk_score": 0.0}
+    path = tmp / "global_coeziv_state.json"
+    return Prepared(
+        lambda: write_state_atomically(
+            {"model": "bench", "latest": latest, "series": records_from_columns(cols)}, path=path,
+        )
+    )
+
+
+CASES: Dict[str, Case] = {
+    c.name: c
+    for c in (
+        Case("ema", _prep_ema),
+        Case("rolling_std", _prep_rolling_std),
+        Case("percentile_rank", _prep_percentile_rank),
+        Case("compute_state_from_prices", _prep_state),
+        Case("build_ic_series", _prep_ic_series),
+        Case("compute_ic_global_structural", _prep_ic_structural, multi_market=True, pandas=True),
+        Case("compute_icd_global_directional", _prep_icd_directional, pandas=True, markets=5),
+        Case("load_all_series", _prep_load_all_series, multi_market=True, pandas=True),
+        Case("write_json_columnar", _prep_write_columnar, pandas=True),
+        Case("write_json_legacy", _prep_write_legacy, pandas=True),
+    )
+}
+
+
+# ---------- rulare ----------
+
+def case_id(name: str, rows: int, markets: int) -> str:
+    return f"{name}[rows={rows},markets={markets}]"
+
+
+def time_case(case: Case, rows: int, markets: int, repeat: int) -> Dict[str, Any]:
+    """Rulează cazul repeat ori (după o rulare de încălzire); timpi în secunde."""
+    with tempfile.TemporaryDirectory(prefix="coeziv_bench_") as tmp:
+        # log-urile scripturilor nu intră în rezultat și nu aglomerează ieșirea
+        with contextlib.redirect_stdout(io.StringIO()):
+            prepared = case.prepare(rows, markets, Path(tmp))
+            try:
+                times: List[float] = []
+                for i in range(repeat + 1):
+                    if prepared.before_each is not None:
+                        prepared.before_each()
+                    t0 = time.perf_counter()
+                    prepared.call()
+                    elapsed = time.perf_counter() - t0
+                    if i:
+                        times.append(elapsed)
+            finally:
+                if prepared.cleanup is not None:
+                    prepared.cleanup()
+    return {
+        "name": case.name,
+        "rows": rows,
+        "markets": markets,
+        "repeat": repeat,
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+    }
+
+
+def environment() -> Dict[str, Any]:
+    import pandas as pd
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def run_suite(
+    names: Sequence[str], rows: Sequence[int], markets: Sequence[int], repeat: int = REPEAT,
+) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name in names:
+        case = CASES[name]
+        for r, m in case.sizes(rows, markets):
+            res = time_case(case, r, m, repeat)
+            results[case_id(name, r, m)] = res
+            log(f"{case_id(name, r, m):<58} median {res['median_s'] * 1000:10.2f} ms  (min {res['min_s'] * 1000:.2f})")
+    return {
+        "schema": SCHEMA,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "cases": results,
+    }
+
+
+def write_results(path: Path, doc: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(json.dumps(doc, indent=2) + "\n", encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    if doc.get("schema") != SCHEMA:
+        raise SystemExit(f"{path}: schema necunoscută {doc.get('schema')!r} (aștept {SCHEMA})")
+    return doc
+
+
+# ---------- comparație ----------
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any],
+    threshold: float = THRESHOLD, min_delta: float = MIN_DELTA,
+) -> List[str]:
+    """Tabelul comparației; întoarce lista de regresii (goală = OK)."""
+    base_cases, cur_cases = baseline["cases"], current["cases"]
+    regressions: List[str] = []
+    print(f"{'caz':<58} {'baseline':>11} {'curent':>11} {'raport':>7}")
+    for cid in sorted(set(base_cases) & set(cur_cases)):
+        b, c = base_cases[cid]["median_s"], cur_cases[cid]["median_s"]
+        ratio = c / b if b > 0 else float("inf")
+        slow = ratio > 1.0 + threshold and c - b > min_delta
+        mark = "REGRESIE" if slow else ("mai rapid" if ratio < 1.0 - threshold else "")
+        print(f"{cid:<58} {b * 1000:9.2f}ms {c * 1000:9.2f}ms {ratio:6.2f}x {mark}")
+        if slow:
+            regressions.append(f"{cid}: {b * 1000:.2f} ms -> {c * 1000:.2f} ms ({ratio:.2f}x)")
+
+    for cid in sorted(set(base_cases) - set(cur_cases)):
+        print(f"{cid:<58} (lipsește din rularea curentă)")
+    for cid in sorted(set(cur_cases) - set(base_cases)):
+        print(f"{cid:<58} (nou, fără baseline)")
+    if baseline.get("environment") != current.get("environment"):
+        print("\nATENȚIE: mediul diferă de al baseline-ului (python / numpy / mașină).")
+    return regressions
+
+
+def _names(only: Optional[str]) -> List[str]:
+    if not only:
+        return list(CASES)
+    names = [n.strip() for n in only.split(",") if n.strip()]
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        raise SystemExit(f"Cazuri necunoscute: {', '.join(unknown)} (disponibile: {', '.join(CASES)})")
+    return names
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark pentru funcțiile fierbinți Coeziv.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="rulează benchmark-ul și scrie rezultatele JSON")
+    p_run.add_argument("--preset", choices=sorted(PRESETS), default="default")
+    p_run.add_argument("--only", default=None, help="cazuri separate prin virgulă")
+    p_run.add_argument("--repeat", type=int, default=REPEAT, help="rulări cronometrate per caz")
+    p_run.add_argument("--out", type=Path, default=None, help="implicit data/_bench/bench-<ts>.json")
+    p_run.add_argument("--save-baseline", action="store_true", help=f"scrie și {BASELINE_PATH.name}")
+
+    p_cmp = sub.add_parser("compare", help="compară o rulare cu baseline-ul")
+    p_cmp.add_argument("current", type=Path)
+    p_cmp.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    p_cmp.add_argument("--threshold", type=float, default=THRESHOLD, help="încetinire relativă tolerată")
+    p_cmp.add_argument("--min-delta", type=float, default=MIN_DELTA, help="încetinire absolută minimă (s)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        rows, markets = PRESETS[args.preset]
+        doc = run_suite(_names(args.only), rows, markets, max(1, args.repeat))
+        doc["preset"] = args.preset
+        out = args.out or BENCH_DIR / f"bench-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json"
+        write_results(out, doc)
+        log(f"Scris {out} ({len(doc['cases'])} cazuri)")
+        if args.save_baseline:
+            write_results(BASELINE_PATH, doc)
+            log(f"Baseline: {BASELINE_PATH}")
+        return
+
+    if not args.baseline.exists():
+        raise SystemExit(f"Nu există baseline {args.baseline} (rulează `run --save-baseline`).")
+    regressions = compare(load_results(args.baseline), load_results(args.current), args.threshold, args.min_delta)
+    if regressions:
+        print(f"\nRegresii peste {args.threshold:.0%}:")
+        for r in regressions:
+            print(f"  - {r}")
+        sys.exit(1)
+    print("\nNicio regresie față de baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+coeziv_binary_store.py
+
+Store binar tipizat pentru seriile istorice Coeziv, scris de pipeline
+lângă JSON (data/ic_btc_series.bin, data/global_coeziv_state.bin).
+
+Format (little-endian):
+
+    MAGIC (8 bytes) | lungime header (uint32) | header JSON (UTF-8) | padding
+    coloana 0 | coloana 1 | ...
+
+- header-ul descrie numărul de rânduri, coloanele (nume, dtype, offset),
+  dicționarele pentru coloanele codate (ex. regim) și un bloc `meta` liber;
+- fiecare coloană este un bloc contiguu float64 ("<f8") sau int64 ("<i8"),
+  aliniat la ALIGN bytes;
+- coloana "t" (ms UNIX, crescătoare) este indexul de timp.
+
+Cititorii deschid fișierul cu `np.memmap`: nu se parsează nimic, iar
+un interval de date sau un lookup as-of ating doar paginile necesare.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+
+MAGIC = b"COEZIVB1"
+ALIGN = 64
+DTYPES = {"f8": np.dtype("<f8"), "i8": np.dtype("<i8")}
+TIME_COLUMN = "t"
+
+
+def _align(n: int) -> int:
+    return -(-n // ALIGN) * ALIGN
+
+
+def _column_dtype(values: np.ndarray) -> str:
+    if values.dtype.kind in "iub":
+        return "i8"
+    if values.dtype.kind == "f":
+        return "f8"
+    raise TypeError(f"Tip de coloană nesuportat în store-ul binar: {values.dtype}")
+
+
+def write_store(
+    path: Path,
+    columns: Mapping[str, Any],
+    dictionaries: Optional[Mapping[str, Sequence[Mapping[str, Any]]]] = None,
+    meta: Optional[Mapping[str, Any]] = None,
+) -> int:
+    """
+    Scrie atomic coloanele numerice într-un store binar.
+    Întoarce dimensiunea fișierului în bytes.
+    """
+    arrays = {name: np.asarray(values) for name, values in columns.items()}
+    if TIME_COLUMN not in arrays:
+        raise ValueError(f"Store-ul binar are nevoie de coloana de timp '{TIME_COLUMN}'.")
+    rows = len(arrays[TIME_COLUMN])
+    if any(len(a) != rows for a in arrays.values()):
+        raise ValueError("Toate coloanele trebuie să aibă același număr de rânduri.")
+
+    specs: List[Dict[str, Any]] = []
+    for name, arr in arrays.items():
+        specs.append({"name": name, "dtype": _column_dtype(arr)})
+
+    # offset-urile depind de lungimea header-ului, care depinde de offset-uri:
+    # rezervăm întâi, apoi completăm până la o lungime stabilă
+    offset = 0
+    header_len = 0
+    while True:
+        offset = _align(len(MAGIC) + 4 + header_len)
+        for spec in specs:
+            spec["offset"] = offset
+            offset = _align(offset + rows * 8)
+        header = json.dumps(
+            {
+                "rows": rows,
+                "columns": specs,
+                "dictionaries": {k: [dict(e) for e in v] for k, v in (dictionaries or {}).items()},
+                "meta": dict(meta or {}),
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        if len(header) == header_len:
+            break
+        header_len = len(header)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for spec in specs:
+            f.write(b"\0" * (spec["offset"] - f.tell()))
+            f.write(np.ascontiguousarray(arrays[spec["name"]], dtype=DTYPES[spec["dtype"]]).tobytes())
+        f.write(b"\0" * (offset - f.tell()))
+    tmp_path.replace(path)
+    return offset
+
+
+class SeriesStore:
+    """Store binar deschis prin np.memmap (read-only)."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            magic = f.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} nu este un store binar Coeziv.")
+            (header_len,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_len).decode("utf-8"))
+
+        self.rows: int = header["rows"]
+        self.dictionaries: Dict[str, List[Dict[str, Any]]] = header.get("dictionaries", {})
+        self.meta: Dict[str, Any] = header.get("meta", {})
+        self._specs = {spec["name"]: spec for spec in header["columns"]}
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.rows
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def column(self, name: str) -> np.ndarray:
+        """Coloana întreagă ca memmap (nu citește nimic până la acces)."""
+        arr = self._columns.get(name)
+        if arr is None:
+            spec = self._specs[name]
+            if self.rows == 0:
+                arr = np.empty(0, dtype=DTYPES[spec["dtype"]])
+            else:
+                arr = np.memmap(
+                    self.path,
+                    dtype=DTYPES[spec["dtype"]],
+                    mode="r",
+                    offset=spec["offset"],
+                    shape=(self.rows,),
+                )
+            self._columns[name] = arr
+        return arr
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.column(name)
+
+    def index_range(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> slice:
+        """Rândurile cu start_ms <= t <= end_ms (căutare binară pe coloana t)."""
+        t = self.column(TIME_COLUMN)
+        lo = 0 if start_ms is None else int(np.searchsorted(t, start_ms, side="left"))
+        hi = self.rows if end_ms is None else int(np.searchsorted(t, end_ms, side="right"))
+        return slice(lo, hi)
+
+    def slice(
+        self,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Coloanele (view-uri memmap) pentru un interval de date."""
+        sl = self.index_range(start_ms, end_ms)
+        return {name: self.column(name)[sl] for name in (columns or self.names)}
+
+    def asof(self, t_ms: int) -> Optional[Dict[str, Any]]:
+        """Ultimul rând cu t <= t_ms, cu coloanele codate decodate prin dicționare."""
+        i = int(np.searchsorted(self.column(TIME_COLUMN), t_ms, side="right")) - 1
+        if i < 0:
+            return None
+        return self.row(i)
+
+    def row(self, i: int) -> Dict[str, Any]:
+        rec: Dict[str, Any] = {}
+        for name in self.names:
+            value = self.column(name)[i].item()
+            if name in self.dictionaries:
+                rec.update(self.dictionaries[name][value])
+            else:
+                rec[name] = value
+        return rec
+
+
+def open_store(path: Path) -> SeriesStore:
+    return SeriesStore(path)
@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+coeziv_btc_daily.py
+
+Loader comun pentru data/btc_daily.csv, folosit de toți consumatorii
+(update_btc_state_latest_from_daily.py, export_ic_btc_series.py,
+build_btc_cost_state.py, csv_to_json.py).
+
+CSV-ul este parsat o singură dată în coloane tipizate:
+
+- "date"           – datetime64[D] (NaT pentru datele care nu se pot citi);
+- restul coloanelor – float64 (NaN pentru valori lipsă / nevalide),
+  cu numele din header în litere mici (date, open, high, low, close, ...).
+
+Rândurile sunt sortate stabil după dată. Datele se parsează vectorizat de
+NumPy (fără câte un obiect datetime per rând).
+
+Ultimul rând (read_latest_row) se citește de la coada fișierului, în timp
+constant, cu fallback la citirea completă dacă ordinea nu e garantată.
+
+Cache:
+- în proces: același fișier (cale, mtime, mărime) se parsează o singură
+  dată per rulare, deci etapele din coeziv.py îl împart;
+- pe disc: data/_cache/btc_daily.npz (lângă fișierul sursă), cheiat pe
+  mtime_ns + mărimea fișierului sursă (+ CACHE_VERSION). Un fișier modificat invalidează
+  automat cache-ul; cache-ul stricat / vechi este ignorat și rescris.
+"""
+
+from __future__ import annotations
+
+import itertools
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = ROOT / "data"
+BTC_DAILY_CSV = DATA_DIR / "btc_daily.csv"
+CACHE_DIR_NAME = "_cache"
+CACHE_VERSION = 1
+
+DATE_COLUMNS = ("date", "time", "timestamp")
+
+# citirea ultimului rând: blocuri de la coada fișierului + câte linii verificăm
+TAIL_BLOCK = 4096
+TAIL_CHECK_LINES = 8
+
+_MEMO: Dict[Tuple[str, int, int], "DailyData"] = {}
+
+
+@dataclass
+class DailyData:
+    """Coloanele din btc_daily.csv, sortate după dată."""
+    date: np.ndarray                # datetime64[D]
+    columns: Dict[str, np.ndarray]  # float64
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name == "date":
+            return self.date
+        return self.columns[name]
+
+    @property
+    def names(self) -> List[str]:
+        return ["date"] + list(self.columns)
+
+    def valid(self, *names: str) -> np.ndarray:
+        """Masca rândurilor cu dată validă și valori finite în coloanele `names`."""
+        mask = ~np.isnat(self.date)
+        for name in names:
+            mask &= np.isfinite(self.columns[name])
+        return mask
+
+    def series(self, name: str = "close") -> Tuple[np.ndarray, np.ndarray]:
+        """(date, valori) pentru rândurile valide ale coloanei `name`."""
+        mask = self.valid(name)
+        return self.date[mask], self.columns[name][mask]
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """Rândul i ca dict: "date" ca datetime64[D], restul ca float."""
+        rec: Dict[str, Any] = {"date": self.date[i]}
+        for name, values in self.columns.items():
+            rec[name] = float(values[i])
+        return rec
+
+    def latest_row(self) -> Dict[str, Any]:
+        if not len(self):
+            raise RuntimeError("btc_daily.csv nu conține rânduri.")
+        return self.row(len(self) - 1)
+
+
+def epoch_ms(dates: np.ndarray) -> np.ndarray:
+    """datetime64 -> ms UNIX (int64), miezul nopții UTC pentru zilele calendaristice."""
+    return np.asarray(dates).astype("datetime64[ms]").astype(np.int64)
+
+
+# ---------- parsare ----------
+
+def _detect_delimiter(header_line: str) -> str:
+    for delim in (",", ";", "\t"):
+        if delim in header_line:
+            return delim
+    return ","
+
+
+def _parse_dates(values: Sequence[str]) -> np.ndarray:
+    # "2025-01-31", "2025-01-31 00:00:00" și "2025-01-31T00:00:00" -> ziua calendaristică
+    days = [v.strip().split()[0] if v.strip() else "NaT" for v in values]
+    try:
+        return np.array(days, dtype="datetime64[D]")
+    except ValueError:
+        out = np.empty(len(days), dtype="datetime64[D]")
+        for i, v in enumerate(days):
+            try:
+                out[i] = np.datetime64(v, "D")
+            except ValueError:
+                out[i] = np.datetime64("NaT")
+        return out
+
+
+def _parse_floats(values: Sequence[str]) -> np.ndarray:
+    try:
+        return np.array(values, dtype=float)
+    except ValueError:
+        out = np.empty(len(values))
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except ValueError:
+                out[i] = np.nan
+        return out
+
+
+def _parse_header(header_line: str) -> Tuple[str, List[str], int]:
+    header_line = header_line.lstrip("\ufeff").strip()
+    delim = _detect_delimiter(header_line)
+    header = [h.strip().lower() for h in header_line.split(delim)]
+    date_idx = next((header.index(c) for c in DATE_COLUMNS if c in header), None)
+    if date_idx is None:
+        raise RuntimeError(f"Nu găsesc coloana de dată în header {header}.")
+    return delim, header, date_idx
+
+
+def _parse_lines(
+    lines: Sequence[str], delim: str, header: Sequence[str], date_idx: int
+) -> DailyData:
+    """Coloanele tipizate pentru liniile de date, în ordinea din fișier (nesortate)."""
+    # transpunere rânduri -> coloane; rândurile scurte primesc "" (NaN / NaT)
+    rows = (ln.split(delim) for ln in lines)
+    fields = list(itertools.zip_longest(*rows, fillvalue=""))[: len(header)]
+    fields += [("",) * len(lines)] * (len(header) - len(fields))
+
+    columns: Dict[str, np.ndarray] = {}
+    for j, name in enumerate(header):
+        if j == date_idx or not name or name in columns:
+            continue
+        columns[name] = _parse_floats([v.strip() for v in fields[j]])
+    return DailyData(date=_parse_dates(fields[date_idx]), columns=columns)
+
+
+def parse_daily_csv(path: Path) -> DailyData:
+    """Parsează CSV-ul în coloane tipizate (fără cache)."""
+    if not path.exists():
+        raise FileNotFoundError(f"Nu am găsit fișierul {path}")
+
+    text = path.read_text(encoding="utf-8")
+    lines = [ln for ln in text.splitlines() if ln.strip()]
+    if not lines:
+        raise RuntimeError(f"{path} este gol.")
+
+    delim, header, date_idx = _parse_header(lines[0])
+    data = _parse_lines(lines[1:], delim, header, date_idx)
+
+    order = np.argsort(data.date, kind="stable")
+    return DailyData(
+        date=data.date[order],
+        columns={name: values[order] for name, values in data.columns.items()},
+    )
+
+
+# ---------- cache ----------
+
+def _cache_path(path: Path) -> Path:
+    return path.parent / CACHE_DIR_NAME / f"{path.stem}.npz"
+
+
+def _read_cache(cache: Path, key: np.ndarray) -> Optional[DailyData]:
+    if not cache.exists():
+        return None
+    try:
+        with np.load(cache, allow_pickle=False) as npz:
+            if not np.array_equal(npz["_key"], key):
+                return None
+            names = [str(n) for n in npz["_names"]]
+            return DailyData(
+                date=npz["date"].astype("datetime64[D]"),
+                columns={n: npz[f"col_{n}"] for n in names},
+            )
+    except Exception:
+        return None
+
+
+def _write_cache(cache: Path, key: np.ndarray, data: DailyData) -> None:
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache.with_suffix(".tmp.npz")
+        np.savez(
+            tmp_path,
+            _key=key,
+            _names=np.array(list(data.columns), dtype=str),
+            date=data.date,
+            **{f"col_{n}": v for n, v in data.columns.items()},
+        )
+        tmp_path.replace(cache)
+    except OSError:
+        # cache-ul e doar o optimizare: un director read-only nu blochează citirea
+        pass
+
+
+def load_daily(path: Path = BTC_DAILY_CSV, use_cache: bool = True) -> DailyData:
+    """
+    Coloanele din CSV, din cache dacă fișierul nu s-a schimbat
+    (mtime + mărime), altfel parsate și salvate în cache.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Nu am găsit fișierul {path}")
+    if not use_cache:
+        return parse_daily_csv(path)
+
+    st = path.stat()
+    memo_key = (str(path.resolve()), st.st_mtime_ns, st.st_size)
+    data = _MEMO.get(memo_key)
+    if data is not None:
+        return data
+
+    key = np.array([CACHE_VERSION, st.st_mtime_ns, st.st_size], dtype=np.int64)
+    cache = _cache_path(path)
+    data = _read_cache(cache, key)
+    if data is None:
+        data = parse_daily_csv(path)
+        _write_cache(cache, key, data)
+
+    _MEMO.clear()
+    _MEMO[memo_key] = data
+    return data
+
+
+# ---------- ultimul rând (citire de la coadă) ----------
+
+def _tail_lines(path: Path, count: int) -> Tuple[str, List[str]]:
+    """Header-ul + ultimele `count` linii nevide, citind fișierul de la coadă."""
+    with path.open("rb") as f:
+        header_line = f.readline()
+        start = f.tell()
+        pos = f.seek(0, 2)
+        buf = b""
+        lines: List[bytes] = []
+        while pos > start:
+            step = min(TAIL_BLOCK, pos - start)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+            lines = [ln for ln in buf.split(b"\n") if ln.strip()]
+            # prima linie din buffer poate fi tăiată, deci vrem una în plus
+            if len(lines) > count:
+                break
+        if pos > start:
+            lines = lines[1:]
+    return (
+        header_line.decode("utf-8"),
+        [ln.decode("utf-8").rstrip("\r") for ln in lines[-count:]],
+    )
+
+
+def read_latest_row(path: Path = BTC_DAILY_CSV) -> Dict[str, Any]:
+    """
+    Ultimul rând din CSV (ca DailyData.row), în timp constant: citește doar
+    header-ul și ultimele TAIL_CHECK_LINES linii, de la coada fișierului.
+
+    Fișierul este presupus sortat după dată și doar extins la final (așa îl
+    scrie fetch_btc_daily.py). Dacă coada nu e crescătoare sau conține date
+    nevalide, ordinea nu e garantată și se face citirea completă (load_daily).
+    Dacă fișierul e deja încărcat în proces, se folosește direct.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Nu am găsit fișierul {path}")
+
+    st = path.stat()
+    data = _MEMO.get((str(path.resolve()), st.st_mtime_ns, st.st_size))
+    if data is not None:
+        return data.latest_row()
+
+    header_line, lines = _tail_lines(path, TAIL_CHECK_LINES)
+    if lines:
+        delim, header, date_idx = _parse_header(header_line)
+        tail = _parse_lines(lines, delim, header, date_idx)
+        dates = tail.date
+        if not np.isnat(dates).any() and np.all(dates[1:] >= dates[:-1]):
+            return tail.latest_row()
+    return load_daily(path).latest_row()
+
+
+def load_btc_close(path: Path = BTC_DAILY_CSV) -> Tuple[np.ndarray, np.ndarray]:
+    """(date datetime64[D], close float64) pentru rândurile cu close valid."""
+    return load_daily(path).series("close")
@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+coeziv_chain_store.py
+
+Store local, pe zile, cu datele on-chain folosite de modelul de cost:
+
+    data/btc_chain_daily.csv
+    date,difficulty,avg_fees_per_block_btc
+    2009-01-03,1.0,0.0
+    ...
+
+Sincronizare (sync_chain_store / `python scripts/coeziv_chain_store.py`):
+- sursa este API-ul charts blockchain.info ("difficulty" și
+  "transaction-fees", BTC / zi), prin coeziv_http; URL-ul se poate înlocui
+  cu serverul local din coeziv_mock_server.py (COEZIV_BLOCKCHAIN_CHARTS_URL);
+- incremental: se cer doar zilele de la ultima dată stocată minus
+  OVERLAP_DAYS; dacă zilele din suprapunere coincid cu cele stocate, zilele
+  noi se adaugă la final, altfel (revizie) store-ul se rescrie complet;
+- `--full` (sau store lipsă) descarcă tot istoricul de la GENESIS_DATE;
+- o sursă indisponibilă nu oprește pipeline-ul: store-ul existent rămâne.
+
+Fees per block = fees totale pe zi / BLOCKS_PER_DAY (aproximare: numărul
+real de blocuri pe zi variază în jurul lui 144).
+
+Citire (load_chain_store / ChainData.lookup): store-ul se încarcă prin
+loader-ul comun (coeziv_btc_daily.load_daily, cu cache), iar lookup-ul
+pentru un array de date este vectorizat (searchsorted): fiecare zi
+primește ultima valoare cunoscută la sau înaintea ei, dacă nu e mai veche
+de max_gap_days. Calculele de cost nu mai depind de rețea.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import coeziv_prom
+from coeziv_http import get_json, source_url
+
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = ROOT / "data"
+CHAIN_CSV = DATA_DIR / "btc_chain_daily.csv"
+FIELDS = ["date", "difficulty", "avg_fees_per_block_btc"]
+
+CHARTS_URL = source_url("COEZIV_BLOCKCHAIN_CHARTS_URL", "https://api.blockchain.info/charts")
+GENESIS_DATE = "2009-01-03"
+OVERLAP_DAYS = 7
+BLOCKS_PER_DAY = 144.0
+REVISION_RTOL = 1e-9
+MAX_GAP_DAYS = 14  # lookup: valori mai vechi de atât nu se propagă
+
+ChainRow = Tuple[str, float, float]  # (date, difficulty, avg_fees_per_block_btc)
+
+
+def log(msg: str) -> None:
+    print(f"[coeziv_chain_store] {msg}", flush=True)
+
+
+# ---------- citire ----------
+
+@dataclass
+class ChainData:
+    """Coloanele store-ului, sortate după dată."""
+    date: Any        # np.ndarray datetime64[D]
+    difficulty: Any  # np.ndarray float64
+    fees: Any        # np.ndarray float64 (BTC / block)
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+    def lookup(self, dates: Any, max_gap_days: Optional[int] = MAX_GAP_DAYS) -> Tuple[Any, Any]:
+        """
+        (difficulty, fees) pentru fiecare dată din `dates`: ultima zi din
+        store la sau înaintea datei (as-of), NaN dacă nu există sau e mai
+        veche de max_gap_days.
+        """
+        import numpy as np
+
+        days = np.asarray(dates, dtype="datetime64[D]")
+        if not len(self):
+            nan = np.full(days.shape, np.nan)
+            return nan, nan.copy()
+
+        idx = np.searchsorted(self.date, days, side="right") - 1
+        ok = (idx >= 0) & ~np.isnat(days)
+        safe = np.clip(idx, 0, None)
+        if max_gap_days is not None:
+            gap = (days - self.date[safe]).astype(np.int64)
+            ok &= gap <= max_gap_days
+        difficulty = np.where(ok, self.difficulty[safe], np.nan)
+        fees = np.where(ok, self.fees[safe], np.nan)
+        return difficulty, fees
+
+
+def load_chain_store(path: Path = CHAIN_CSV) -> ChainData:
+    """Store-ul ca ChainData (gol dacă fișierul lipsește)."""
+    import numpy as np
+
+    from coeziv_btc_daily import load_daily
+
+    if not Path(path).exists():
+        return ChainData(np.array([], dtype="datetime64[D]"), np.array([]), np.array([]))
+    data = load_daily(path)
+    mask = data.valid("difficulty")
+    return ChainData(
+        date=data.date[mask],
+        difficulty=data.columns["difficulty"][mask],
+        fees=data.columns["avg_fees_per_block_btc"][mask],
+    )
+
+
+# ---------- sincronizare ----------
+
+def read_rows(path: Path = CHAIN_CSV) -> List[ChainRow]:
+    if not path.exists():
+        return []
+    rows: List[ChainRow] = []
+    with path.open("r", newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            try:
+                fees = float(r["avg_fees_per_block_btc"]) if r["avg_fees_per_block_btc"] else math.nan
+                rows.append((r["date"], float(r["difficulty"]), fees))
+            except (KeyError, ValueError):
+                continue
+    return rows
+
+
+def chart_url(name: str, start: str) -> str:
+    days = (datetime.now(timezone.utc).date() - datetime.strptime(start, "%Y-%m-%d").date()).days + 2
+    return f"{CHARTS_URL}/{name}?start={start}&timespan={max(days, 1)}days&format=json&sampled=false"
+
+
+def fetch_chart(name: str, start: str) -> Dict[str, float]:
+    """Un chart blockchain.info: {zi: valoare} (ultima valoare din fiecare zi UTC)."""
+    payload = get_json(chart_url(name, start), timeout=30)
+    out: Dict[str, float] = {}
+    for point in payload.get("values") or []:
+        y = point.get("y")
+        if y is None or not math.isfinite(float(y)):
+            continue
+        day = datetime.fromtimestamp(int(point["x"]), timezone.utc).strftime("%Y-%m-%d")
+        if day >= start:
+            out[day] = float(y)
+    return out
+
+
+def fetch_chain_rows(start: str) -> List[ChainRow]:
+    difficulty = fetch_chart("difficulty", start)
+    if not difficulty:
+        raise RuntimeError(f"Chart-ul difficulty nu are puncte de la {start}.")
+    fees_per_day = fetch_chart("transaction-fees", start)
+    return [
+        (day, difficulty[day], fees_per_day[day] / BLOCKS_PER_DAY if day in fees_per_day else math.nan)
+        for day in sorted(difficulty)
+    ]
+
+
+def _same(a: float, b: float) -> bool:
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return math.isclose(a, b, rel_tol=REVISION_RTOL, abs_tol=0.0)
+
+
+def _format(rows: Sequence[ChainRow]) -> str:
+    return "".join(
+        f"{d},{diff!r},{'' if math.isnan(fees) else repr(fees)}\n" for d, diff, fees in rows
+    )
+
+
+def write_rows(rows: Sequence[ChainRow], path: Path = CHAIN_CSV) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".csv.tmp")
+    with tmp_path.open("w", encoding="utf-8", newline="") as f:
+        f.write(",".join(FIELDS) + "\n")
+        f.write(_format(rows))
+    tmp_path.replace(path)
+
+
+def append_rows(rows: Sequence[ChainRow], path: Path = CHAIN_CSV) -> None:
+    # copie + append + rename: un crash nu lasă un rând pe jumătate
+    import shutil
+
+    tmp_path = path.with_suffix(".csv.tmp")
+    shutil.copyfile(path, tmp_path)
+    with tmp_path.open("a", encoding="utf-8", newline="") as f:
+        f.write(_format(rows))
+    tmp_path.replace(path)
+
+
+def sync_chain_store(path: Path = CHAIN_CSV, full: bool = False) -> int:
+    """
+    Sincronizează store-ul; întoarce numărul de zile noi (sau totalul, la
+    rescriere completă). Erorile de rețea se raportează, store-ul rămâne.
+    """
+    existing = [] if full else read_rows(path)
+    if existing:
+        last = existing[-1][0]
+        start = (datetime.strptime(last, "%Y-%m-%d") - timedelta(days=OVERLAP_DAYS)).strftime("%Y-%m-%d")
+    else:
+        start = GENESIS_DATE
+
+    t0 = time.perf_counter()
+    try:
+        fresh = fetch_chain_rows(start)
+    except Exception as exc:
+        log(f"[WARN] Sursa on-chain indisponibilă ({exc}); păstrez {path.name}.")
+        coeziv_prom.source_failure("blockchain.info")
+        return 0
+
+    if existing:
+        stored = {d: (diff, fees) for d, diff, fees in existing if d >= start}
+        revised = [
+            d for d, diff, fees in fresh
+            if d in stored and not (_same(stored[d][0], diff) and _same(stored[d][1], fees))
+        ]
+        if not revised:
+            new_rows = [r for r in fresh if r[0] > last]
+            if new_rows:
+                append_rows(new_rows, path)
+            log(
+                f"Sync incremental de la {start}: {len(new_rows)} zile noi "
+                f"(total {len(existing) + len(new_rows)}, {time.perf_counter() - t0:.2f}s)"
+            )
+            return len(new_rows)
+        log(f"Revizie la {revised[0]} ({len(revised)} zile) – redescarc tot istoricul.")
+        return sync_chain_store(path, full=True)
+
+    write_rows(fresh, path)
+    log(
+        f"Store complet: {len(fresh)} zile ({fresh[0][0]} – {fresh[-1][0]}, "
+        f"{time.perf_counter() - t0:.2f}s) în {path}"
+    )
+    return len(fresh)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Sincronizează store-ul local difficulty / fees.")
+    parser.add_argument("--full", action="store_true", help=f"redescarcă tot istoricul de la {GENESIS_DATE}")
+    args = parser.parse_args(argv)
+    coeziv_prom.start_job("coeziv_chain_store")
+    sync_chain_store(CHAIN_CSV, full=args.full)
+    if coeziv_prom.enabled():
+        rows = read_rows(CHAIN_CSV)
+        if rows:
+            coeziv_prom.freshness("btc_chain_daily", rows[-1][0])
+        coeziv_prom.output(CHAIN_CSV)
+    coeziv_prom.write_job()
+
+
+if __name__ == "__main__":
+    main()
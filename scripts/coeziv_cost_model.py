@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+coeziv_cost_model.py
+
+Modelul Coeziv de cost de producție BTC, vectorizat (NumPy), folosit de
+toate scripturile de cost:
+
+- build_btc_cost_state.py  – difficulty istorică / live, parametri pe date;
+- btc_cost_script_auto.py  – hashrate + parametri din variabile de mediu;
+- btc_cost_script.py       – hashrate + parametri introduși manual.
+
+Un singur calcul (evaluate), pentru array-uri de zile:
+
+    hash-uri per block  = difficulty * 2^32
+                          sau hashrate (EH/s) * 1e18 * 86400 / blocks_per_day
+    energie per block   = hash-uri * eficiență (J/TH) / 1e12 / 3.6e6   [kWh]
+    BTC per block       = subsidy + fees
+    cost electric / BTC = energie per block * preț energie / BTC per block
+    cost total / BTC    = cost electric * all_in_factor
+    marjă               = close / cost total
+
+all_in_factor are același sens peste tot: multiplicatorul cost electric ->
+cost total (capex + opex simplificat); 1.0 = doar energie. Scripturile pe
+difficulty folosesc PRODUCTION_MARKUP = 1.25, cele pe hashrate 1.0 implicit.
+
+Parametrii din CostParams pot fi scalari sau array-uri (broadcast cu
+zilele). Eficiența și subsidy-ul lipsă (None) vin din tabelele în trepte
+pe date (EFFICIENCY_BREAKS / HALVING_DATES, evaluate cu np.searchsorted).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+
+
+# Preț mediu global al energiei pentru mineri (USD/kWh)
+ELECTRICITY_USD_PER_KWH_BASE = 0.05
+
+# Markup electric -> cost total (electric + capex + opex, aproximativ)
+PRODUCTION_MARKUP = 1.25
+
+BLOCKS_PER_DAY = 144.0
+HASHES_PER_DIFFICULTY = 2.0 ** 32
+J_PER_KWH = 3_600_000.0  # 1 kWh = 3.6e6 J
+
+# Halving-urile (aproximative, dar suficiente pentru model): subsidy-ul
+# SUBSIDY_BTC[i] e valabil de la HALVING_DATES[i - 1] (inclusiv) la HALVING_DATES[i].
+HALVING_DATES = np.array(
+    ["2012-11-28", "2016-07-09", "2020-05-11", "2024-04-20"], dtype="datetime64[D]"
+)
+SUBSIDY_BTC = np.array([50.0, 25.0, 12.5, 6.25, 3.125])
+
+# Eficiența medie a flotei (J/TH), piecewise și aproximativă, dar ancorată
+# în evoluția reală; aceeași convenție ca la subsidy.
+EFFICIENCY_BREAKS = np.array(
+    [
+        "2013-01-01",  # înainte: CPU / GPU – pur istoric, practic inutil pentru prezent
+        "2016-01-01",  # primele ASIC-uri comerciale
+        "2018-01-01",  # generații mai bune de ASIC
+        "2020-01-01",  # eficiență în jur de 80 J/TH
+        "2023-01-01",  # 2020–2022 ~45 J/TH rețea
+        "2024-06-01",  # până în 2023 ~33 J/TH, apoi coboară spre 30
+        "2025-01-01",  # aproximativ 28.2 J/TH (date Cambridge 2024)
+    ],
+    dtype="datetime64[D]",
+)
+EFFICIENCY_J_PER_TH = np.array(
+    # 2025+ proiecție conservatoare (rețea mai eficientă): 26 J/TH
+    [5_000_000.0, 600.0, 120.0, 80.0, 45.0, 33.0, 28.2, 26.0]
+)
+
+
+def _step_lookup(breaks: np.ndarray, values: np.ndarray, dates: Any) -> np.ndarray:
+    """values[i] pentru breaks[i - 1] <= dată < breaks[i] (vectorizat, searchsorted)."""
+    days = np.asarray(dates, dtype="datetime64[D]")
+    return values[np.searchsorted(breaks, days, side="right")]
+
+
+def block_subsidy_for_dates(dates: Any) -> np.ndarray:
+    """Block subsidy (BTC / block) pentru un array de date (datetime64)."""
+    return _step_lookup(HALVING_DATES, SUBSIDY_BTC, dates)
+
+
+def efficiency_j_per_th_for_dates(dates: Any) -> np.ndarray:
+    """Eficiența flotei (J/TH) pentru un array de date (datetime64)."""
+    return _step_lookup(EFFICIENCY_BREAKS, EFFICIENCY_J_PER_TH, dates)
+
+
+@dataclass
+class CostParams:
+    """
+    Parametrii modelului; fiecare poate fi scalar sau array (broadcast cu
+    zilele). None = valoarea din tabelul pe date.
+    """
+    electricity_usd_per_kwh: Any = ELECTRICITY_USD_PER_KWH_BASE
+    all_in_factor: Any = PRODUCTION_MARKUP
+    efficiency_j_per_th: Optional[Any] = None  # None: EFFICIENCY_BREAKS
+    block_subsidy_btc: Optional[Any] = None    # None: HALVING_DATES
+    blocks_per_day: Any = BLOCKS_PER_DAY        # folosit doar la hashrate
+
+
+@dataclass
+class CostArrays:
+    """Rezultatul evaluate(): USD/BTC, NaN unde intrările nu sunt valide."""
+    electric: np.ndarray
+    all_in: np.ndarray
+    margin: np.ndarray             # close / all_in (NaN fără close)
+    energy_kwh_per_btc: np.ndarray
+    btc_per_block: np.ndarray
+
+
+def hashes_per_block(
+    difficulty: Any = None,
+    hashrate_eh_per_s: Any = None,
+    blocks_per_day: Any = BLOCKS_PER_DAY,
+) -> np.ndarray:
+    """
+    Munca medie per block, din difficulty (D * 2^32) sau din hashrate-ul
+    rețelei (H/s * secunde pe block); exact unul dintre cele două.
+    """
+    if (difficulty is None) == (hashrate_eh_per_s is None):
+        raise ValueError("Dă fie difficulty, fie hashrate_eh_per_s.")
+    if difficulty is not None:
+        return np.asarray(difficulty, dtype=float) * HASHES_PER_DIFFICULTY
+    hashrate = np.asarray(hashrate_eh_per_s, dtype=float)
+    return hashrate * 1e18 * (86_400.0 / np.asarray(blocks_per_day, dtype=float))
+
+
+def evaluate(
+    dates: Any = None,
+    difficulty: Any = None,
+    hashrate_eh_per_s: Any = None,
+    fees_btc_per_block: Any = 0.0,
+    close: Any = None,
+    params: Optional[CostParams] = None,
+) -> CostArrays:
+    """
+    Costul de producție pentru un lot de zile (vezi docstring-ul modulului).
+
+    `dates` e necesar doar dacă eficiența sau subsidy-ul vin din tabele.
+    Fees lipsă (NaN) sau negative contează ca 0. Zilele cu difficulty /
+    hashrate lipsă sau nepozitive primesc NaN.
+    """
+    params = CostParams() if params is None else params
+    if dates is not None:
+        dates = np.asarray(dates, dtype="datetime64[D]")
+    elif params.efficiency_j_per_th is None or params.block_subsidy_btc is None:
+        raise ValueError("Fără `dates`, eficiența și subsidy-ul trebuie date explicit.")
+
+    work = hashes_per_block(difficulty, hashrate_eh_per_s, params.blocks_per_day)
+    eff_j_per_th = (
+        efficiency_j_per_th_for_dates(dates) if params.efficiency_j_per_th is None
+        else np.asarray(params.efficiency_j_per_th, dtype=float)
+    )
+    subsidy = (
+        block_subsidy_for_dates(dates) if params.block_subsidy_btc is None
+        else np.asarray(params.block_subsidy_btc, dtype=float)
+    )
+    fees = np.maximum(np.nan_to_num(np.asarray(fees_btc_per_block, dtype=float), nan=0.0), 0.0)
+    btc_per_block = subsidy + fees
+
+    # ordinea operațiilor e păstrată din varianta scalară (aceleași valori)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        energy_kwh = work * (eff_j_per_th / 1e12) / J_PER_KWH
+        electric = energy_kwh * params.electricity_usd_per_kwh / btc_per_block
+        all_in = electric * params.all_in_factor
+        energy_per_btc = energy_kwh / btc_per_block
+
+    valid = np.isfinite(work) & (work > 0.0) & (btc_per_block > 0.0)
+    electric = np.where(valid, electric, np.nan)
+    all_in = np.where(valid, all_in, np.nan)
+
+    if close is None:
+        margin = np.full(all_in.shape, np.nan)
+    else:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            margin = np.asarray(close, dtype=float) / all_in
+        margin = np.where(np.isfinite(margin) & (all_in > 0.0), margin, np.nan)
+
+    return CostArrays(
+        electric=electric,
+        all_in=all_in,
+        margin=margin,
+        energy_kwh_per_btc=np.where(valid, energy_per_btc, np.nan),
+        btc_per_block=np.broadcast_to(btc_per_block, all_in.shape).copy(),
+    )
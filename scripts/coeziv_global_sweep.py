@@ -0,0 +1,421 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+coeziv_global_sweep.py
+
+Căutare de parametri pentru modelul global (build_global_coeziv_state.py):
+evaluează multe combinații WINDOW_STRUCT x WINDOW_DIR x ponderi ICD și
+scrie un tabel sumar, câte un rând per combinație:
+
+- distribuția regimurilor (bull / neutral / bear) și a semnalului macro;
+- rata de schimbare a semnalului macro (flips / an);
+- randamentele forward ale unei piețe (implicit SPX) pe orizonturile
+  HORIZONS, pe regim, plus spread-ul bull - bear și rata de nimereală a
+  semnalului (risk-on urmat de creștere, risk-off de scădere).
+
+Modelul e cel din build_global_coeziv_state (aceleași praguri, aceeași
+normalizare pe percentile față de tot istoricul), evaluat vectorizat:
+
+- IC: sume prefix ale randamentelor centrate (x și x·xᵀ) calculate o
+  singură dată; pentru orice fereastră, sumele ferestrei sunt diferențe
+  de sume prefix, deci fiecare WINDOW_STRUCT costă O(n · k²);
+- ICD: pentru o fereastră, coșul e evaluat pentru toate vectorii de
+  ponderi deodată (broadcast), apoi ranguri cu np.searchsorted.
+
+Panoul de prețuri aliniat și sumele prefix se pun o singură dată în
+memorie partajată (multiprocessing.shared_memory); procesele din pool le
+atașează la pornire, deci task-urile transportă doar (ws, wd).
+
+    python scripts/coeziv_global_sweep.py
+    python scripts/coeziv_global_sweep.py --struct 60:240:20 --dir 20:120:10 --workers 8
+    python scripts/coeziv_global_sweep.py --weights "0.4,0.15,0.15,0.15,0.15;0.25,0.25,0.25,0.125,0.125"
+    python scripts/coeziv_global_sweep.py --asset gold --sort hit60 --top 20
+
+Ponderile sunt în ordinea ICD_WEIGHTS (spx, gold, oil, vix, dxy); sensul
+(+/-) vine din ICD_SIGNS.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+ROOT = Path(__file__).resolve().parents[1]
+OUT_CSV = ROOT / "data" / "global_coeziv_sweep.csv"
+
+STRUCT_GRID = "60:240:30"
+DIR_GRID = "20:120:20"
+SPX_WEIGHT_GRID = "0.2:0.6:0.1"  # restul (1 - w) împărțit egal între celelalte 4
+HORIZONS = (20, 60)
+MIN_DAYS = 260
+
+# praguri identice cu build_global_coeziv_state
+REGIME_ENERGY = 0.35
+SIGNAL_RISK = 0.2
+
+
+def log(msg: str) -> None:
+    print(f"[coeziv_global_sweep] {msg}", flush=True)
+
+
+def parse_ints(spec: str) -> List[int]:
+    """"60:240:30" (start:stop:pas, stop inclus) sau "60,120"."""
+    try:
+        if ":" in spec:
+            start, stop, step = (int(x) for x in spec.split(":"))
+            values = list(range(start, stop + 1, step))
+        else:
+            values = [int(x) for x in spec.split(",") if x.strip()]
+    except ValueError:
+        raise SystemExit(f"Listă invalidă: {spec!r} (format: start:stop:pas sau v1,v2,...)")
+    if not values or min(values) < 2:
+        raise SystemExit(f"Listă invalidă: {spec!r} (ferestre >= 2 zile)")
+    return values
+
+
+def parse_weights(spec: Optional[str], spx_grid: str, assets: Sequence[str]) -> np.ndarray:
+    """Matricea de ponderi (combinații x piețe), în ordinea `assets`."""
+    if spec:
+        rows = []
+        for part in spec.split(";"):
+            values = [float(x) for x in part.split(",") if x.strip()]
+            if len(values) != len(assets):
+                raise SystemExit(f"Vector de ponderi invalid: {part!r} ({len(assets)} valori: {', '.join(assets)})")
+            rows.append(values)
+        return np.array(rows)
+
+    start, stop, step = (float(x) for x in spx_grid.split(":"))
+    spx = np.round(start + step * np.arange(int(np.floor((stop - start) / step + 1e-9)) + 1), 10)
+    rest = np.round((1.0 - spx) / (len(assets) - 1), 10)
+    weights = np.repeat(rest[:, None], len(assets), axis=1)
+    weights[:, list(assets).index("spx")] = spx
+    return weights
+
+
+# ---------- memorie partajată ----------
+
+ArraySpec = Tuple[str, Tuple[int, ...], str]  # (nume bloc shm, formă, dtype)
+
+_SHARED: Dict[str, np.ndarray] = {}
+_BLOCKS: List[Any] = []  # referințe la blocurile atașate (altfel buffer-ul se închide)
+
+
+class SharedArrays:
+    """Array-uri NumPy copiate o singură dată în blocuri shared_memory."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]) -> None:
+        from multiprocessing import shared_memory
+
+        self.blocks: List[Any] = []
+        self.specs: Dict[str, ArraySpec] = {}
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[...] = arr
+            self.blocks.append(shm)
+            self.specs[name] = (shm.name, arr.shape, arr.dtype.str)
+
+    def close(self) -> None:
+        for shm in self.blocks:
+            shm.close()
+            shm.unlink()
+        self.blocks = []
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def _attach(specs: Dict[str, ArraySpec], params: Dict[str, Any]) -> None:
+    """Initializer-ul proceselor din pool: atașează blocurile, fără copii."""
+    from multiprocessing import shared_memory
+
+    # blocurile aparțin procesului părinte, care face unlink la final
+    # (resource_tracker-ul e comun cu al părintelui, deci nu se dublează)
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _BLOCKS.append(shm)
+        _SHARED[name] = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+    _SHARED.update(params)
+    _ic_ranks.cache_clear()
+
+
+def _use_local(arrays: Dict[str, np.ndarray], params: Dict[str, Any]) -> None:
+    _SHARED.clear()
+    _SHARED.update(arrays)
+    _SHARED.update(params)
+    _ic_ranks.cache_clear()
+
+
+# ---------- model ----------
+
+@dataclass
+class Panel:
+    """Panoul aliniat (zile x piețe) și sumele prefix derivate din el."""
+    t: np.ndarray        # int64, ms UNIX
+    prices: np.ndarray   # float64 (n, k), coloanele în ordinea `assets`
+    s1: np.ndarray       # (n, k): sume prefix ale randamentelor centrate, s1[0] = 0
+    s2: np.ndarray       # (n, k, k): sume prefix ale produselor x·xᵀ
+    assets: List[str]
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"t": self.t, "prices": self.prices, "s1": self.s1, "s2": self.s2}
+
+
+def build_panel(df: Any) -> Panel:
+    """Din DataFrame-ul load_all_series: prețuri + sume prefix (o singură dată)."""
+    prices = df.to_numpy(dtype=float)
+    rets = prices[1:] / prices[:-1] - 1.0
+    x = rets - rets.mean(axis=0)  # centrare ca în coeziv_indicators.rolling_correlation
+    k = x.shape[1]
+    s1 = np.zeros((len(x) + 1, k))
+    s2 = np.zeros((len(x) + 1, k, k))
+    np.cumsum(x, axis=0, out=s1[1:])
+    np.cumsum(x[:, :, None] * x[:, None, :], axis=0, out=s2[1:])
+    return Panel(
+        t=df.index.as_unit("ms").asi8.astype(np.int64),
+        prices=prices,
+        s1=s1,
+        s2=s2,
+        assets=[str(c) for c in df.columns],
+    )
+
+
+def _rank_full_history(raw: np.ndarray) -> np.ndarray:
+    """Ca build_global_coeziv_state.rank_full_history: percentila față de tot istoricul."""
+    ordered = np.sort(raw)
+    return 100.0 * np.searchsorted(ordered, raw, side="right") / len(ordered)
+
+
+@lru_cache(maxsize=None)
+def _ic_ranks(window: int) -> np.ndarray:
+    """
+    IC_GLOBAL (0–100) pe indexul randamentelor, pentru o fereastră: media
+    corelațiilor absolute din sumele prefix; ferestrele incomplete dau 0,
+    ca în compute_ic_global_raw.
+    """
+    s1, s2 = _SHARED["s1"], _SHARED["s2"]
+    n_rets, k = len(s1) - 1, s1.shape[1]
+    iu, ju = np.triu_indices(k, 1)
+
+    end = np.arange(window, n_rets + 1)
+    sum1 = s1[end] - s1[end - window]
+    sum2 = s2[end] - s2[end - window]
+    cov = sum2 - sum1[:, :, None] * sum1[:, None, :] / window
+    var = np.maximum(np.diagonal(cov, axis1=1, axis2=2), 0.0)
+    denom = np.sqrt(var[:, iu] * var[:, ju])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = np.where(denom > 0, cov[:, iu, ju] / denom, np.nan)
+    corr = np.clip(corr, -1.0, 1.0)
+
+    raw = np.zeros(n_rets)
+    raw[window - 1:] = np.nansum(np.abs(corr), axis=1) / len(iu)
+    return _rank_full_history(raw)
+
+
+def _icd_ranks(window: int, signed_weights: np.ndarray) -> np.ndarray:
+    """ICD_GLOBAL (0–100) pe zilele [window:], o coloană per vector de ponderi."""
+    prices = _SHARED["prices"]
+    cum = prices[window:] / prices[:-window] - 1.0
+    basket = np.zeros((len(cum), len(signed_weights)))
+    for j in range(cum.shape[1]):  # aceeași ordine de însumare ca în build
+        basket = basket + signed_weights[None, :, j] * cum[:, j, None]
+    ranks = np.empty_like(basket)
+    for c in range(basket.shape[1]):
+        ranks[:, c] = _rank_full_history(basket[:, c])
+    return ranks
+
+
+def _forward_stats(
+    signal: np.ndarray, regime: np.ndarray, price: np.ndarray, horizons: Sequence[int]
+) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for h in horizons:
+        fwd = np.full(len(price), np.nan)
+        if len(price) > h:
+            fwd[:-h] = price[h:] / price[:-h] - 1.0
+        ok = np.isfinite(fwd)
+        means = {}
+        for code, label in ((1, "bull"), (0, "neutral"), (-1, "bear")):
+            sel = ok & (regime == code)
+            means[label] = float(fwd[sel].mean()) if sel.any() else float("nan")
+            out[f"fwd{h}_{label}"] = means[label]
+        out[f"fwd{h}_spread"] = means["bull"] - means["bear"]
+        directional = ok & (signal != 0)
+        hits = np.sign(fwd[directional]) == signal[directional]
+        out[f"hit{h}"] = float(hits.mean()) if directional.any() else float("nan")
+    return out
+
+
+def evaluate_windows(window_struct: int, window_dir: int) -> List[Dict[str, float]]:
+    """Toate vectorii de ponderi pentru o pereche de ferestre (rulează în worker)."""
+    t, prices = _SHARED["t"], _SHARED["prices"]
+    weights, signs = _SHARED["weights"], _SHARED["signs"]
+    asset, horizons = _SHARED["asset"], _SHARED["horizons"]
+
+    n = len(prices)
+    if window_struct > n - 1 or window_dir >= n:
+        return []
+
+    # IC e pe indexul randamentelor (zilele 1..n-1), ICD pe zilele window_dir..n-1
+    ic = _ic_ranks(window_struct)[window_dir - 1:] / 100.0
+    icd = _icd_ranks(window_dir, weights * signs[None, :]) / 100.0
+    days = len(ic)
+    if days < MIN_DAYS:
+        return []
+
+    energy = np.sin(2.0 * np.pi * (np.clip(ic, 0.0, 1.0)[:, None] * np.clip(icd, 0.0, 1.0)))
+    regime = np.where(energy > REGIME_ENERGY, 1, np.where(energy < -REGIME_ENERGY, -1, 0))
+    signal = np.where(energy > SIGNAL_RISK, 1, np.where(energy < -SIGNAL_RISK, -1, 0))
+
+    price = prices[window_dir:, asset]
+    years = max((t[-1] - t[window_dir]) / (365.25 * 86_400_000.0), 1e-9)
+    rows: List[Dict[str, float]] = []
+    for c, w in enumerate(weights):
+        reg, sig = regime[:, c], signal[:, c]
+        row: Dict[str, float] = {"window_struct": window_struct, "window_dir": window_dir}
+        row.update({f"w_{name}": float(v) for name, v in zip(_SHARED["assets"], w)})
+        row.update(
+            days=days,
+            bull=float(np.mean(reg == 1)),
+            neutral=float(np.mean(reg == 0)),
+            bear=float(np.mean(reg == -1)),
+            risk_on=float(np.mean(sig == 1)),
+            risk_off=float(np.mean(sig == -1)),
+            flips_per_year=float(np.count_nonzero(sig[1:] != sig[:-1]) / years),
+        )
+        row.update(_forward_stats(sig, reg, price, horizons))
+        rows.append(row)
+    return rows
+
+
+def _evaluate_task(task: Tuple[int, int]) -> List[Dict[str, float]]:
+    return evaluate_windows(*task)
+
+
+def sweep(
+    panel: Panel,
+    structs: Sequence[int],
+    dirs: Sequence[int],
+    weights: np.ndarray,
+    asset: str = "spx",
+    horizons: Sequence[int] = HORIZONS,
+    workers: Optional[int] = None,
+) -> List[Dict[str, float]]:
+    """Un rând per (WINDOW_STRUCT, WINDOW_DIR, ponderi)."""
+    from build_global_coeziv_state import ICD_SIGNS
+
+    params = {
+        "weights": np.asarray(weights, dtype=float),
+        "signs": np.array([ICD_SIGNS[a] for a in panel.assets]),
+        "asset": panel.assets.index(asset),
+        "assets": list(panel.assets),
+        "horizons": tuple(horizons),
+    }
+    tasks = [(ws, wd) for ws in structs for wd in dirs]
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(tasks) <= 1:
+        _use_local(panel.arrays(), params)
+        results = [_evaluate_task(task) for task in tasks]
+    else:
+        with SharedArrays(panel.arrays()) as shared, ProcessPoolExecutor(
+            max_workers=min(workers, len(tasks)), initializer=_attach, initargs=(shared.specs, params),
+        ) as pool:
+            # task-urile cu aceeași fereastră structurală consecutive: cache-ul IC din worker
+            results = list(pool.map(_evaluate_task, tasks, chunksize=max(1, len(dirs))))
+    return [row for rows in results for row in rows]
+
+
+def write_table(rows: Sequence[Dict[str, float]], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with tmp_path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: (round(v, 6) if isinstance(v, float) else v) for k, v in row.items()})
+    tmp_path.replace(path)
+
+
+def print_table(rows: Sequence[Dict[str, float]], sort_key: str, top: int, baseline: Dict[str, float]) -> None:
+    def is_baseline(row: Dict[str, float]) -> bool:
+        return all(np.isclose(row[k], v) for k, v in baseline.items())
+
+    ranked = sorted(rows, key=lambda r: -np.nan_to_num(r[sort_key], nan=-np.inf))
+    horizon = max(int(k[3:-7]) for k in rows[0] if k.startswith("fwd") and k.endswith("_spread"))
+    print(
+        f"{'':2}{'ws':>4} {'wd':>4} {'w_spx':>6} {'bull':>6} {'neut':>6} {'bear':>6} "
+        f"{'flips/an':>8} {f'fwd{horizon} bull':>10} {f'fwd{horizon} bear':>10} {f'hit{horizon}':>7}"
+    )
+    shown = ranked[:top] + [r for r in ranked[top:] if is_baseline(r)]
+    for row in shown:
+        mark = "* " if is_baseline(row) else "  "
+        print(
+            f"{mark}{row['window_struct']:>4} {row['window_dir']:>4} {row['w_spx']:>6.3f} "
+            f"{row['bull']:>6.1%} {row['neutral']:>6.1%} {row['bear']:>6.1%} {row['flips_per_year']:>8.1f} "
+            f"{row[f'fwd{horizon}_bull']:>10.2%} {row[f'fwd{horizon}_bear']:>10.2%} {row[f'hit{horizon}']:>7.1%}"
+        )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    from build_global_coeziv_state import ICD_WEIGHTS, WINDOW_DIR, WINDOW_STRUCT, load_all_series
+
+    parser = argparse.ArgumentParser(description="Sweep ferestre / ponderi pentru modelul Coeziv global.")
+    parser.add_argument("--struct", default=STRUCT_GRID, help=f"ferestre IC (implicit {STRUCT_GRID})")
+    parser.add_argument("--dir", default=DIR_GRID, help=f"ferestre ICD (implicit {DIR_GRID})")
+    parser.add_argument("--spx-weight", default=SPX_WEIGHT_GRID, help="ponderea SPX, restul egal (start:stop:pas)")
+    parser.add_argument("--weights", default=None, help="vectori expliciți spx,gold,oil,vix,dxy separați prin ';'")
+    parser.add_argument("--asset", default="spx", help="piața pentru randamentele forward")
+    parser.add_argument("--horizons", default=",".join(map(str, HORIZONS)), help="orizonturi forward (zile)")
+    parser.add_argument("--workers", type=int, default=None, help="procese (implicit: nr. CPU)")
+    parser.add_argument("--sort", default=None, help="coloana de sortare (implicit fwd<max>_spread)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--out", type=Path, default=OUT_CSV)
+    args = parser.parse_args(argv)
+
+    df = load_all_series()[list(ICD_WEIGHTS)]
+    if args.asset not in df.columns:
+        raise SystemExit(f"--asset necunoscut: {args.asset} ({', '.join(df.columns)})")
+    horizons = parse_ints(args.horizons)
+    structs = sorted(set(parse_ints(args.struct)) | {WINDOW_STRUCT})
+    dirs = sorted(set(parse_ints(args.dir)) | {WINDOW_DIR})
+    weights = parse_weights(args.weights, args.spx_weight, list(df.columns))
+    baseline_w = np.array([ICD_WEIGHTS[a] for a in df.columns])
+    if not any(np.allclose(w, baseline_w) for w in weights):
+        weights = np.vstack([weights, baseline_w])
+
+    t0 = time.perf_counter()
+    panel = build_panel(df)
+    rows = sweep(panel, structs, dirs, weights, args.asset, horizons, args.workers)
+    if not rows:
+        raise SystemExit("Nicio combinație evaluabilă (istoric prea scurt pentru ferestre).")
+    write_table(rows, args.out)
+    log(
+        f"{len(rows)} combinații ({len(structs)} x {len(dirs)} ferestre x {len(weights)} ponderi) "
+        f"în {time.perf_counter() - t0:.2f}s -> {args.out}"
+    )
+
+    baseline = {"window_struct": WINDOW_STRUCT, "window_dir": WINDOW_DIR}
+    baseline.update({f"w_{a}": ICD_WEIGHTS[a] for a in df.columns})
+    sort_key = args.sort or f"fwd{max(horizons)}_spread"
+    if sort_key not in rows[0]:
+        raise SystemExit(f"--sort necunoscut: {sort_key}")
+    print_table(rows, sort_key, args.top, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+coeziv_http.py
+
+Stratul HTTP comun pentru scripturile Coeziv (doar biblioteca standard):
+
+- pool de conexiuni keep-alive per (schemă, host, port): request-urile
+  succesive către aceeași sursă (paginile CryptoCompare, seriile Yahoo)
+  refolosesc conexiunea TCP / TLS în loc să deschidă una nouă;
+- cache de răspunsuri pe disc (data/_cache/http/, ignorat de git):
+  un răspuns mai nou decât `ttl` secunde se servește fără request, iar
+  după expirare se revalidează condiționat (If-None-Match /
+  If-Modified-Since); un 304 reîmprospătează intrarea fără să
+  re-descarce corpul;
+- hedging între surse (hedge): pornește sursa preferată, iar dacă nu a
+  răspuns în HEDGE_DELAY secunde (sau a eșuat) pornește și următoarea;
+  câștigă primul răspuns reușit.
+
+    from coeziv_http import get_json, hedge
+
+    data = get_json(url, ttl=3600)
+    name, rows = hedge([("cryptocompare", fetch_a), ("kraken", fetch_b)])
+
+URL-urile surselor se pot înlocui cu serverul local din
+coeziv_mock_server.py (variabilele COEZIV_*_URL), pentru rulări offline.
+
+http.client / ssl se importă leneș, la primul request.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = ROOT / "data" / "_cache" / "http"
+
+USER_AGENT = "Coeziv-Monitor/1.0"
+REQUEST_TIMEOUT = 20.0
+MAX_IDLE_PER_HOST = 4
+HEDGE_DELAY = 2.0  # secunde până pornește sursa următoare
+
+T = TypeVar("T")
+
+
+class HttpError(RuntimeError):
+    """Răspuns HTTP cu status de eroare (>= 400)."""
+
+    def __init__(self, url: str, status: int, reason: str = "") -> None:
+        super().__init__(f"HTTP {status} {reason} pentru {url}".replace("  ", " "))
+        self.url = url
+        self.status = status
+
+
+@dataclass
+class Response:
+    url: str
+    status: int
+    headers: Dict[str, str]  # chei cu litere mici
+    body: bytes
+    from_cache: bool = False
+
+    def text(self) -> str:
+        return self.body.decode("utf-8")
+
+    def json(self) -> Any:
+        return json.loads(self.body.decode("utf-8"))
+
+
+# ---------- pool de conexiuni ----------
+
+_Key = Tuple[str, str, int]
+
+# erorile unei conexiuni keep-alive închise de server între request-uri
+_STALE_ERRORS: Tuple[type, ...] = (ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+
+
+class ConnectionPool:
+    """Conexiuni keep-alive refolosibile, thread-safe (o conexiune = un request activ)."""
+
+    def __init__(self, max_idle_per_host: int = MAX_IDLE_PER_HOST) -> None:
+        self.max_idle_per_host = max_idle_per_host
+        self._idle: Dict[_Key, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, key: _Key, timeout: float) -> Tuple[Any, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+
+        import http.client
+
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def _release(self, key: _Key, conn: Any) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def request(
+        self,
+        url: str,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float = REQUEST_TIMEOUT,
+    ) -> Tuple[int, str, Dict[str, str], bytes]:
+        """GET `url`; întoarce (status, reason, headers, body)."""
+        import http.client
+
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise ValueError(f"Schemă nesuportată: {url}")
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname or "", port)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        # o conexiune refolosită poate fi deja închisă de server: o singură
+        # reîncercare pe o conexiune nouă
+        for _ in range(2):
+            conn, reused = self._acquire(key, timeout)
+            try:
+                conn.request("GET", target, headers=dict(headers or {}))
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.RemoteDisconnected, http.client.BadStatusLine, *_STALE_ERRORS):
+                conn.close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            return resp.status, resp.reason, resp_headers, body
+        raise ConnectionError(f"Conexiune închisă de server: {url}")
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+# ---------- cache pe disc ----------
+
+@dataclass
+class CacheEntry:
+    url: str
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+class ResponseCache:
+    """
+    Un răspuns per URL: <sha256>.json (metadate) + <sha256>.body (corp).
+    Intrările stricate sunt ignorate, ca și cum n-ar exista.
+    """
+
+    def __init__(self, root: Path = CACHE_DIR) -> None:
+        self.root = Path(root)
+
+    def _paths(self, url: str) -> Tuple[Path, Path]:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.root / f"{digest}.json", self.root / f"{digest}.body"
+
+    def get(self, url: str) -> Optional[Tuple[CacheEntry, bytes]]:
+        meta_path, body_path = self._paths(url)
+        try:
+            with meta_path.open("r", encoding="utf-8") as f:
+                entry = CacheEntry(**json.load(f))
+            body = body_path.read_bytes()
+        except Exception:
+            return None
+        if entry.url != url:
+            return None
+        return entry, body
+
+    def put(self, entry: CacheEntry, body: Optional[bytes] = None) -> None:
+        """Scrie atomic intrarea; body=None actualizează doar metadatele (după 304)."""
+        meta_path, body_path = self._paths(entry.url)
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            if body is not None:
+                tmp_body = body_path.with_suffix(".body.tmp")
+                tmp_body.write_bytes(body)
+                tmp_body.replace(body_path)
+            tmp_meta = meta_path.with_suffix(".json.tmp")
+            with tmp_meta.open("w", encoding="utf-8") as f:
+                json.dump(entry.__dict__, f, ensure_ascii=False)
+            tmp_meta.replace(meta_path)
+        except OSError:
+            # cache-ul e doar o optimizare: un director read-only nu blochează descărcarea
+            pass
+
+
+# ---------- client ----------
+
+class HttpClient:
+    def __init__(
+        self,
+        pool: Optional[ConnectionPool] = None,
+        cache: Optional[ResponseCache] = None,
+        user_agent: str = USER_AGENT,
+    ) -> None:
+        self.pool = pool or ConnectionPool()
+        self.cache = cache if cache is not None else ResponseCache()
+        self.user_agent = user_agent
+
+    def get(
+        self,
+        url: str,
+        ttl: float = 0.0,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float = REQUEST_TIMEOUT,
+        stale_on_error: bool = False,
+    ) -> Response:
+        """
+        GET cu cache. Răspunsul se păstrează doar dacă ttl > 0 sau
+        stale_on_error=True: o intrare mai nouă de ttl secunde se servește
+        fără request, una expirată se revalidează condiționat (ETag /
+        Last-Modified). Cu stale_on_error=True, o eroare de rețea întoarce
+        intrarea din cache, oricât de veche, dacă există.
+        """
+        cached = self.cache.get(url)
+        now = time.time()
+        if cached is not None and ttl > 0 and now - cached[0].fetched_at < ttl:
+            entry, body = cached
+            return Response(url, 200, dict(entry.headers), body, from_cache=True)
+
+        req_headers = {"User-Agent": self.user_agent, "Accept": "application/json"}
+        req_headers.update(headers or {})
+        if cached is not None:
+            if cached[0].etag:
+                req_headers["If-None-Match"] = cached[0].etag
+            if cached[0].last_modified:
+                req_headers["If-Modified-Since"] = cached[0].last_modified
+
+        try:
+            status, reason, resp_headers, body = self.pool.request(url, req_headers, timeout)
+            if status >= 400:
+                raise HttpError(url, status, reason)
+        except Exception:
+            if stale_on_error and cached is not None:
+                entry, body = cached
+                return Response(url, 200, dict(entry.headers), body, from_cache=True)
+            raise
+
+        if status == 304 and cached is not None:
+            entry, body = cached
+            entry.fetched_at = now
+            self.cache.put(entry)
+            return Response(url, 200, dict(entry.headers), body, from_cache=True)
+
+        # doar la cerere (ttl / stale_on_error): URL-urile cu timestamp
+        # (ex. toTs, period2) ar umple altfel cache-ul cu intrări nefolosite
+        etag = resp_headers.get("etag")
+        last_modified = resp_headers.get("last-modified")
+        if status == 200 and (ttl > 0 or stale_on_error):
+            kept = {k: v for k, v in resp_headers.items() if k in ("content-type", "etag", "last-modified")}
+            self.cache.put(CacheEntry(url, now, etag, last_modified, kept), body)
+        return Response(url, status, resp_headers, body)
+
+    def get_json(self, url: str, **kwargs: Any) -> Any:
+        return self.get(url, **kwargs).json()
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+_DEFAULT: Optional[HttpClient] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_client() -> HttpClient:
+    """Clientul comun al procesului (un singur pool pentru toate etapele din coeziv.py)."""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = HttpClient()
+        return _DEFAULT
+
+
+def get(url: str, **kwargs: Any) -> Response:
+    return default_client().get(url, **kwargs)
+
+
+def get_json(url: str, **kwargs: Any) -> Any:
+    return default_client().get_json(url, **kwargs)
+
+
+def source_url(env: str, default: str) -> str:
+    """URL-ul de bază al unei surse, suprascris de variabila de mediu `env`."""
+    return os.environ.get(env, default).rstrip("/")
+
+
+# ---------- hedging ----------
+
+class HedgeError(RuntimeError):
+    def __init__(self, errors: Mapping[str, BaseException]) -> None:
+        detail = "; ".join(f"{name}: {exc}" for name, exc in errors.items())
+        super().__init__(f"Toate sursele au eșuat ({detail})")
+        self.errors = dict(errors)
+
+
+def hedge(
+    calls: Sequence[Tuple[str, Callable[[], T]]], delay: Optional[float] = HEDGE_DELAY
+) -> Tuple[str, T]:
+    """
+    Rulează sursele în ordinea preferinței: următoarea pornește dacă cea
+    curentă eșuează sau nu răspunde în `delay` secunde (delay=None: doar
+    la eșec, adică fallback secvențial). Întoarce (nume, rezultat) pentru
+    primul rezultat reușit; sursele rămase în aer continuă în thread-uri
+    daemon, iar rezultatul lor se ignoră.
+    """
+    if not calls:
+        raise ValueError("hedge() fără surse")
+    results: "queue.Queue[Tuple[str, Any, Optional[BaseException]]]" = queue.Queue()
+
+    def run(name: str, fn: Callable[[], T]) -> None:
+        try:
+            results.put((name, fn(), None))
+        except BaseException as exc:  # noqa: BLE001 – raportat apelantului
+            results.put((name, None, exc))
+
+    errors: Dict[str, BaseException] = {}
+    launched = 0
+    pending = 0
+
+    def launch() -> None:
+        nonlocal launched, pending
+        name, fn = calls[launched]
+        threading.Thread(target=run, args=(name, fn), daemon=True, name=f"hedge-{name}").start()
+        launched += 1
+        pending += 1
+
+    launch()
+    while pending:
+        try:
+            name, value, exc = results.get(timeout=delay if launched < len(calls) else None)
+        except queue.Empty:
+            launch()  # sursa curentă întârzie: pornim și următoarea
+            continue
+        pending -= 1
+        if exc is None:
+            return name, value
+        errors[name] = exc
+        if launched < len(calls):
+            launch()
+    raise HedgeError(errors)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+coeziv_importtime.py
+
+Benchmark de pornire pentru scripturile Coeziv, pe baza `python -X importtime`.
+
+Multe rulări ale pipeline-ului nu au nimic de făcut, deci costul lor este
+aproape numai importul modulelor. Pentru fiecare script din BUDGETS:
+
+- rulează `python -X importtime -c "import <script>"` de --repeat ori
+  (procese noi, cache-ul de bytecode deja cald) și păstrează minimul;
+- compară timpul cumulat de import al scriptului cu bugetul (ms);
+- verifică și că dependențele grele interzise la pornire (pandas,
+  requests, yfinance, ...) nu sunt importate la nivel de modul.
+
+    python scripts/coeziv_importtime.py
+    python scripts/coeziv_importtime.py --only coeziv,build_ic_btc_mega_state
+    python scripts/coeziv_importtime.py --scale 2      # mașină mai lentă
+    python scripts/coeziv_importtime.py --budget coeziv=80
+
+Codul de ieșire este 1 dacă vreun script depășește bugetul sau importă
+o dependență interzisă.
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+HEAVY = ("pandas", "requests", "yfinance")
+
+
+@dataclass
+class Budget:
+    ms: float
+    forbidden: Tuple[str, ...] = HEAVY
+
+
+# bugetele sunt generoase față de o mașină de dezvoltare obișnuită (~3x),
+# ca să prindă regresiile mari (o dependență grea importată la pornire),
+# nu zgomotul de măsurare
+BUDGETS: Dict[str, Budget] = {
+    "coeziv": Budget(150, HEAVY + ("numpy",)),
+    "build_ic_btc_mega_state": Budget(100, HEAVY + ("numpy",)),
+    "fetch_btc_daily": Budget(200, HEAVY + ("numpy",)),
+    "update_global_coeziv_state": Budget(150, HEAVY + ("numpy",)),
+    "coeziv_http": Budget(100, HEAVY + ("numpy", "http", "ssl")),
+    # importat de toate scripturile; tracemalloc doar la activare
+    "coeziv_metrics": Budget(50, HEAVY + ("numpy", "tracemalloc")),
+    "build_btc_cost_state": Budget(400),
+    "update_btc_state_latest_from_daily": Budget(400),
+    "export_ic_btc_series": Budget(400),
+    "csv_to_json": Budget(400),
+    "build_global_coeziv_state": Budget(1500, ("requests", "yfinance")),
+}
+
+
+@dataclass
+class ImportProfile:
+    module: str
+    cumulative_ms: float
+    imported: Set[str]        # pachetele de nivel superior importate
+    top: List[Tuple[float, str]]  # cele mai scumpe importuri directe (ms, nume)
+
+
+def profile_import(module: str, python: str = sys.executable) -> ImportProfile:
+    """Un proces nou `python -X importtime -c "import <module>"`."""
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SCRIPTS_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ["?"]
+        raise RuntimeError(f"Importul {module} a eșuat: {tail[0]}")
+
+    cumulative_us: Optional[int] = None
+    imported: Set[str] = set()
+    top: List[Tuple[float, str]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # header-ul "self [us] | cumulative | imported package"
+        cumulative = int(parts[1])
+        raw_name = parts[2].rstrip()
+        name = raw_name.strip()
+        imported.add(name.split(".")[0])
+        depth = (len(raw_name) - len(raw_name.lstrip())) // 2
+        if name == module:
+            cumulative_us = cumulative
+        elif depth == 1:
+            top.append((cumulative / 1000.0, name))
+
+    if cumulative_us is None:
+        raise RuntimeError(f"Nu găsesc {module} în ieșirea -X importtime.")
+    top.sort(reverse=True)
+    return ImportProfile(module, cumulative_us / 1000.0, imported, top[:5])
+
+
+def check(
+    modules: Sequence[str], repeat: int = 3, scale: float = 1.0,
+    overrides: Optional[Dict[str, float]] = None,
+) -> List[str]:
+    """Rulează benchmark-ul; întoarce lista de încălcări (goală = OK)."""
+    overrides = overrides or {}
+    failures: List[str] = []
+    for module in modules:
+        budget = BUDGETS[module]
+        limit = overrides.get(module, budget.ms * scale)
+        runs = [profile_import(module) for _ in range(max(1, repeat))]
+        best = min(runs, key=lambda p: p.cumulative_ms)
+
+        heavy = sorted(set(budget.forbidden) & best.imported)
+        ok = best.cumulative_ms <= limit and not heavy
+        mark = "OK  " if ok else "FAIL"
+        print(f"{mark} {module:<36} {best.cumulative_ms:8.1f} ms  (buget {limit:.0f} ms)")
+        if not ok:
+            slow = ", ".join(f"{name} {ms:.1f} ms" for ms, name in best.top)
+            print(f"       cele mai scumpe importuri: {slow}")
+        if heavy:
+            failures.append(f"{module}: importă la pornire {', '.join(heavy)}")
+        if best.cumulative_ms > limit:
+            failures.append(f"{module}: {best.cumulative_ms:.1f} ms > {limit:.0f} ms")
+    return failures
+
+
+def _parse_overrides(values: Sequence[str]) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for value in values:
+        module, _, ms = value.partition("=")
+        if module not in BUDGETS or not ms:
+            raise SystemExit(f"--budget invalid: {value} (format: script=ms)")
+        out[module] = float(ms)
+    return out
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Buget de timp la pornire pentru scripturile Coeziv.")
+    parser.add_argument("--only", default=None, help="scripturi separate prin virgulă")
+    parser.add_argument("--repeat", type=int, default=3, help="rulări per script (se ia minimul)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplică toate bugetele")
+    parser.add_argument(
+        "--budget", action="append", default=[], metavar="SCRIPT=MS",
+        help="suprascrie bugetul unui script",
+    )
+    args = parser.parse_args(argv)
+
+    modules = list(BUDGETS)
+    if args.only:
+        modules = [m.strip() for m in args.only.split(",") if m.strip()]
+        unknown = [m for m in modules if m not in BUDGETS]
+        if unknown:
+            raise SystemExit(f"Scripturi fără buget: {', '.join(unknown)}")
+
+    failures = check(modules, args.repeat, args.scale, _parse_overrides(args.budget))
+    if failures:
+        print("\nBuget de pornire depășit:")
+        for f in failures:
+            print(f"  - {f}")
+        raise SystemExit(1)
+    print("\nToate scripturile sunt în bugetul de pornire.")
+
+
+if __name__ == "__main__":
+    main()
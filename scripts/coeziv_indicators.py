@@ -0,0 +1,578 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+coeziv_indicators.py
+
+Motor comun de indicatori pentru scripturile din Modelul Coeziv:
+
+- update_btc_state_latest_from_daily.py (snapshot live)
+- export_ic_btc_series.py              (serie istorică pentru front-end)
+- build_global_coeziv_state.py         (corelații rulante IC_GLOBAL)
+
+Toate funcțiile lucrează pe array-uri NumPy și întorc array-uri întregi
+de aceeași lungime cu intrarea (NaN acolo unde indicatorul nu e definit),
+fără buclă Python pe zile. Astfel cele două scripturi folosesc exact
+aceeași implementare și nu mai pot diverge.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# ferestre oficiale ale modelului BTC (în zile)
+EMA_FAST = 50
+EMA_SLOW = 200
+WINDOW_TREND_VOL = 200
+WINDOW_DIR = 60
+WINDOW_VOL = 30
+DAYS_PER_YEAR = 365.0
+
+# toleranța kernel-ului rulant față de statistics.stdev (vezi rolling_std)
+STD_RTOL = 1e-9
+STD_ATOL = 1e-12
+
+# câte close-uri anterioare sunt necesare ca să continui indicatorii pe zile noi
+TAIL_WINDOW = max(WINDOW_TREND_VOL, WINDOW_DIR + 1, WINDOW_VOL + 1)
+
+# (1 - k)^-bloc trebuie să rămână finit în float64 pentru forma închisă a EMA
+_EMA_MAX_LOG_SCALE = 200.0 * math.log(10.0)
+
+
+# ---------- utilitare numerice ----------
+
+def as_float_array(series: Sequence[float]) -> np.ndarray:
+    """Convertește o listă / array într-un array float64 unidimensional."""
+    arr = np.asarray(series, dtype=float)
+    if arr.ndim != 1:
+        raise ValueError("seria trebuie să fie unidimensională")
+    return arr
+
+
+def _ema_recursive(values: np.ndarray, k: float, seed: float) -> np.ndarray:
+    """
+    Rezolvă recurența prev = x * k + prev * (1 - k) pentru toate valorile,
+    pornind de la `seed`, fără buclă pe elemente.
+
+    Folosește forma închisă prev_i = a^(i+1) * (seed + sum_j k * x_j / a^(j+1)),
+    cu a = 1 - k, evaluată pe blocuri suficient de mici încât a^-bloc
+    să nu iasă din domeniul float64.
+    """
+    n = len(values)
+    out = np.empty(n, dtype=float)
+    if n == 0:
+        return out
+
+    a = 1.0 - k
+    if a <= 0.0:
+        # k = 1 -> EMA degenerează în seria însăși
+        out[:] = values
+        return out
+
+    block = max(1, min(n, int(_EMA_MAX_LOG_SCALE / -math.log(a))))
+    powers = a ** np.arange(1, block + 1, dtype=float)
+
+    prev = seed
+    for start in range(0, n, block):
+        chunk = values[start : start + block]
+        p = powers[: len(chunk)]
+        out[start : start + len(chunk)] = p * (prev + np.cumsum(k * chunk / p))
+        prev = out[start + len(chunk) - 1]
+
+    return out
+
+
+def ema(series: Sequence[float], period: int) -> np.ndarray:
+    """
+    EMA clasică, seed = media simplă pe primele `period` valori.
+    Returnează un array de aceeași lungime cu NaN la început
+    până când se umple fereastra.
+    """
+    if period <= 0:
+        raise ValueError("period trebuie să fie > 0")
+    x = as_float_array(series)
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < period:
+        return out
+
+    k = 2 / (period + 1.0)
+    sma = float(np.sum(x[:period])) / period
+    out[period - 1] = sma
+    out[period:] = _ema_recursive(x[period:], k, sma)
+    return out
+
+
+def ema_continue(last: float, values: Sequence[float], period: int) -> np.ndarray:
+    """
+    Continuă o EMA deja calculată (ultima valoare `last`) peste valori noi.
+    Rezultatul coincide cu `ema(istoric + values, period)[-len(values):]`.
+    """
+    if period <= 0:
+        raise ValueError("period trebuie să fie > 0")
+    return _ema_recursive(as_float_array(values), 2 / (period + 1.0), float(last))
+
+
+def rolling_mean_var(series: Sequence[float], window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Medie și varianță de eșantion (ddof=1) rulante, în O(n) total, fără buclă pe zile.
+
+    Sumele cumulative globale de x și x² pierd precizie când prețul variază
+    cu ordine de mărime (BTC: 0.05 -> 100k USD). De aceea seria se împarte
+    în blocuri de lungime `window`, fiecare centrat pe propria medie, și se
+    fac sume prefix doar în interiorul blocului. O fereastră acoperă cel mult
+    două blocuri consecutive; partea din blocul anterior se re-centrează pe
+    media blocului curent prin formulele de combinare ale lui Chan/Welford.
+    Precizia e astfel cea a unui calcul în două treceri pe date locale.
+    """
+    if window <= 1:
+        raise ValueError("window trebuie să fie > 1")
+    x = as_float_array(series)
+    n = len(x)
+    mean = np.full(n, np.nan)
+    var = np.full(n, np.nan)
+    if n < window:
+        return mean, var
+
+    w = window
+    nb = -(-n // w)
+    blocks = np.concatenate([x, np.full(nb * w - n, x[-1])]).reshape(nb, w)
+    center = blocks.mean(axis=1)
+    y = blocks - center[:, None]
+    s1 = np.cumsum(y, axis=1)
+    s2 = np.cumsum(y * y, axis=1)
+
+    ends = np.arange(w - 1, n)
+    b1, o1 = np.divmod(ends, w)
+    b0 = np.maximum(b1 - 1, 0)
+
+    # partea din blocul anterior (goală când fereastra coincide cu blocul b1)
+    p1 = s1[b0, w - 1] - s1[b0, o1]
+    p2 = s2[b0, w - 1] - s2[b0, o1]
+    cnt = w - 1 - o1
+    d = center[b0] - center[b1]
+
+    sum1 = s1[b1, o1] + p1 + cnt * d
+    sum2 = s2[b1, o1] + p2 + 2.0 * d * p1 + cnt * d * d
+
+    mean[w - 1 :] = center[b1] + sum1 / w
+    var[w - 1 :] = np.maximum(sum2 - sum1 * sum1 / w, 0.0) / (w - 1)
+
+    # ferestrele constante: rotunjirea sumelor lasă un rest proporțional cu
+    # valorile din bloc (~1e-9 la prețuri BTC), deci se fixează exact
+    changes = np.concatenate([[0], np.cumsum(x[1:] != x[:-1])])
+    constant = changes[w - 1 :] == changes[: n - w + 1]
+    mean[w - 1 :][constant] = x[w - 1 :][constant]
+    var[w - 1 :][constant] = 0.0
+    return mean, var
+
+
+def rolling_std(series: Sequence[float], window: int) -> np.ndarray:
+    """
+    Deviație standard rulantă de eșantion (ddof=1), similar cu
+    pandas.Series.rolling.std. NaN pentru primele window-1 poziții.
+
+    Toleranță documentată față de statistics.stdev pe aceeași fereastră:
+    |eroare| <= STD_RTOL * max(|x|) din fereastră + STD_ATOL (rotunjirea
+    sumelor e proporțională cu valorile, nu cu deviația). Ferestrele
+    constante (min == max) dau exact 0, deci gărzile `vol != 0` sunt sigure.
+    """
+    return np.sqrt(rolling_mean_var(series, window)[1])
+
+
+class RollingMoments:
+    """
+    Kernel online (push o valoare) pentru media / deviația standard pe o
+    fereastră fixă, O(1) per pas: Welford la umplere, apoi actualizarea
+    add/remove pentru fereastra glisantă. Valorile sunt ținute deplasate față
+    de o referință locală, iar la fiecare `window` pași referința și M2 sunt
+    recalculate exact din buffer (O(1) amortizat), ca erorile de rotunjire
+    să nu se acumuleze pe istorii lungi.
+    """
+
+    def __init__(self, window: int) -> None:
+        if window <= 1:
+            raise ValueError("window trebuie să fie > 1")
+        self.window = window
+        self._buf: Deque[float] = deque()  # valori brute
+        self._shift: Optional[float] = None
+        self._mean = 0.0  # media valorilor deplasate (x - shift)
+        self._m2 = 0.0
+        self._steps = 0
+        self._run = 0  # câte valori egale la coada bufferului
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    def push(self, value: float) -> Optional[float]:
+        """Adaugă o valoare; întoarce deviația standard curentă (None până se umple fereastra)."""
+        raw = float(value)
+        self._run = self._run + 1 if self._buf and self._buf[-1] == raw else 1
+        if self._shift is None:
+            self._shift = raw
+        x = raw - self._shift
+        if len(self._buf) < self.window:
+            self._buf.append(raw)
+            delta = x - self._mean
+            self._mean += delta / len(self._buf)
+            self._m2 += delta * (x - self._mean)
+        else:
+            old = self._buf.popleft() - self._shift
+            self._buf.append(raw)
+            old_mean = self._mean
+            self._mean += (x - old) / self.window
+            self._m2 += (x - old) * (x - self._mean + old - old_mean)
+
+        self._steps += 1
+        if self._steps % self.window == 0:
+            self._resync()
+        return self.std
+
+    def _resync(self) -> None:
+        vals = np.fromiter(self._buf, dtype=float, count=len(self._buf))
+        self._shift = float(vals.mean())
+        vals -= self._shift
+        self._mean = float(vals.mean())
+        self._m2 = float(np.sum((vals - self._mean) ** 2))
+
+    @property
+    def mean(self) -> Optional[float]:
+        if len(self._buf) < self.window or self._shift is None:
+            return None
+        return self._shift + self._mean
+
+    @property
+    def variance(self) -> Optional[float]:
+        if len(self._buf) < self.window:
+            return None
+        if self._run >= self.window:
+            return 0.0  # fereastră constantă: exact, ca rolling_std
+        return max(self._m2, 0.0) / (self.window - 1)
+
+    @property
+    def std(self) -> Optional[float]:
+        v = self.variance
+        return None if v is None else math.sqrt(v)
+
+
+def percentile_rank(history: Sequence[float], value: float) -> float:
+    """
+    Percentila poziției lui `value` într-un istoric.
+    0 = cel mai mic, 100 = cel mai mare (numărul de valori <= value).
+    """
+    hist = as_float_array(history)
+    if len(hist) == 0:
+        return 50.0
+    count = int(np.searchsorted(np.sort(hist), value, side="right"))
+    return 100.0 * count / len(hist)
+
+
+class PercentileRanker:
+    """
+    Motor de ranking percentil: sortează istoricul o singură dată și răspunde
+    la oricâte interogări cu `searchsorted` vectorizat, în O((n + m) log n).
+
+    Rezultatul este identic cu `percentile_rank(history, v)` pentru fiecare v.
+    """
+
+    def __init__(self, history: Sequence[float]) -> None:
+        self.sorted_history = np.sort(as_float_array(history))
+
+    def __len__(self) -> int:
+        return len(self.sorted_history)
+
+    def rank(self, values: Sequence[float]) -> np.ndarray:
+        """Percentilele (0–100) pentru toate valorile date."""
+        v = as_float_array(values)
+        n = len(self.sorted_history)
+        if n == 0:
+            return np.full(len(v), 50.0)
+        counts = np.searchsorted(self.sorted_history, v, side="right")
+        return 100.0 * counts / n
+
+
+def percentile_ranks(history: Sequence[float], values: Sequence[float]) -> np.ndarray:
+    """Varianta vectorizată a lui `percentile_rank` pentru mai multe valori."""
+    return PercentileRanker(history).rank(values)
+
+
+def expanding_percentile_ranks(
+    hist_pos: Sequence[int],
+    hist_values: Sequence[float],
+    query_pos: Sequence[int],
+    query_values: Sequence[float],
+) -> np.ndarray:
+    """
+    Percentile point-in-time: fiecare interogare (poziție q, valoare v) e
+    rankată doar față de istoricul disponibil până la ea, adică valorile cu
+    poziție <= q. Pentru ultima zi rezultatul coincide cu `percentile_rank`
+    pe toată istoria; pentru zilele trecute nu se mai schimbă când istoria crește.
+
+    Numărarea perechilor (p_h <= q, v_h <= v) e vectorizată cu divide et
+    impera pe poziții: la nivelul cu blocuri de 2^L, istoricul din jumătatea
+    stângă a fiecărui bloc contribuie la interogările din jumătatea dreaptă,
+    printr-un singur sort + searchsorted pe chei (bloc, rang valoare).
+    Cost total O(n log² n), fără buclă pe zile.
+    """
+    hp = np.asarray(hist_pos, dtype=np.int64)
+    hv = as_float_array(hist_values)
+    qp = np.asarray(query_pos, dtype=np.int64)
+    qv = as_float_array(query_values)
+    if len(hp) != len(hv) or len(qp) != len(qv):
+        raise ValueError("pozițiile și valorile trebuie să aibă aceeași lungime")
+    if len(qp) == 0:
+        return np.empty(0)
+    if len(hp) == 0:
+        return np.full(len(qp), 50.0)
+
+    # rang întreg al valorilor: v_h <= v_q  <=>  rh <= rq
+    levels = np.unique(hv)
+    rh = np.searchsorted(levels, hv, side="left").astype(np.int64)
+    rq = np.searchsorted(levels, qv, side="right").astype(np.int64) - 1
+    span = len(levels) + 1
+
+    counts = np.zeros(len(qp), dtype=np.int64)
+
+    # perechi cu aceeași poziție
+    order = np.lexsort((rh, hp))
+    keys = hp[order] * span + rh[order]
+    counts += np.searchsorted(keys, qp * span + rq, side="right") - np.searchsorted(
+        keys, qp * span, side="left"
+    )
+
+    # perechi cu p_h < q, separate la primul nivel unde ajung în jumătăți diferite
+    top = int(max(hp.max(), qp.max())) + 1
+    size = 1
+    while size < top:
+        h_left = (hp // size) % 2 == 0
+        q_right = (qp // size) % 2 == 1
+        group_h = hp[h_left] // (2 * size)
+        keys = np.sort(group_h * span + rh[h_left])
+        group_q = qp[q_right] // (2 * size)
+        counts[q_right] += np.searchsorted(
+            keys, group_q * span + rq[q_right], side="right"
+        ) - np.searchsorted(keys, group_q * span, side="left")
+        size *= 2
+
+    # câte valori de istoric sunt disponibile la fiecare poziție
+    available = np.searchsorted(np.sort(hp), qp, side="right")
+    out = np.full(len(qp), 50.0)
+    has = available > 0
+    out[has] = 100.0 * counts[has] / available[has]
+    return out
+
+
+def clamp_array(x: np.ndarray, lo: float, hi: float) -> np.ndarray:
+    return np.minimum(np.maximum(x, lo), hi)
+
+
+# ---------- indicatori BTC ----------
+
+def log_returns(closes: Sequence[float]) -> np.ndarray:
+    """
+    Log-return-uri zilnice; primul element este 0.0, iar zilele cu preț
+    nepozitiv (curent sau anterior) primesc tot 0.0.
+    """
+    c = as_float_array(closes)
+    out = np.zeros(len(c))
+    if len(c) < 2:
+        return out
+    prev, cur = c[:-1], c[1:]
+    valid = (prev > 0) & (cur > 0)
+    out[1:][valid] = np.log(cur[valid] / prev[valid])
+    return out
+
+
+def ema_spread(ema_fast: np.ndarray, ema_slow: np.ndarray) -> np.ndarray:
+    """|EMA rapidă - EMA lentă|, 0.0 unde una dintre ele nu e definită."""
+    spread = np.abs(ema_fast - ema_slow)
+    spread[np.isnan(spread)] = 0.0
+    return spread
+
+
+def trend_strength(spread: np.ndarray, vol: np.ndarray) -> np.ndarray:
+    """
+    Distanța EMA raportată la volatilitatea prețului.
+    NaN unde volatilitatea nu e definită sau este 0.
+    """
+    out = np.full(len(spread), np.nan)
+    valid = ~np.isnan(vol) & (vol != 0)
+    out[valid] = spread[valid] / vol[valid]
+    return out
+
+
+def cumulative_return(closes: Sequence[float], window: int) -> np.ndarray:
+    """
+    Randament cumulat pe `window` zile: close[i] / close[i - window] - 1.
+    NaN pentru primele `window` poziții și unde baza este nepozitivă.
+    """
+    c = as_float_array(closes)
+    out = np.full(len(c), np.nan)
+    if len(c) <= window:
+        return out
+    base = c[:-window]
+    valid = base > 0
+    out[window:][valid] = c[window:][valid] / base[valid] - 1.0
+    return out
+
+
+def rolling_vol_ann(log_ret: Sequence[float], window: int) -> np.ndarray:
+    """
+    Volatilitate anualizată (%) pe `window` zile de log-return-uri.
+    Ca în modelul oficial, începe de la indexul `window` (fereastra care
+    include primul return sintetic 0.0 nu este folosită).
+    """
+    out = rolling_std(log_ret, window) * math.sqrt(DAYS_PER_YEAR) * 100.0
+    out[: min(window, len(out))] = np.nan
+    return out
+
+
+@dataclass
+class BtcIndicators:
+    log_ret: np.ndarray
+    ema_fast: np.ndarray
+    ema_slow: np.ndarray
+    spread: np.ndarray
+    vol_trend: np.ndarray
+    trend_strength: np.ndarray
+    cum_ret: np.ndarray
+    vol30: np.ndarray
+
+
+def compute_btc_indicators(closes: Sequence[float]) -> BtcIndicators:
+    """Calculează dintr-o singură trecere toți indicatorii BTC pe toată istoria."""
+    c = as_float_array(closes)
+    log_ret = log_returns(c)
+    ema_fast = ema(c, EMA_FAST)
+    ema_slow = ema(c, EMA_SLOW)
+    spread = ema_spread(ema_fast, ema_slow)
+    vol_trend = rolling_std(c, WINDOW_TREND_VOL)
+
+    return BtcIndicators(
+        log_ret=log_ret,
+        ema_fast=ema_fast,
+        ema_slow=ema_slow,
+        spread=spread,
+        vol_trend=vol_trend,
+        trend_strength=trend_strength(spread, vol_trend),
+        cum_ret=cumulative_return(c, WINDOW_DIR),
+        vol30=rolling_vol_ann(log_ret, WINDOW_VOL),
+    )
+
+
+def extend_btc_indicators(
+    tail_closes: Sequence[float],
+    ema_fast_last: float,
+    ema_slow_last: float,
+    new_closes: Sequence[float],
+) -> BtcIndicators:
+    """
+    Calculează indicatorii BTC doar pentru zilele noi.
+
+    `tail_closes` sunt ultimele close-uri deja procesate (minim TAIL_WINDOW),
+    iar `ema_*_last` sunt valorile EMA din ultima zi procesată. Rezultatul
+    are lungimea lui `new_closes` și coincide cu coada lui
+    `compute_btc_indicators(istoric + new_closes)`.
+    """
+    tail = as_float_array(tail_closes)
+    new = as_float_array(new_closes)
+    if len(tail) < TAIL_WINDOW:
+        raise ValueError(f"tail_closes trebuie să aibă minim {TAIL_WINDOW} valori")
+
+    m = len(new)
+    c = np.concatenate([tail, new])
+    log_ret = log_returns(c)
+    ema_fast = ema_continue(ema_fast_last, new, EMA_FAST)
+    ema_slow = ema_continue(ema_slow_last, new, EMA_SLOW)
+    spread = ema_spread(ema_fast, ema_slow)
+    vol_trend = rolling_std(c, WINDOW_TREND_VOL)[-m:] if m else np.empty(0)
+
+    return BtcIndicators(
+        log_ret=log_ret[len(tail):],
+        ema_fast=ema_fast,
+        ema_slow=ema_slow,
+        spread=spread,
+        vol_trend=vol_trend,
+        trend_strength=trend_strength(spread, vol_trend),
+        cum_ret=cumulative_return(c, WINDOW_DIR)[len(tail):],
+        vol30=rolling_vol_ann(log_ret, WINDOW_VOL)[len(tail):],
+    )
+
+
+# ---------- corelații rulante (IC_GLOBAL) ----------
+
+@dataclass
+class RollingCorrelation:
+    mean_abs: np.ndarray           # media |corr| pe perechile i<j, NaN în warm-up
+    pairs: Optional[np.ndarray]    # (n, k*(k-1)/2) corelații pe perechi, dacă au fost cerute
+    pair_names: List[Tuple[int, int]]
+
+
+def rolling_correlation(
+    returns: np.ndarray, window: int, with_pairs: bool = False
+) -> RollingCorrelation:
+    """
+    Matricea completă de corelații rulante pentru k serii, într-o singură trecere.
+
+    Sumele ferestrei (x, x·y, x²) se obțin din sume prefix locale pe blocuri
+    de lungime `window` (ca în `rolling_mean_var`), pe date centrate pe media
+    fiecărei coloane. Memoria de lucru este O(window · k²), independent de
+    lungimea istoriei. Echivalent cu pandas `rolling(window).corr` pe fiecare
+    pereche. Perechile cu varianță zero dau NaN și contează ca 0 în medie
+    (suma |corr| se împarte la numărul total de perechi, ca în varianta
+    pandas cu add(fill_value=0)).
+    """
+    x = np.asarray(returns, dtype=float)
+    if x.ndim != 2:
+        raise ValueError("returns trebuie să fie o matrice (zile x serii)")
+    if window <= 1:
+        raise ValueError("window trebuie să fie > 1")
+
+    n, k = x.shape
+    iu, ju = np.triu_indices(k, 1)
+    pair_names = list(zip(iu.tolist(), ju.tolist()))
+    mean_abs = np.full(n, np.nan)
+    pairs = np.full((n, len(iu)), np.nan) if with_pairs else None
+    if n < window or k < 2:
+        return RollingCorrelation(mean_abs=mean_abs, pairs=pairs, pair_names=pair_names)
+
+    w = window
+    x = x - x.mean(axis=0)
+    prev_s1 = np.zeros((w, k))
+    prev_s2 = np.zeros((w, k, k))
+
+    for start in range(0, n, w):
+        blk = x[start : start + w]
+        m = len(blk)
+        s1 = np.cumsum(blk, axis=0)
+        s2 = np.cumsum(blk[:, :, None] * blk[:, None, :], axis=0)
+
+        o = np.arange(m)
+        sum1 = s1 + (prev_s1[w - 1] - prev_s1[o])
+        sum2 = s2 + (prev_s2[w - 1] - prev_s2[o])
+
+        cov = sum2 - sum1[:, :, None] * sum1[:, None, :] / w
+        var = np.maximum(np.diagonal(cov, axis1=1, axis2=2), 0.0)
+        denom = np.sqrt(var[:, iu] * var[:, ju])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = np.where(denom > 0, cov[:, iu, ju] / denom, np.nan)
+        corr = np.clip(corr, -1.0, 1.0)
+
+        # primele w-1 rânduri din istorie nu au fereastră completă
+        first = max(0, w - 1 - start)
+        if first < m:
+            mean_abs[start + first : start + m] = (
+                np.nansum(np.abs(corr[first:]), axis=1) / len(iu)
+            )
+            if pairs is not None:
+                pairs[start + first : start + m] = corr[first:]
+
+        if m == w:
+            prev_s1, prev_s2 = s1, s2
+
+    return RollingCorrelation(mean_abs=mean_abs, pairs=pairs, pair_names=pair_names)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+coeziv_latest.py
+
+Sidecar-ul "ultimul punct" pentru seriile istorice Coeziv:
+
+    data/ic_btc_series.json  ->  data/ic_btc_series_latest.json
+
+Builder-ul seriei scrie, lângă fișierul mare, un JSON mic cu ultimul
+punct și mărimea în bytes a fișierului din care provine. Snapshot-urile
+(ex. build_ic_btc_mega_state.py) citesc doar sidecar-ul, în timp constant,
+și revin la citirea completă a seriei dacă sidecar-ul lipsește sau nu mai
+corespunde fișierului (mărime diferită, ex. seria rescrisă de alt script).
+
+Modulul nu depinde de NumPy / pandas, ca snapshot-urile să pornească repede.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+
+SCHEMA_LATEST = "coeziv-latest/1"
+
+
+def latest_path(path: Path) -> Path:
+    """data/ic_btc_series.json -> data/ic_btc_series_latest.json"""
+    return path.with_name(f"{path.stem}_latest{path.suffix}")
+
+
+def write_latest(
+    path: Path, record: Mapping[str, Any], meta: Optional[Mapping[str, Any]] = None
+) -> Path:
+    """Scrie atomic sidecar-ul pentru `path` (după ce `path` a fost scris)."""
+    sidecar = latest_path(path)
+    doc = {
+        "schema": SCHEMA_LATEST,
+        "source": {"file": path.name, "bytes": path.stat().st_size},
+        "meta": dict(meta or {}),
+        "latest": dict(record),
+    }
+    tmp_path = sidecar.with_suffix(sidecar.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    tmp_path.replace(sidecar)
+    return sidecar
+
+
+def read_latest(path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Ultimul punct din sidecar-ul lui `path`, sau None dacă sidecar-ul
+    lipsește, e stricat ori nu corespunde fișierului curent.
+    """
+    sidecar = latest_path(path)
+    if not sidecar.exists() or not path.exists():
+        return None
+    try:
+        with sidecar.open("r", encoding="utf-8") as f:
+            doc = json.load(f)
+    except Exception:
+        return None
+    if doc.get("schema") != SCHEMA_LATEST:
+        return None
+    source = doc.get("source") or {}
+    if source.get("file") != path.name or source.get("bytes") != path.stat().st_size:
+        return None
+    latest = doc.get("latest")
+    return latest if isinstance(latest, dict) else None
@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+coeziv_metrics.py
+
+Instrumentare opțională pe etape pentru scripturile Coeziv: timp real,
+timp CPU, memorie de vârf și număr de rânduri, pentru fiecare etapă
+(load, align, ic, icd, records, serialize, write, ...).
+
+    from coeziv_metrics import metrics_stage
+
+    with metrics_stage("load") as st:
+        df = load_all_series()
+        st.rows = len(df)
+
+Activare: variabila de mediu COEZIV_METRICS=1 (orice script) sau
+`python scripts/coeziv.py run --metrics`. La ieșirea din proces se scrie
+data/_metrics/run-<timestamp>.json și se afișează un tabel sumar.
+Etapele imbricate primesc nume cu "/" (ex. global_build/load).
+
+Memoria:
+- py_peak_mb: vârful alocărilor urmărite de tracemalloc în timpul etapei,
+  peste nivelul de la intrare (include array-urile NumPy);
+- rss_max_mb: RSS maxim al procesului până la finalul etapei (resource,
+  unde există; high-water mark, deci crește monoton).
+
+Dezactivat (implicit), metrics_stage întoarce un singur obiect no-op
+refolosit și nu pornește tracemalloc: cost practic zero. Modulul importă
+doar biblioteca standard.
+
+coeziv_prom pornește doar măsurarea timpului (enable(memory=False,
+report=False)): duratele etapelor ajung în fișierul .prom fără costul
+tracemalloc și fără raportul JSON.
+"""
+
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+
+ROOT = Path(__file__).resolve().parents[1]
+METRICS_DIR = ROOT / "data" / "_metrics"
+ENV_VAR = "COEZIV_METRICS"
+SCHEMA = "coeziv-metrics/1"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_enabled = False
+_memory = False
+_report = False
+_started_at: Optional[str] = None
+_records: List[Dict[str, Any]] = []
+_stack: List["_Stage"] = []
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(memory: bool = True, report: bool = True) -> None:
+    """
+    Pornește colectarea; memory: tracemalloc, report: raportul JSON la ieșire.
+    Apelurile repetate doar adaugă (un apel fără memorie nu o oprește).
+    """
+    global _enabled, _memory, _report, _started_at
+    if memory and not _memory:
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _memory = True
+    if report and not _report:
+        atexit.register(write_report)
+        _report = True
+    if not _enabled:
+        _enabled = True
+        _started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _rss_max_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KiB; macOS: bytes
+    return rss / (1024.0 * 1024.0) if sys.platform == "darwin" else rss / 1024.0
+
+
+class _NullStage:
+    """Etapa no-op folosită când instrumentarea e dezactivată."""
+    rows: Optional[int] = None
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        pass  # st.rows = n nu costă nimic
+
+
+_NULL = _NullStage()
+
+
+class _Stage:
+    def __init__(self, name: str, rows: Optional[int]) -> None:
+        self.name = name
+        self.rows = rows
+        self.child_peak = 0
+
+    def __enter__(self) -> "_Stage":
+        self.memory = _memory
+        if self.memory:
+            import tracemalloc
+
+            current, peak = tracemalloc.get_traced_memory()
+            if _stack:
+                # vârful părintelui până aici nu se pierde la reset_peak
+                parent = _stack[-1]
+                parent.child_peak = max(parent.child_peak, peak)
+            tracemalloc.reset_peak()
+            self.mem_start = current
+        # înregistrarea se rezervă la intrare: raportul păstrează ordinea etapelor
+        self.record: Dict[str, Any] = {"stage": "/".join([s.name for s in _stack] + [self.name])}
+        _records.append(self.record)
+        _stack.append(self)
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        _stack.pop()
+        py_peak_mb = None
+        if self.memory:
+            import tracemalloc
+
+            peak = max(tracemalloc.get_traced_memory()[1], self.child_peak)
+            if _stack:
+                _stack[-1].child_peak = max(_stack[-1].child_peak, peak)
+            tracemalloc.reset_peak()
+            py_peak_mb = round(max(peak - self.mem_start, 0) / (1024.0 * 1024.0), 3)
+        rss = _rss_max_mb()
+        self.record.update({
+            "wall_s": round(wall, 6),
+            "cpu_s": round(cpu, 6),
+            "py_peak_mb": py_peak_mb,
+            "rss_max_mb": None if rss is None else round(rss, 1),
+            "rows": self.rows,
+            "ok": exc_type is None,
+        })
+
+
+def metrics_stage(name: str, rows: Optional[int] = None) -> Any:
+    """Context manager pentru o etapă; `.rows` se poate seta în interior."""
+    if not _enabled:
+        return _NULL
+    return _Stage(name, rows)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator: toată funcția ca o etapă (fără rânduri)."""
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Stage(name, None):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def records() -> List[Dict[str, Any]]:
+    return list(_records)
+
+
+def current_stage() -> str:
+    """Numele complet al etapei deschise ("" în afara oricărei etape)."""
+    return "/".join(s.name for s in _stack)
+
+
+def print_summary(rows: List[Dict[str, Any]]) -> None:
+    print(f"{'etapă':<44} {'wall s':>8} {'cpu s':>8} {'py MB':>8} {'rss MB':>8} {'rânduri':>9}")
+    for r in rows:
+        if "wall_s" not in r:
+            continue  # etapă încă deschisă
+        py_mb = "-" if r["py_peak_mb"] is None else f"{r['py_peak_mb']:.1f}"
+        rss = "-" if r["rss_max_mb"] is None else f"{r['rss_max_mb']:.1f}"
+        count = "-" if r["rows"] is None else str(r["rows"])
+        mark = "" if r["ok"] else "  (eșuat)"
+        print(
+            f"{r['stage']:<44} {r['wall_s']:8.3f} {r['cpu_s']:8.3f} "
+            f"{py_mb:>8} {rss:>8} {count:>9}{mark}"
+        )
+
+
+def write_report(directory: Path = METRICS_DIR) -> Optional[Path]:
+    """Scrie run-<timestamp>.json și afișează tabelul (dacă există etape)."""
+    if not _report or not _records:
+        return None
+    now = datetime.now(timezone.utc)
+    doc = {
+        "schema": SCHEMA,
+        "started_at": _started_at,
+        "finished_at": now.isoformat(timespec="seconds"),
+        "argv": sys.argv,
+        "stages": _records,
+    }
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"run-{now:%Y%m%dT%H%M%SZ}.json"
+    if path.exists():  # două procese în aceeași secundă
+        path = path.with_name(f"{path.stem}-{os.getpid()}.json")
+    tmp_path = path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps(doc, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    tmp_path.replace(path)
+
+    print(f"\n[Coeziv] Metrici pe etape -> {path}")
+    print_summary(_records)
+    _records.clear()
+    return path
+
+
+if os.environ.get(ENV_VAR, "").strip().lower() not in ("", "0", "false", "no"):
+    enable()
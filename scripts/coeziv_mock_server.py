@@ -0,0 +1,347 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+coeziv_mock_server.py
+
+Server HTTP local care imită sursele externe ale pipeline-ului, pe baza
+fișierelor din repo, ca descărcările să poată fi rulate și verificate
+offline:
+
+    /cryptocompare/data/v2/histoday?limit=..&toTs=..   <- data/btc_daily.csv
+    /kraken/0/public/OHLC                               <- data/btc_daily.csv (ultimele 720 zile)
+    /blockchain/q/getdifficulty                         <- --difficulty
+    /charts/difficulty, /charts/transaction-fees        <- data/btc_chain_daily.csv
+                                                           (sau serie sintetică)
+    /chart/<ticker>?period1=..                          <- data_global/<serie>.csv
+                                                           (COEZIV_GLOBAL_SOURCE=chart)
+
+Răspunsurile au ETag, iar cererile cu If-None-Match primesc 304, deci și
+revalidarea din coeziv_http.py se poate verifica. Se pot injecta erori și
+întârzieri per sursă (--fail kraken=2, --delay cryptocompare=3).
+
+Din linia de comandă (afișează variabilele de mediu pentru scripturi):
+
+    python scripts/coeziv_mock_server.py --port 8765
+    eval "$(python scripts/coeziv_mock_server.py --print-env --port 8765)"
+
+Din Python, ca fixture:
+
+    with MockServer(fail={"cryptocompare": 1}) as server:
+        env = server.env()       # COEZIV_*_URL -> serverul local
+        ...
+        server.hits["cryptocompare"]
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+
+ROOT = Path(__file__).resolve().parents[1]
+BTC_DAILY_CSV = ROOT / "data" / "btc_daily.csv"
+CHAIN_CSV = ROOT / "data" / "btc_chain_daily.csv"
+DATA_GLOBAL = ROOT / "data_global"
+
+DEFAULT_DIFFICULTY = 1.2e14
+KRAKEN_ROWS = 720
+BLOCKS_PER_DAY = 144.0
+
+# variabila de mediu -> prefixul rutei pe serverul local
+ENV_ROUTES = {
+    "COEZIV_CRYPTOCOMPARE_URL": "cryptocompare",
+    "COEZIV_KRAKEN_URL": "kraken",
+    "COEZIV_BLOCKCHAIN_URL": "blockchain",
+    "COEZIV_BLOCKCHAIN_CHARTS_URL": "charts",
+    "COEZIV_CHART_URL": "chart",
+}
+# seriile globale vin de pe server doar prin sursa chart (yfinance nu are URL configurabil)
+ENV_EXTRA = {"COEZIV_GLOBAL_SOURCE": "chart"}
+
+CHART_TICKERS = {
+    "^GSPC": "spx",
+    "^VIX": "vix",
+    "DX-Y.NYB": "dxy",
+    "GC=F": "gold",
+    "CL=F": "oil",
+}
+
+
+def _day_ts(date: str) -> int:
+    return int(datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+
+
+def load_btc_rows(path: Path = BTC_DAILY_CSV) -> List[Dict[str, Any]]:
+    with path.open("r", newline="", encoding="utf-8") as f:
+        return [
+            {
+                "time": _day_ts(r["date"]),
+                "open": float(r["open"]),
+                "high": float(r["high"]),
+                "low": float(r["low"]),
+                "close": float(r["close"]),
+                "volume": float(r.get("volume") or 0),
+            }
+            for r in csv.DictReader(f)
+        ]
+
+
+def load_series_rows(name: str, data_global: Path = DATA_GLOBAL) -> List[Tuple[int, float]]:
+    with (data_global / f"{name}.csv").open("r", newline="", encoding="utf-8") as f:
+        return [(_day_ts(r["date"]), float(r["close"])) for r in csv.DictReader(f)]
+
+
+# ---------- răspunsuri ----------
+
+def cryptocompare_histoday(rows: Sequence[Dict[str, Any]], query: Mapping[str, str]) -> Dict[str, Any]:
+    limit = int(query.get("limit", 2000))
+    to_ts = int(query.get("toTs", time.time()))
+    # ca API-ul real: limit + 1 zile, ultima <= toTs, cronologic
+    upto = [r for r in rows if r["time"] <= to_ts][-(limit + 1):]
+    data = [
+        {
+            "time": r["time"], "open": r["open"], "high": r["high"], "low": r["low"],
+            "close": r["close"], "volumefrom": r["volume"],
+        }
+        for r in upto
+    ]
+    return {"Response": "Success", "Data": {"Data": data}}
+
+
+def kraken_ohlc(rows: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    recent = rows[-KRAKEN_ROWS:]
+    ohlc = [
+        [r["time"], str(r["open"]), str(r["high"]), str(r["low"]), str(r["close"]),
+         str(r["close"]), str(r["volume"]), 0]
+        for r in recent
+    ]
+    return {"error": [], "result": {"XXBTZUSD": ohlc, "last": recent[-1]["time"] if recent else 0}}
+
+
+def chart_payload(
+    ticker: str, query: Mapping[str, str], data_global: Path = DATA_GLOBAL
+) -> Dict[str, Any]:
+    name = CHART_TICKERS.get(ticker)
+    if name is None or not (data_global / f"{name}.csv").exists():
+        return {"chart": {"result": None, "error": {"code": "Not Found", "description": ticker}}}
+    period1 = int(query.get("period1", 0))
+    # bursa închide la 16:00 New York: timestamp-ul zilei + gmtoffset -4h
+    rows = [(ts + 14 * 3600 + 1800, c) for ts, c in load_series_rows(name, data_global)]
+    rows = [(ts, c) for ts, c in rows if ts >= period1]
+    closes = [c for _, c in rows]
+    return {
+        "chart": {
+            "result": [{
+                "meta": {"symbol": ticker, "gmtoffset": -14400},
+                "timestamp": [ts for ts, _ in rows],
+                "indicators": {"quote": [{"close": closes}], "adjclose": [{"adjclose": closes}]},
+            }],
+            "error": None,
+        }
+    }
+
+
+def load_chain_rows(path: Path, btc_csv: Path, difficulty: float) -> List[Tuple[int, float, float]]:
+    """
+    (ts, difficulty, fees BTC / block) din store-ul local dacă există, altfel
+    o serie sintetică pe zilele din btc_daily.csv: difficulty ajustată la
+    fiecare 14 zile, dublată anual, egală cu `difficulty` în ultima zi.
+    """
+    if path.exists():
+        with path.open("r", newline="", encoding="utf-8") as f:
+            return [
+                (_day_ts(r["date"]), float(r["difficulty"]), float(r["avg_fees_per_block_btc"] or "nan"))
+                for r in csv.DictReader(f)
+            ]
+    days = [r["time"] for r in load_btc_rows(btc_csv)]
+    if not days:
+        return []
+    last = days[-1]
+    out = []
+    for ts in days:
+        epoch = (ts - last) // (14 * 86400) * 14 * 86400
+        out.append((ts, difficulty * 2.0 ** (epoch / (365 * 86400)), 0.05 + 0.01 * ((ts // 86400) % 7)))
+    return out
+
+
+def blockchain_chart(name: str, rows: Sequence[Tuple[int, float, float]], query: Mapping[str, str]) -> Dict[str, Any]:
+    start = _day_ts(query["start"]) if query.get("start") else 0
+    if name == "difficulty":
+        values = [{"x": ts, "y": d} for ts, d, _ in rows if ts >= start]
+    else:
+        values = [{"x": ts, "y": f * BLOCKS_PER_DAY} for ts, _, f in rows if ts >= start and f == f]
+    return {"status": "ok", "name": name, "period": "day", "values": values}
+
+
+# ---------- server ----------
+
+class MockServer:
+    """Serverul local, pornit într-un thread; folosibil ca context manager."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        difficulty: float = DEFAULT_DIFFICULTY,
+        fail: Optional[Mapping[str, int]] = None,
+        delay: Optional[Mapping[str, float]] = None,
+        btc_csv: Path = BTC_DAILY_CSV,
+        data_global: Path = DATA_GLOBAL,
+        chain_csv: Path = CHAIN_CSV,
+    ) -> None:
+        self.difficulty = difficulty
+        self.fail = dict(fail or {})      # sursă -> câte request-uri întorc 503
+        self.delay = dict(delay or {})    # sursă -> secunde de așteptare per request
+        self.btc_csv = Path(btc_csv)
+        self.data_global = Path(data_global)
+        self.chain_csv = Path(chain_csv)
+        self.hits: Dict[str, int] = {}
+        self.not_modified: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        env = {name: f"{self.url}/{route}" for name, route in ENV_ROUTES.items()}
+        return {**env, **ENV_EXTRA}
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def respond(self, route: str, rest: str, query: Mapping[str, str]) -> Tuple[int, bytes, str]:
+        """(status, corp, content-type) pentru o cerere."""
+        if route == "cryptocompare" and rest == "data/v2/histoday":
+            body = json.dumps(cryptocompare_histoday(load_btc_rows(self.btc_csv), query))
+        elif route == "kraken" and rest == "0/public/OHLC":
+            body = json.dumps(kraken_ohlc(load_btc_rows(self.btc_csv)))
+        elif route == "blockchain" and rest == "q/getdifficulty":
+            return 200, repr(float(self.difficulty)).encode("utf-8"), "text/plain"
+        elif route == "charts" and rest in ("difficulty", "transaction-fees"):
+            rows = load_chain_rows(self.chain_csv, self.btc_csv, self.difficulty)
+            body = json.dumps(blockchain_chart(rest, rows, query))
+        elif route == "chart" and rest:
+            body = json.dumps(chart_payload(urllib.parse.unquote(rest), query, self.data_global))
+        else:
+            return 404, b"not found", "text/plain"
+        return 200, body.encode("utf-8"), "application/json"
+
+    def _handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, ca sursele reale
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def _send(self, status: int, body: bytes, ctype: str, etag: Optional[str] = None) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                if etag:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                parts = urllib.parse.urlsplit(self.path)
+                route, _, rest = parts.path.lstrip("/").partition("/")
+                query = dict(urllib.parse.parse_qsl(parts.query))
+
+                with server._lock:
+                    server.hits[route] = server.hits.get(route, 0) + 1
+                    failing = server.fail.get(route, 0) > 0
+                    if failing:
+                        server.fail[route] -= 1
+                if server.delay.get(route):
+                    time.sleep(server.delay[route])
+                if failing:
+                    self._send(503, b"unavailable", "text/plain")
+                    return
+
+                status, body, ctype = server.respond(route, rest, query)
+                etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"' if status == 200 else None
+                if etag and self.headers.get("If-None-Match") == etag:
+                    with server._lock:
+                        server.not_modified[route] = server.not_modified.get(route, 0) + 1
+                    self._send(304, b"", ctype, etag)
+                    return
+                self._send(status, body, ctype, etag)
+
+        return Handler
+
+
+def _parse_pairs(values: Sequence[str], cast: type) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for value in values:
+        route, _, amount = value.partition("=")
+        if route not in ENV_ROUTES.values() or not amount:
+            raise SystemExit(f"Valoare invalidă: {value} (format: sursă=număr)")
+        out[route] = cast(amount)
+    return out
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Server local care imită sursele de date Coeziv.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--difficulty", type=float, default=DEFAULT_DIFFICULTY)
+    parser.add_argument("--fail", action="append", default=[], metavar="SURSA=N",
+                        help="primele N request-uri către sursă întorc 503")
+    parser.add_argument("--delay", action="append", default=[], metavar="SURSA=SEC",
+                        help="întârziere per request pentru sursă")
+    parser.add_argument("--print-env", action="store_true",
+                        help="doar afișează variabilele de mediu (export ...) și iese")
+    args = parser.parse_args(argv)
+
+    if args.print_env:
+        for env, route in ENV_ROUTES.items():
+            print(f"export {env}=http://{args.host}:{args.port}/{route}")
+        for env, value in ENV_EXTRA.items():
+            print(f"export {env}={value}")
+        return
+
+    server = MockServer(
+        args.host, args.port, args.difficulty,
+        fail=_parse_pairs(args.fail, int), delay=_parse_pairs(args.delay, float),
+    )
+    print(f"[Coeziv] Server mock pe {server.url}", flush=True)
+    for env, url in server.env().items():
+        print(f"  export {env}={url}", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
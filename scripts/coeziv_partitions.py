@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+coeziv_partitions.py
+
+Ieșire partiționată pentru seriile istorice Coeziv:
+
+    data/<serie>/manifest.json
+    data/<serie>/2024.json, data/<serie>/2025.json, ...   (--partition year)
+    data/<serie>/2025-06.json, ...                          (--partition month)
+
+Fiecare partiție este un document columnar (coeziv_series_format.py) cu
+rândurile din perioada respectivă. manifest.json listează partițiile cu
+numărul de rânduri, intervalul de date, hash-ul sha256 al conținutului și
+dimensiunea, ca un client să descarce doar partițiile noi / modificate.
+
+O partiție se rescrie doar dacă hash-ul conținutului s-a schimbat, iar
+manifest-ul nu conține timestamp-uri de rulare: o rulare fără date noi nu
+modifică nimic în git.
+
+Important: percentilele pe toată istoria se mută pentru *toate* zilele
+când istoria crește, deci ar rescrie toate partițiile la fiecare rulare.
+De aceea scripturile scriu partițiile cu indici point-in-time (fiecare zi
+rankată față de istoricul disponibil până în acea zi,
+coeziv_indicators.expanding_percentile_ranks): perioadele închise rămân
+identice, iar o rulare zilnică rescrie doar partiția curentă.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from coeziv_series_format import columnar_document
+
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_SCHEMA = "coeziv-partitions/1"
+PARTITION_UNITS = {"year": "datetime64[Y]", "month": "datetime64[M]"}
+
+
+def add_partition_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--partition",
+        choices=sorted(PARTITION_UNITS),
+        default=None,
+        help="scrie și ieșirea partiționată (un fișier per an / lună + manifest.json)",
+    )
+
+
+def partition_keys(t_ms: np.ndarray, by: str) -> np.ndarray:
+    """Cheia partiției ("2024" / "2024-07") pentru fiecare timestamp (ms UNIX, UTC)."""
+    unit = PARTITION_UNITS[by]
+    return np.datetime_as_string(np.asarray(t_ms, dtype="datetime64[ms]").astype(unit))
+
+
+def _content_text(doc: Mapping[str, Any]) -> str:
+    return json.dumps(doc, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_manifest(out_dir: Path) -> Dict[str, Any]:
+    path = out_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def write_partitions(
+    out_dir: Path,
+    columns: Mapping[str, Any],
+    dictionaries: Mapping[str, Sequence[Mapping[str, Any]]],
+    by: str,
+    rounded: Iterable[str] = (),
+    precision: Optional[int] = None,
+    meta: Optional[Mapping[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Scrie partițiile modificate + manifest.json. Întoarce manifest-ul și,
+    în cheia "_written", lista partițiilor rescrise la această rulare.
+    """
+    arrays = {name: np.asarray(values) for name, values in columns.items()}
+    t = arrays["t"]
+    keys = partition_keys(t, by)
+    rounded = tuple(rounded)
+
+    previous = {p["key"]: p for p in load_manifest(out_dir).get("partitions", [])}
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    entries: List[Dict[str, Any]] = []
+    written: List[str] = []
+
+    # t e crescător, deci fiecare cheie e un interval contiguu
+    uniq, starts = np.unique(keys, return_index=True)
+    order = np.argsort(starts)
+    bounds = list(starts[order]) + [len(keys)]
+    for j, idx in enumerate(order):
+        key = str(uniq[idx])
+        sl = slice(int(bounds[j]), int(bounds[j + 1]))
+        doc = columnar_document(
+            {name: arr[sl] for name, arr in arrays.items()},
+            dictionaries,
+            rounded=rounded,
+            precision=precision,
+        )
+        doc["partition"] = key
+        text = _content_text(doc)
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        file_name = f"{key}.json"
+        path = out_dir / file_name
+
+        old = previous.get(key)
+        if old is None or old.get("sha256") != digest or not path.exists():
+            tmp_path = path.with_suffix(".json.tmp")
+            tmp_path.write_text(text, encoding="utf-8")
+            tmp_path.replace(path)
+            written.append(key)
+
+        entries.append(
+            {
+                "key": key,
+                "file": file_name,
+                "rows": doc["rows"],
+                "first_t": int(t[sl][0]),
+                "last_t": int(t[sl][-1]),
+                "first_date": str(np.datetime64(int(t[sl][0]), "ms").astype("datetime64[D]")),
+                "last_date": str(np.datetime64(int(t[sl][-1]), "ms").astype("datetime64[D]")),
+                "sha256": digest,
+                "bytes": len(text.encode("utf-8")),
+            }
+        )
+
+    # partiții care nu mai există (ex. schimbare year -> month)
+    current = {e["file"] for e in entries}
+    for old in previous.values():
+        if old.get("file") not in current:
+            (out_dir / old["file"]).unlink(missing_ok=True)
+
+    manifest: Dict[str, Any] = {
+        "schema": MANIFEST_SCHEMA,
+        "partition_by": by,
+        "rows": int(len(t)),
+        "meta": dict(meta or {}),
+        "partitions": entries,
+    }
+    text = json.dumps(manifest, ensure_ascii=False, indent=2)
+    manifest_path = out_dir / MANIFEST_NAME
+    if not manifest_path.exists() or manifest_path.read_text(encoding="utf-8") != text + "\n":
+        tmp_path = manifest_path.with_suffix(".json.tmp")
+        tmp_path.write_text(text + "\n", encoding="utf-8")
+        tmp_path.replace(manifest_path)
+
+    manifest["_written"] = written
+    return manifest
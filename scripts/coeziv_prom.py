@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+coeziv_prom.py
+
+Exporter Prometheus (format textfile, pentru colectorul textfile al
+node_exporter) pentru scripturile Coeziv: prospețimea datelor, durata
+etapelor, dimensiunea ieșirilor și eșecurile surselor, fără parsarea
+logurilor.
+
+Activare: COEZIV_PROM_DIR=<director> (directorul din
+--collector.textfile.directory) sau `python scripts/coeziv.py run
+--prom-dir <director>`. Fiecare script scrie la final, atomic,
+<director>/coeziv_<script>.prom; runner-ul scrie și coeziv_pipeline.prom.
+
+    import coeziv_prom
+
+    coeziv_prom.start_job("build_global_coeziv_state")
+    ...
+    coeziv_prom.freshness("global_coeziv_state", latest_date)
+    coeziv_prom.output(OUTPUT_JSON)
+    coeziv_prom.write_job()
+
+Metrici (toate gauge, valori ale ultimei rulări; eticheta e `script`, nu
+`job`, ca să nu intre în conflict cu eticheta pusă de Prometheus):
+
+- coeziv_job_last_run_timestamp_seconds / coeziv_job_last_success_timestamp_seconds
+- coeziv_job_success, coeziv_job_duration_seconds
+- coeziv_stage_duration_seconds{stage}, coeziv_stage_rows{stage}
+  (etapele coeziv_metrics, măsurate doar ca timp)
+- coeziv_series_last_date_timestamp_seconds{series}, coeziv_series_lag_days{series}
+- coeziv_output_bytes{path}
+- coeziv_source_failures{source}, coeziv_source_used{source}
+
+Exemplu de alertă: `coeziv_series_lag_days{series="global_coeziv_state"} > 4`
+sau `time() - coeziv_job_last_success_timestamp_seconds > 2 * 86400`.
+
+Dezactivat (implicit), toate funcțiile ies imediat. Modulul importă doar
+biblioteca standard.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import coeziv_metrics
+
+
+ROOT = Path(__file__).resolve().parents[1]
+ENV_VAR = "COEZIV_PROM_DIR"
+PREFIX = "coeziv_"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_dir: Optional[Path] = None
+_registry: Optional["Registry"] = None
+_script: Optional[str] = None
+_started = 0.0
+_records_start = 0
+_stage_prefix = ""
+
+
+def log(msg: str) -> None:
+    print(f"[coeziv_prom] {msg}", flush=True)
+
+
+# ---- registru și format text -----------------------------------------------
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class Registry:
+    """Familii de gauge-uri: nume -> (help, {etichete: valoare})."""
+
+    def __init__(self) -> None:
+        self.families: Dict[str, Tuple[str, Dict[Labels, float]]] = {}
+
+    def _samples(self, metric: str, help_text: str) -> Dict[Labels, float]:
+        if metric not in self.families:
+            self.families[metric] = (help_text, {})
+        return self.families[metric][1]
+
+    def set(self, metric: str, value: float, help_text: str, **labels: Any) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        self._samples(metric, help_text)[key] = float(value)
+
+    def add(self, metric: str, value: float, help_text: str, **labels: Any) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        samples = self._samples(metric, help_text)
+        samples[key] = samples.get(key, 0.0) + float(value)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in sorted(self.families):
+            help_text, samples = self.families[metric]
+            lines.append(f"# HELP {metric} {_escape(help_text)}")
+            lines.append(f"# TYPE {metric} gauge")
+            for key in sorted(samples):
+                labels = ",".join(f'{k}="{_escape(v)}"' for k, v in key)
+                name = f"{metric}{{{labels}}}" if labels else metric
+                lines.append(f"{name} {_format_value(samples[key])}")
+        return "\n".join(lines) + "\n"
+
+
+def textfile_path(name: str, directory: Optional[Path] = None) -> Path:
+    return (directory or _dir or ROOT) / f"{PREFIX}{name}.prom"
+
+
+def write_textfile(name: str, registry: Registry, directory: Optional[Path] = None) -> Path:
+    """
+    Scrie <director>/coeziv_<name>.prom atomic: node_exporter citește doar
+    *.prom, deci fișierul temporar (alt sufix) nu e văzut pe jumătate.
+    """
+    path = textfile_path(name, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(registry.render(), encoding="utf-8")
+    tmp_path.replace(path)
+    return path
+
+
+def previous_value(path: Path, metric: str) -> Optional[float]:
+    """Prima valoare a unei metrici din fișierul .prom existent (sau None)."""
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError:
+        return None
+    for line in text.splitlines():
+        if line.startswith(metric) and line[len(metric):len(metric) + 1] in (" ", "{"):
+            try:
+                return float(line.rsplit(" ", 1)[1])
+            except (IndexError, ValueError):
+                return None
+    return None
+
+
+# ---- API pe script -----------------------------------------------------------
+
+def enabled() -> bool:
+    return _dir is not None
+
+
+def enable(directory: Union[str, Path]) -> None:
+    """Pornește exportul în `directory`; duratele vin din coeziv_metrics."""
+    global _dir
+    _dir = Path(directory)
+    coeziv_metrics.enable(memory=False, report=False)
+
+
+def start_job(script: str) -> None:
+    """Începe colectarea pentru un script (în pipeline: câte unul pe rând)."""
+    global _registry, _script, _started, _records_start, _stage_prefix
+    if _dir is None:
+        return
+    _registry = Registry()
+    _script = script
+    _started = time.perf_counter()
+    _records_start = len(coeziv_metrics.records())
+    # în runner etapele scriptului sunt sub etapa pipeline-ului ("global_build/load");
+    # eticheta rămâne cea din rularea directă ("load")
+    parent = coeziv_metrics.current_stage()
+    _stage_prefix = f"{parent}/" if parent else ""
+
+
+def gauge(metric: str, value: float, help_text: str, **labels: Any) -> None:
+    if _registry is None:
+        return
+    _registry.set(metric, value, help_text, script=_script, **labels)
+
+
+def _to_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    # "YYYY-MM-DD", numpy.datetime64, pandas.Timestamp
+    return date.fromisoformat(str(value)[:10])
+
+
+def freshness(series: str, last_date: Any, today: Optional[date] = None) -> None:
+    """Ultima dată din serie și întârzierea în zile față de azi (UTC)."""
+    if _registry is None or last_date is None:
+        return
+    day = _to_date(last_date)
+    today = today or datetime.now(timezone.utc).date()
+    midnight = datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+    gauge(
+        "coeziv_series_last_date_timestamp_seconds", midnight,
+        "Ultima zi cu date din serie (miezul nopții UTC, epoch).", series=series,
+    )
+    gauge(
+        "coeziv_series_lag_days", (today - day).days,
+        "Zile între ultima zi cu date și ziua curentă UTC.", series=series,
+    )
+
+
+def output(path: Path) -> None:
+    """Dimensiunea unui fișier de ieșire (ignorat dacă lipsește)."""
+    if _registry is None:
+        return
+    try:
+        size = path.stat().st_size
+    except OSError:
+        return
+    try:
+        label = path.resolve().relative_to(ROOT).as_posix()
+    except ValueError:
+        label = str(path)
+    gauge("coeziv_output_bytes", size, "Dimensiunea fișierului de ieșire (bytes).", path=label)
+
+
+def source_failure(source: str, **labels: Any) -> None:
+    """Numără un eșec al unei surse externe (ex. CryptoCompare înainte de Kraken)."""
+    if _registry is None:
+        return
+    _registry.add(
+        "coeziv_source_failures", 1, "Eșecuri ale sursei externe în ultima rulare.",
+        script=_script, source=source, **labels,
+    )
+
+
+def source_used(source: str, **labels: Any) -> None:
+    """Marchează sursa care a furnizat datele (1)."""
+    gauge("coeziv_source_used", 1, "Sursa externă folosită în ultima rulare.", source=source, **labels)
+
+
+def write_job(success: bool = True) -> Optional[Path]:
+    """
+    Scrie fișierul .prom al scriptului curent: metricile adunate, etapele
+    coeziv_metrics încheiate de la start_job și starea rulării. La eșec
+    (success=False) se păstrează ultimul timestamp de succes din fișierul
+    anterior, ca alertele pe vechime să rămână corecte.
+    """
+    global _registry
+    if _registry is None or _script is None:
+        return None
+    registry = _registry
+    now = time.time()
+
+    for rec in coeziv_metrics.records()[_records_start:]:
+        if "wall_s" not in rec:
+            continue  # etapă încă deschisă
+        stage = rec["stage"][len(_stage_prefix):] if rec["stage"].startswith(_stage_prefix) else rec["stage"]
+        registry.set(
+            "coeziv_stage_duration_seconds", rec["wall_s"],
+            "Durata etapei (secunde, timp real).", script=_script, stage=stage,
+        )
+        if rec["rows"] is not None:
+            registry.set(
+                "coeziv_stage_rows", rec["rows"],
+                "Rânduri procesate de etapă.", script=_script, stage=stage,
+            )
+
+    registry.set(
+        "coeziv_job_duration_seconds", time.perf_counter() - _started,
+        "Durata scriptului (secunde).", script=_script,
+    )
+    registry.set("coeziv_job_success", int(success), "1 dacă ultima rulare a reușit.", script=_script)
+    registry.set(
+        "coeziv_job_last_run_timestamp_seconds", now, "Momentul ultimei rulări (epoch).", script=_script,
+    )
+    path = textfile_path(_script)
+    last_success = now if success else previous_value(path, "coeziv_job_last_success_timestamp_seconds")
+    if last_success is not None:
+        registry.set(
+            "coeziv_job_last_success_timestamp_seconds", last_success,
+            "Momentul ultimei rulări reușite (epoch).", script=_script,
+        )
+
+    path = write_textfile(_script, registry)
+    _registry = None
+    log(f"Metrici Prometheus -> {path}")
+    return path
+
+
+_env_dir = os.environ.get(ENV_VAR, "").strip()
+if _env_dir:
+    enable(_env_dir)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+coeziv_series_format.py
+
+Formatele de ieșire pentru seriile istorice Coeziv
+(data/ic_btc_series.json, data/global_coeziv_state.json).
+
+- "legacy"   – formatul actual: listă de obiecte, câte unul pe zi, cu toate
+               cheile și textele de regim repetate la fiecare punct;
+- "columnar" – schema nouă (SCHEMA_COLUMNAR): struct-of-arrays
+               ("columns": {"t": [...], "close": [...], ...}), regimurile ca
+               coduri întregi mici + un singur tabel de lookup
+               ("dictionaries"), cu rotunjire opțională la precizie fixă.
+
+Fișierul columnar se scrie lângă cel legacy (<nume>.columnar.json), ca
+front-end-ul existent să poată migra treptat. `decode_records` reface
+exact punctele legacy dintr-un document columnar.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+SCHEMA_COLUMNAR = "coeziv-columnar/2"
+
+FORMAT_LEGACY = "legacy"
+FORMAT_COLUMNAR = "columnar"
+FORMAT_BOTH = "both"
+FORMATS = (FORMAT_LEGACY, FORMAT_COLUMNAR, FORMAT_BOTH)
+
+
+def columnar_path(path: Path) -> Path:
+    """data/ic_btc_series.json -> data/ic_btc_series.columnar.json"""
+    return path.with_name(f"{path.stem}.columnar{path.suffix}")
+
+
+def wants_legacy(fmt: str) -> bool:
+    return fmt in (FORMAT_LEGACY, FORMAT_BOTH)
+
+
+def wants_columnar(fmt: str) -> bool:
+    return fmt in (FORMAT_COLUMNAR, FORMAT_BOTH)
+
+
+def add_format_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default=FORMAT_LEGACY,
+        help="legacy (listă de obiecte), columnar (<nume>.columnar.json) sau both",
+    )
+    parser.add_argument(
+        "--precision",
+        type=int,
+        default=None,
+        help="rotunjește indicii în formatul columnar la N zecimale",
+    )
+
+
+# ---------- codare ----------
+
+def dictionary_encode(
+    values: Sequence[Hashable], table: Optional[Sequence[Hashable]] = None
+) -> Tuple[np.ndarray, List[Hashable]]:
+    """
+    Înlocuiește fiecare valoare cu indexul ei într-un tabel de lookup.
+    Fără `table`, tabelul e construit în ordinea primei apariții.
+    """
+    lookup: Dict[Hashable, int] = {}
+    entries: List[Hashable] = []
+    for v in table or ():
+        lookup.setdefault(v, len(entries))
+        entries.append(v)
+
+    codes = np.empty(len(values), dtype=np.int64)
+    for i, v in enumerate(values):
+        code = lookup.get(v)
+        if code is None:
+            code = lookup[v] = len(entries)
+            entries.append(v)
+        codes[i] = code
+    return codes, entries
+
+
+def encode_columns(
+    columns: Mapping[str, Any],
+    rounded: Iterable[str] = (),
+    precision: Optional[int] = None,
+) -> Dict[str, list]:
+    """Transformă array-urile în liste JSON; coloanele `rounded` la `precision` zecimale."""
+    rounded = set(rounded)
+    out: Dict[str, list] = {}
+    for name, values in columns.items():
+        arr = np.asarray(values)
+        if precision is not None and name in rounded and arr.dtype.kind == "f":
+            arr = np.round(arr, precision)
+        if arr.dtype.kind == "f" and not np.all(np.isfinite(arr)):
+            raise ValueError(f"Coloana {name} conține valori nevalide pentru JSON.")
+        out[name] = arr.tolist()
+    return out
+
+
+def columnar_document(
+    columns: Mapping[str, Any],
+    dictionaries: Mapping[str, Sequence[Mapping[str, Any]]],
+    rounded: Iterable[str] = (),
+    precision: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Blocul columnar comun: {"schema", "precision", "rows", "columns", "dictionaries"}.
+
+    `dictionaries[col]` este lista de intrări pentru codurile din coloana
+    `col`; fiecare intrare este un obiect cu câmpurile legacy pe care le
+    reprezintă codul (ex. regime / regime_label / regime_short / regime_color).
+    """
+    encoded = encode_columns(columns, rounded=rounded, precision=precision)
+    lengths = {len(v) for v in encoded.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"Coloane de lungimi diferite: {sorted(lengths)}")
+    return {
+        "schema": SCHEMA_COLUMNAR,
+        "precision": precision,
+        "rows": lengths.pop() if lengths else 0,
+        "columns": encoded,
+        "dictionaries": {k: [dict(e) for e in v] for k, v in dictionaries.items()},
+    }
+
+
+def decode_records(doc: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """Reface lista de obiecte legacy dintr-un bloc columnar."""
+    columns = doc["columns"]
+    dictionaries = doc.get("dictionaries", {})
+    names = list(columns)
+    records: List[Dict[str, Any]] = []
+    for row in zip(*(columns[n] for n in names)):
+        rec: Dict[str, Any] = {}
+        for name, value in zip(names, row):
+            if name in dictionaries:
+                rec.update(dictionaries[name][value])
+            else:
+                rec[name] = value
+        records.append(rec)
+    return records
+
+
+def write_json_atomic(path: Path, obj: Any, indent: Optional[int] = None) -> int:
+    """Scrie JSON prin fișier temporar + rename; întoarce numărul de bytes."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if indent is None:
+        text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = json.dumps(obj, ensure_ascii=False, indent=indent)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.write("\n")
+    tmp_path.replace(path)
+    return len(text.encode("utf-8")) + 1
@@ -11,249 +11,527 @@ Scop:
 - să fie aliniat cu modelul coeziv oficial din
   update_btc_state_latest_from_daily.py
 - ultimul punct din serie == valorile din btc_state_latest.json
+- indicatorii vin din motorul comun coeziv_indicators.py (aceeași
+  implementare NumPy ca snapshot-ul live)
+
+Mod incremental (--incremental):
+- starea motorului (EMA50/EMA200 curente, ultimele close-uri pentru
+  ferestrele rulante, istoricele sortate din spatele percentilelor și
+  valorile brute ale fiecărui punct) este salvată în
+  data/ic_btc_series_state.json; fișierul nu se comite (e mare și se
+  rescrie la fiecare rulare), în CI se păstrează prin actions/cache;
+- la rularea următoare se calculează indicatorii doar pentru zilele noi;
+- percentilele sunt pe toată istoria, deci se mută când istoria crește:
+  toate punctele (inclusiv cele vechi) sunt re-rankate din valorile brute
+  salvate, cu istoricele sortate actualizate prin inserție. Rezultatul
+  este același ca la un rebuild complet;
+- dacă rânduri mai vechi din btc_daily.csv s-au schimbat (sau starea
+  lipsește / are altă versiune), se face automat rebuild complet.
+
+Format (--format legacy|columnar|both, vezi coeziv_series_format.py):
+- legacy: data/ic_btc_series.json, un obiect per zi (implicit), plus
+  data/ic_btc_series_latest.json cu ultimul punct (coeziv_latest.py);
+- columnar: data/ic_btc_series.columnar.json, coloane + regim codat
+  (cu --precision N pentru rotunjirea indicilor).
+
+La fiecare rulare se scrie și data/ic_btc_series.bin, store binar tipizat
+care se deschide cu np.memmap (vezi coeziv_binary_store.py); din el
+citește build_ic_btc_mega_state ultimul punct.
+
+Partiționat (--partition year|month, vezi coeziv_partitions.py):
+data/ic_btc_series/<an|lună>.json + manifest.json. Aici percentilele sunt
+point-in-time (fiecare zi față de istoricul de până la ea, salvate în
+starea incrementală), ca partițiile închise să nu se mai schimbe.
 """
 
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
-from datetime import datetime
+from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import List, Optional, Dict, Any
-
-import math
-from statistics import stdev
-
-import csv
-
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+import coeziv_prom
+from coeziv_binary_store import write_store
+from coeziv_btc_daily import epoch_ms, load_btc_close
+from coeziv_indicators import (
+    TAIL_WINDOW,
+    BtcIndicators,
+    PercentileRanker,
+    compute_btc_indicators,
+    expanding_percentile_ranks,
+    extend_btc_indicators,
+)
+from coeziv_latest import latest_path, write_latest
+from coeziv_metrics import metrics_stage
+from coeziv_partitions import MANIFEST_NAME, add_partition_arguments, write_partitions
+from coeziv_series_format import (
+    add_format_arguments,
+    columnar_document,
+    columnar_path,
+    dictionary_encode,
+    wants_columnar,
+    wants_legacy,
+    write_json_atomic,
+)
 from update_btc_state_latest_from_daily import (
+    REGIME_TABLE,
+    REGIMES,
+    Regime,
     classify_regime,
-    clamp,
 )
 
 ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = ROOT / "data"
 INPUT_DAILY = DATA_DIR / "btc_daily.csv"
 OUT_PATH = DATA_DIR / "ic_btc_series.json"
+STATE_PATH = DATA_DIR / "ic_btc_series_state.json"
+BIN_PATH = DATA_DIR / "ic_btc_series.bin"
 
+STATE_VERSION = 2
 
-# --------- utilitare simple (copiate compatibil cu scriptul oficial) ---------
+RANKING_FULL = "full-history"
+RANKING_POINT_IN_TIME = "point-in-time"
+PARTITION_DIR = DATA_DIR / "ic_btc_series"
 
+# coloanele rotunjite de --precision în formatul columnar (t și close rămân exacte)
+ROUNDED_COLUMNS = ("ic_struct", "ic_dir", "ic_flux", "ic_cycle", "vol30_ann_pct", "vol30_index")
 
-def ema(series: List[float], period: int) -> List[Optional[float]]:
-    if period <= 0:
-        raise ValueError("period trebuie să fie > 0")
-    if len(series) == 0:
-        return []
 
-    k = 2 / (period + 1.0)
-    out: List[Optional[float]] = [None] * len(series)
+# --------- citire date BTC din btc_daily.csv (loader comun cu scriptul oficial) ---------
 
-    if len(series) < period:
-        return out
 
-    sma = sum(series[:period]) / period
-    out[period - 1] = sma
-    prev = sma
+def read_btc_daily(path: Path) -> Tuple[np.ndarray, np.ndarray]:
+    """(date datetime64[D], close float64) din loader-ul comun coeziv_btc_daily."""
+    return load_btc_close(path)
 
-    for i in range(period, len(series)):
-        price = series[i]
-        prev = price * k + prev * (1 - k)
-        out[i] = prev
 
-    return out
+# --------- starea motorului pentru modul incremental ---------
 
 
-def rolling_std(series: List[float], window: int) -> List[Optional[float]]:
-    if window <= 1:
-        raise ValueError("window trebuie să fie > 1")
-    n = len(series)
-    out: List[Optional[float]] = [None] * n
-    if n < window:
-        return out
+@dataclass
+class SeriesEngineState:
+    version: int
+    rows: int                   # câte rânduri din btc_daily.csv au fost procesate
+    rows_sha256: str            # amprenta (date, close) a acestor rânduri
+    tail_closes: List[float]    # ultimele TAIL_WINDOW close-uri (ferestre rulante)
+    ema_fast_last: float
+    ema_slow_last: float
+    # istoricele sortate din spatele celor trei percentile
+    ts_sorted: List[float]
+    cr_sorted: List[float]
+    vol_sorted: List[float]
+    # valorile brute ale punctelor publicate (pentru re-rankare)
+    point_index: List[int]
+    point_ts: List[float]
+    point_cr: List[float]
+    point_vol: List[float]
+    # percentile point-in-time ale punctelor publicate (nu se mai schimbă)
+    point_pit_struct: List[float]
+    point_pit_dir: List[float]
+    point_pit_vol: List[float]
 
-    for i in range(window - 1, n):
-        chunk = series[i - window + 1 : i + 1]
-        if len(chunk) < 2:
-            out[i] = None
-        else:
-            out[i] = stdev(chunk)  # type: ignore[arg-type]
-    return out
-
-
-def percentile_rank(history: List[float], value: float) -> float:
-    """
-    Percentila poziției lui `value` într-un istoric.
-    0 = cel mai mic, 100 = cel mai mare.
-    (identic ca în update_btc_state_latest_from_daily.py)
-    """
-    if not history:
-        return 50.0
-    sorted_vals = sorted(history)
-    count = 0
-    for v in sorted_vals:
-        if v <= value:
-            count += 1
-        else:
-            break
-    return 100.0 * count / len(sorted_vals)
 
+def rows_fingerprint(dates: np.ndarray, closes: Sequence[float]) -> str:
+    h = hashlib.sha256()
+    days = np.datetime_as_string(dates, unit="D").tolist()
+    for d, c in zip(days, np.asarray(closes, dtype=float).tolist()):
+        h.update(f"{d},{c!r}\n".encode("ascii"))
+    return h.hexdigest()
 
-# --------- citire date BTC din btc_daily.csv (la fel ca scriptul oficial) ---------
 
-
-def read_btc_daily(path: Path):
+def load_engine_state(path: Path) -> Optional[SeriesEngineState]:
     if not path.exists():
-        raise FileNotFoundError(f"Nu am găsit fișierul {path}")
-
-    dates: List[datetime] = []
-    closes: List[float] = []
-
-    with path.open("r", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        header = next(reader)
-        try:
-            date_idx = header.index("date")
-        except ValueError:
-            date_idx = header.index("Date")
-        try:
-            close_idx = header.index("close")
-        except ValueError:
-            close_idx = header.index("Close")
-
-        for row in reader:
-            if not row or not row[date_idx]:
-                continue
-            d_str = row[date_idx].split()[0]
-            d = datetime.fromisoformat(d_str)
-            try:
-                c = float(row[close_idx])
-            except ValueError:
-                continue
-            dates.append(d)
-            closes.append(c)
-
-    combined = sorted(zip(dates, closes), key=lambda x: x[0])
-    dates_sorted, closes_sorted = zip(*combined)
-    return list(dates_sorted), list(closes_sorted)
+        return None
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            raw = json.load(f)
+        state = SeriesEngineState(**raw)
+    except Exception:
+        return None
+    if state.version != STATE_VERSION:
+        return None
+    return state
+
+
+def save_engine_state(path: Path, state: SeriesEngineState) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(asdict(state), f, separators=(",", ":"))
+    tmp_path.replace(path)
 
 
 # --------- serie coezivă (0–100) pe toată istoria ---------
 
 
-def build_ic_series() -> Dict[str, Any]:
-    dates, closes = read_btc_daily(INPUT_DAILY)
-    n = len(closes)
-    if n < 260:
-        raise RuntimeError("Prea puține date BTC (ai nevoie de ~260 zile minim).")
+def _merge_sorted(sorted_vals: np.ndarray, new_vals: np.ndarray) -> np.ndarray:
+    new_sorted = np.sort(new_vals)
+    return np.insert(sorted_vals, np.searchsorted(sorted_vals, new_sorted), new_sorted)
 
-    # log-returns
-    log_ret: List[float] = [0.0]
-    for i in range(1, n):
-        if closes[i - 1] <= 0 or closes[i] <= 0:
-            log_ret.append(0.0)
-        else:
-            log_ret.append(math.log(closes[i] / closes[i - 1]))
 
-    # EMA-uri & trend_strength (ca în scriptul oficial)
-    ema50 = ema(closes, 50)
-    ema200 = ema(closes, 200)
+def _history_masks(ind: BtcIndicators) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Zilele ale căror valori intră în istoricele percentilelor (ca în snapshot)."""
+    ts = ind.trend_strength
+    return (
+        ~np.isnan(ts) & (ts != 0.0),
+        ~np.isnan(ind.cum_ret),
+        ~np.isnan(ind.vol30),
+    )
 
-    spread: List[float] = []
-    for i in range(n):
-        if ema50[i] is None or ema200[i] is None:
-            spread.append(0.0)
-        else:
-            spread.append(abs(ema50[i] - ema200[i]))
 
-    vol200 = rolling_std(closes, 200)
+def _history_values(ind: BtcIndicators) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Valorile care intră în istoricele percentilelor (ca în snapshot)."""
+    ts_mask, cr_mask, vol_mask = _history_masks(ind)
+    return ind.trend_strength[ts_mask], ind.cum_ret[cr_mask], ind.vol30[vol_mask]
 
-    trend_strength: List[Optional[float]] = [None] * n
-    for i in range(n):
-        if vol200[i] is None or vol200[i] == 0:
-            trend_strength[i] = None
-        else:
-            trend_strength[i] = spread[i] / vol200[i]
-
-    # istoric pentru percentile (toată istoria, ca în snapshot)
-    ts_hist: List[float] = [
-        v for v in trend_strength if v is not None and v != 0.0
-    ]
-
-    # directionalitate – cumulated return pe 60 zile
-    window_dir = 60
-    cum_ret: List[Optional[float]] = [None] * n
-    for i in range(window_dir, n):
-        base = closes[i - window_dir]
-        if base <= 0:
-            cum_ret[i] = None
-        else:
-            cum_ret[i] = closes[i] / base - 1.0
 
-    cr_hist: List[float] = [v for v in cum_ret if v is not None]
+def _point_in_time_ranks(
+    ind: BtcIndicators,
+    idx: np.ndarray,
+    prior_sorted: Optional[Tuple[Sequence[float], Sequence[float], Sequence[float]]] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Percentilele fiecărui punct față de istoricul disponibil până în ziua lui.
+    `prior_sorted` sunt istoricele zilelor deja procesate (toate anterioare).
+    """
+    out = []
+    for k, (mask, values) in enumerate(
+        zip(_history_masks(ind), (ind.trend_strength, ind.cum_ret, ind.vol30))
+    ):
+        # pozițiile sunt deplasate cu 1, ca istoricul anterior să stea pe poziția 0
+        hist_pos = np.flatnonzero(mask) + 1
+        hist_vals = values[mask]
+        if prior_sorted is not None:
+            prior = np.asarray(prior_sorted[k], dtype=float)
+            hist_pos = np.concatenate([np.zeros(len(prior), dtype=np.int64), hist_pos])
+            hist_vals = np.concatenate([prior, hist_vals])
+        out.append(expanding_percentile_ranks(hist_pos, hist_vals, idx + 1, values[idx]))
+    return out[0], out[1], out[2]
+
+
+def _valid_points(ind: BtcIndicators) -> np.ndarray:
+    """Indicii punctelor publicate: structură, direcție și volatilitate definite."""
+    valid = ~np.isnan(ind.trend_strength) & ~np.isnan(ind.cum_ret) & ~np.isnan(ind.vol30)
+    return np.flatnonzero(valid)
+
+
+def series_columns(
+    dates: np.ndarray,
+    closes: Sequence[float],
+    state: SeriesEngineState,
+    ranking: str = RANKING_FULL,
+) -> Tuple[Dict[str, np.ndarray], List[Regime]]:
+    """
+    Rankează toate punctele din stare față de istoricele sortate curente
+    (RANKING_FULL) sau folosește percentilele point-in-time salvate
+    (RANKING_POINT_IN_TIME). Întoarce coloanele numerice și regimul fiecărui punct.
+    """
+    point_index = np.asarray(state.point_index, dtype=np.int64)
+    if ranking == RANKING_POINT_IN_TIME:
+        ic_struct = np.clip(np.asarray(state.point_pit_struct, dtype=float), 0.0, 100.0)
+        ic_dir = np.clip(np.asarray(state.point_pit_dir, dtype=float), 0.0, 100.0)
+        vol_index = np.clip(np.asarray(state.point_pit_vol, dtype=float), 0.0, 100.0)
+    else:
+        ic_struct = np.clip(PercentileRanker(state.ts_sorted).rank(state.point_ts), 0.0, 100.0)
+        ic_dir = np.clip(PercentileRanker(state.cr_sorted).rank(state.point_cr), 0.0, 100.0)
+        vol_index = np.clip(PercentileRanker(state.vol_sorted).rank(state.point_vol), 0.0, 100.0)
+
+    columns = {
+        "t": epoch_ms(dates[point_index]),
+        "close": np.asarray(closes, dtype=float)[point_index],
+        "ic_struct": ic_struct,
+        "ic_dir": ic_dir,
+        "ic_flux": np.clip(100.0 - vol_index, 0.0, 100.0),
+        # pentru moment păstrăm ciclul ca 50 fix – ai deja logica macro-ciclu separat
+        "ic_cycle": np.full(len(point_index), 50.0),
+        "vol30_ann_pct": np.asarray(state.point_vol, dtype=float),
+        "vol30_index": vol_index,
+    }
+    regimes = [classify_regime(s, d) for s, d in zip(ic_struct.tolist(), ic_dir.tolist())]
+    return columns, regimes
 
-    # volatilitate 30d anualizată
-    window_vol = 30
-    vol30: List[Optional[float]] = [None] * n
-    for i in range(window_vol, n):
-        chunk = log_ret[i - window_vol + 1 : i + 1]
-        if len(chunk) < 2:
-            vol30[i] = None
-        else:
-            s = stdev(chunk)  # type: ignore[arg-type]
-            vol30[i] = s * math.sqrt(365.0) * 100.0
 
-    vol_hist: List[float] = [v for v in vol30 if v is not None]
+def _series_meta(dates: np.ndarray, points: int) -> Dict[str, Any]:
+    return {
+        "as_of": str(dates[-1]),
+        "points": points,
+        "source": "coeziv-btc-official-daily",
+    }
 
-    series_records: List[Dict[str, Any]] = []
 
-    for i in range(n):
-        ts_val = trend_strength[i]
-        cr_val = cum_ret[i]
-        vol_val = vol30[i]
-
-        # sărim punctele foarte timpurii fără structură/volatilitate definită
-        if ts_val is None or cr_val is None or vol_val is None:
-            continue
-
-        ic_struct = percentile_rank(ts_hist, ts_val)
-        ic_dir = percentile_rank(cr_hist, cr_val)
-        vol_index = percentile_rank(vol_hist, vol_val)
-        ic_flux = clamp(100.0 - vol_index, 0.0, 100.0)
-
-        regime = classify_regime(ic_struct, ic_dir)
-
-        rec = {
-            "t": int(dates[i].timestamp() * 1000),
-            "close": float(closes[i]),
-            "ic_struct": float(clamp(ic_struct, 0.0, 100.0)),
-            "ic_dir": float(clamp(ic_dir, 0.0, 100.0)),
-            "ic_flux": float(ic_flux),
-            # pentru moment păstrăm ciclul ca 50 fix – ai deja logica macro-ciclu separat
-            "ic_cycle": 50.0,
-            "vol30_ann_pct": float(vol_val),
-            "vol30_index": float(clamp(vol_index, 0.0, 100.0)),
-            "regime": regime.code,
-            "regime_label": regime.label,
-            "regime_short": regime.short,
-            "regime_color": regime.color,
-        }
+def series_from_state(
+    dates: np.ndarray, closes: Sequence[float], state: SeriesEngineState
+) -> Dict[str, Any]:
+    """Formatul legacy: un obiect per zi."""
+    columns, regimes = series_columns(dates, closes, state)
+    names = list(columns)
+
+    series_records: List[Dict[str, Any]] = []
+    for row, regime in zip(zip(*(columns[n].tolist() for n in names)), regimes):
+        rec: Dict[str, Any] = dict(zip(names, row))
+        rec.update(
+            {
+                "regime": regime.code,
+                "regime_label": regime.label,
+                "regime_short": regime.short,
+                "regime_color": regime.color,
+            }
+        )
         series_records.append(rec)
 
-    meta = {
-        "as_of": dates[-1].strftime("%Y-%m-%d"),
-        "points": len(series_records),
-        "source": "coeziv-btc-official-daily",
+    return {"meta": _series_meta(dates, len(series_records)), "series": series_records}
+
+
+def encoded_columns(
+    dates: np.ndarray,
+    closes: Sequence[float],
+    state: SeriesEngineState,
+    ranking: str = RANKING_FULL,
+) -> Tuple[Dict[str, np.ndarray], Dict[str, List[Dict[str, str]]]]:
+    """Coloanele cu regimul ca cod întreg în REGIME_TABLE + dicționarul de regimuri."""
+    columns, regimes = series_columns(dates, closes, state, ranking=ranking)
+    codes, table = dictionary_encode(
+        [r.code for r in regimes], [r.code for r in REGIME_TABLE]
+    )
+    columns["regime"] = codes
+    dictionaries = {
+        "regime": [
+            {
+                "regime": r.code,
+                "regime_label": r.label,
+                "regime_short": r.short,
+                "regime_color": r.color,
+            }
+            for r in (REGIMES[code] for code in table)
+        ]
     }
+    return columns, dictionaries
+
+
+def columnar_from_state(
+    dates: np.ndarray,
+    closes: Sequence[float],
+    state: SeriesEngineState,
+    precision: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Formatul columnar: coloane + regim ca cod întreg în REGIME_TABLE."""
+    columns, dictionaries = encoded_columns(dates, closes, state)
+    doc = columnar_document(
+        columns, dictionaries, rounded=ROUNDED_COLUMNS, precision=precision
+    )
+    meta = _series_meta(dates, doc["rows"])
+    meta["schema"] = doc.pop("schema")
+    return {"meta": meta, **doc}
+
+
+def write_binary_store(
+    dates: np.ndarray, closes: Sequence[float], state: SeriesEngineState
+) -> int:
+    """Scrie store-ul binar memmap (coloane float64/int64, fără rotunjire)."""
+    columns, dictionaries = encoded_columns(dates, closes, state)
+    return write_store(
+        BIN_PATH,
+        columns,
+        dictionaries,
+        meta=_series_meta(dates, len(columns["t"])),
+    )
+
+
+def write_partitioned(
+    dates: np.ndarray,
+    closes: Sequence[float],
+    state: SeriesEngineState,
+    by: str,
+    precision: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Scrie data/ic_btc_series/<an|lună>.json + manifest.json (percentile point-in-time)."""
+    columns, dictionaries = encoded_columns(
+        dates, closes, state, ranking=RANKING_POINT_IN_TIME
+    )
+    meta = _series_meta(dates, len(columns["t"]))
+    meta["ranking"] = RANKING_POINT_IN_TIME
+    return write_partitions(
+        PARTITION_DIR,
+        columns,
+        dictionaries,
+        by,
+        rounded=ROUNDED_COLUMNS,
+        precision=precision,
+        meta=meta,
+    )
+
+
+def build_engine_state(
+    dates: np.ndarray, closes: Sequence[float]
+) -> SeriesEngineState:
+    """Rebuild complet: indicatori pe toată istoria + starea motorului."""
+    n = len(closes)
+    if n < 260:
+        raise RuntimeError("Prea puține date BTC (ai nevoie de ~260 zile minim).")
 
-    return {"meta": meta, "series": series_records}
+    ind = compute_btc_indicators(closes)
+    ts_hist, cr_hist, vol_hist = _history_values(ind)
+    idx = _valid_points(ind)
+    pit_struct, pit_dir, pit_vol = _point_in_time_ranks(ind, idx)
+
+    return SeriesEngineState(
+        version=STATE_VERSION,
+        rows=n,
+        rows_sha256=rows_fingerprint(dates, closes),
+        tail_closes=[float(c) for c in closes[-TAIL_WINDOW:]],
+        ema_fast_last=float(ind.ema_fast[-1]),
+        ema_slow_last=float(ind.ema_slow[-1]),
+        ts_sorted=np.sort(ts_hist).tolist(),
+        cr_sorted=np.sort(cr_hist).tolist(),
+        vol_sorted=np.sort(vol_hist).tolist(),
+        point_index=idx.tolist(),
+        point_ts=ind.trend_strength[idx].tolist(),
+        point_cr=ind.cum_ret[idx].tolist(),
+        point_vol=ind.vol30[idx].tolist(),
+        point_pit_struct=pit_struct.tolist(),
+        point_pit_dir=pit_dir.tolist(),
+        point_pit_vol=pit_vol.tolist(),
+    )
+
+
+def extend_engine_state(
+    state: SeriesEngineState, dates: np.ndarray, closes: Sequence[float]
+) -> Optional[SeriesEngineState]:
+    """
+    Aplică doar zilele noi peste starea salvată.
+    Întoarce None dacă rândurile deja procesate s-au schimbat (rebuild complet).
+    """
+    n = len(closes)
+    if n < state.rows or rows_fingerprint(dates[: state.rows], closes[: state.rows]) != state.rows_sha256:
+        return None
+    if n == state.rows:
+        return state
+
+    new_closes = closes[state.rows :]
+    ind = extend_btc_indicators(
+        state.tail_closes, state.ema_fast_last, state.ema_slow_last, new_closes
+    )
+    ts_new, cr_new, vol_new = _history_values(ind)
+    idx = _valid_points(ind)
+    pit_struct, pit_dir, pit_vol = _point_in_time_ranks(
+        ind, idx, (state.ts_sorted, state.cr_sorted, state.vol_sorted)
+    )
+
+    return SeriesEngineState(
+        version=STATE_VERSION,
+        rows=n,
+        rows_sha256=rows_fingerprint(dates, closes),
+        tail_closes=(state.tail_closes + [float(c) for c in new_closes])[-TAIL_WINDOW:],
+        ema_fast_last=float(ind.ema_fast[-1]),
+        ema_slow_last=float(ind.ema_slow[-1]),
+        ts_sorted=_merge_sorted(np.asarray(state.ts_sorted), ts_new).tolist(),
+        cr_sorted=_merge_sorted(np.asarray(state.cr_sorted), cr_new).tolist(),
+        vol_sorted=_merge_sorted(np.asarray(state.vol_sorted), vol_new).tolist(),
+        point_index=state.point_index + (idx + state.rows).tolist(),
+        point_ts=state.point_ts + ind.trend_strength[idx].tolist(),
+        point_cr=state.point_cr + ind.cum_ret[idx].tolist(),
+        point_vol=state.point_vol + ind.vol30[idx].tolist(),
+        point_pit_struct=state.point_pit_struct + pit_struct.tolist(),
+        point_pit_dir=state.point_pit_dir + pit_dir.tolist(),
+        point_pit_vol=state.point_pit_vol + pit_vol.tolist(),
+    )
 
 
-def main() -> None:
-    data = build_ic_series()
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False)
-    print(f"[Coeziv] Am generat {len(data['series'])} puncte în {OUT_PATH}")
+def build_ic_series() -> Dict[str, Any]:
+    dates, closes = read_btc_daily(INPUT_DAILY)
+    state = build_engine_state(dates, closes)
+    return series_from_state(dates, closes, state)
+
+
+def write_prom(outputs: Sequence[Path], dates: np.ndarray) -> None:
+    """Prospețimea seriei și dimensiunea ieșirilor (coeziv_prom)."""
+    if len(dates):
+        coeziv_prom.freshness("ic_btc_series", dates[-1])
+    for path in outputs:
+        coeziv_prom.output(path)
+    coeziv_prom.write_job()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export serie IC_BTC pentru front-end.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="calculează doar zilele noi din btc_daily.csv, pe baza stării salvate",
+    )
+    add_format_arguments(parser)
+    add_partition_arguments(parser)
+    args = parser.parse_args(argv)
+    coeziv_prom.start_job("export_ic_btc_series")
+
+    outputs = [BIN_PATH]
+    if wants_legacy(args.format):
+        outputs += [OUT_PATH, latest_path(OUT_PATH)]
+    if wants_columnar(args.format):
+        outputs.append(columnar_path(OUT_PATH))
+    if args.partition:
+        outputs.append(PARTITION_DIR / MANIFEST_NAME)
+
+    with metrics_stage("load") as st:
+        dates, closes = read_btc_daily(INPUT_DAILY)
+        st.rows = len(dates)
+
+    state: Optional[SeriesEngineState] = None
+    if args.incremental:
+        previous = load_engine_state(STATE_PATH)
+        if previous is None:
+            print(f"[Coeziv] Stare incrementală absentă în {STATE_PATH} – rebuild complet.")
+        else:
+            state = extend_engine_state(previous, dates, closes)
+            if state is None:
+                print("[Coeziv] Rânduri vechi modificate în btc_daily.csv – rebuild complet.")
+            elif state is previous and all(p.exists() for p in outputs):
+                print(f"[Coeziv] Nicio zi nouă în {INPUT_DAILY} – ieșirile rămân neschimbate.")
+                write_prom(outputs, dates)
+                return
+            else:
+                print(f"[Coeziv] Incremental: {state.rows - previous.rows} zile noi.")
+
+    if state is None:
+        with metrics_stage("engine", rows=len(dates)):
+            state = build_engine_state(dates, closes)
+
+    if wants_legacy(args.format):
+        with metrics_stage("records", rows=len(dates)):
+            data = series_from_state(dates, closes, state)
+        with metrics_stage("write_legacy", rows=len(dates)):
+            OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with OUT_PATH.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            sidecar = write_latest(OUT_PATH, data["series"][-1], meta=data["meta"])
+        print(f"[Coeziv] Am generat {len(data['series'])} puncte în {OUT_PATH} (+ {sidecar.name})")
+    if wants_columnar(args.format):
+        with metrics_stage("columnar", rows=len(dates)):
+            doc = columnar_from_state(dates, closes, state, precision=args.precision)
+        path = columnar_path(OUT_PATH)
+        with metrics_stage("write_columnar", rows=len(dates)):
+            size = write_json_atomic(path, doc)
+        print(f"[Coeziv] Am generat {doc['rows']} puncte (columnar, {size} bytes) în {path}")
+    if args.partition:
+        with metrics_stage("write_partitions"):
+            manifest = write_partitioned(
+                dates, closes, state, args.partition, precision=args.precision
+            )
+        written = ", ".join(manifest["_written"]) or "niciuna"
+        print(
+            f"[Coeziv] {len(manifest['partitions'])} partiții în {PARTITION_DIR} "
+            f"(rescrise: {written})"
+        )
+    with metrics_stage("write_store", rows=len(dates)):
+        size = write_binary_store(dates, closes, state)
+    print(f"[Coeziv] Store binar ({size} bytes) în {BIN_PATH}")
+    save_engine_state(STATE_PATH, state)
+    write_prom(outputs, dates)
 
 
 if __name__ == "__main__":
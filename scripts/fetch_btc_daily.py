@@ -1,31 +1,64 @@
 #!/usr/bin/env python3
+"""
+Descarcă istoricul zilnic BTC/USD în data/btc_daily.csv
+(date,open,high,low,close,volume).
+
+Moduri:
+- sync (implicit când CSV-ul există): cere doar zilele de la ultima dată
+  stocată minus OVERLAP_DAYS (revizii / lumânarea zilei curente), le
+  combină cu rândurile existente prin merge_rows și scrie doar coada
+  fișierului: rândurile noi se adaugă, iar dacă o zi din suprapunere s-a
+  schimbat, fișierul se rescrie de la acea zi încolo;
+- full (--full sau CSV lipsă): paginare înapoi până la START_TS. După
+  fiecare pagină progresul se salvează în CHECKPOINT_PATH, deci un
+  backfill întrerupt continuă de unde a rămas (plus zilele noi apărute
+  între timp), în loc să reînceapă.
+
+Request-urile trec prin coeziv_http (conexiuni keep-alive refolosite între
+pagini). La sync, CryptoCompare și Kraken sunt hedged: Kraken pornește
+doar dacă CryptoCompare eșuează sau nu răspunde în HEDGE_DELAY secunde.
+La backfill, Kraken rămâne fallback secvențial (are doar ~720 de zile).
+URL-urile se pot înlocui cu serverul local din coeziv_mock_server.py
+(COEZIV_CRYPTOCOMPARE_URL, COEZIV_KRAKEN_URL).
+
+    python scripts/fetch_btc_daily.py           # sync
+    python scripts/fetch_btc_daily.py --full    # backfill complet
+"""
+import argparse
 import csv
+import io
 import json
 import time
 from datetime import datetime, timezone
 from pathlib import Path
-from urllib import request
+
+import coeziv_prom
+from coeziv_http import HedgeError, get_json, hedge, source_url
+from coeziv_metrics import metrics_stage
 
 OUT_PATH = Path("data") / "btc_daily.csv"
+CHECKPOINT_PATH = Path("data") / "_cache" / "btc_daily_backfill.json"
+CHECKPOINT_VERSION = 1
 START_TS = 1293840000  # 2011-01-01 aproximativ
+FIELDS = ["date", "open", "high", "low", "close", "volume"]
+BATCH_LIMIT = 2000  # maximul CryptoCompare per request
+OVERLAP_DAYS = 3    # zile re-descărcate la sync, pentru revizii
+DAY = 86400
+HEDGE_DELAY = 5.0   # secunde până pornește și Kraken la sync
+KRAKEN_TTL = 300    # URL fix: răspunsul se păstrează în cache-ul HTTP 5 minute
 
+CRYPTOCOMPARE_URL = source_url("COEZIV_CRYPTOCOMPARE_URL", "https://min-api.cryptocompare.com")
+KRAKEN_URL = source_url("COEZIV_KRAKEN_URL", "https://api.kraken.com")
 
-def fetch_json(url: str):
-    req = request.Request(
-        url,
-        headers={
-            "User-Agent": "Cohesiv-BTC-Monitor/1.0",
-            "Accept": "application/json",
-        },
-    )
-    with request.urlopen(req, timeout=20) as r:
-        return json.loads(r.read().decode("utf-8"))
+
+def fetch_json(url: str, ttl: float = 0.0):
+    return get_json(url, ttl=ttl, headers={"User-Agent": "Cohesiv-BTC-Monitor/1.0"}, timeout=20)
 
 
-def fetch_cryptocompare_batch(to_ts: int):
+def fetch_cryptocompare_batch(to_ts: int, limit: int = BATCH_LIMIT):
     url = (
-        "https://min-api.cryptocompare.com/data/v2/histoday"
-        f"?fsym=BTC&tsym=USD&limit=2000&toTs={to_ts}"
+        f"{CRYPTOCOMPARE_URL}/data/v2/histoday"
+        f"?fsym=BTC&tsym=USD&limit={limit}&toTs={to_ts}"
     )
     data = fetch_json(url)
     if data.get("Response") != "Success":
@@ -33,13 +66,66 @@ def fetch_cryptocompare_batch(to_ts: int):
     return data["Data"]["Data"]
 
 
-def cryptocompare_full_history():
-    print("[INFO] Fetch CryptoCompare full history...")
+def date_to_ts(date: str) -> int:
+    return int(datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+
+
+def load_checkpoint(since_ts: int):
+    if not CHECKPOINT_PATH.exists():
+        return None
+    try:
+        with CHECKPOINT_PATH.open("r", encoding="utf-8") as f:
+            cp = json.load(f)
+    except Exception:
+        return None
+    if cp.get("version") != CHECKPOINT_VERSION or cp.get("since_ts") != since_ts:
+        return None
+    if not cp.get("rows"):
+        return None
+    return cp
+
+
+def save_checkpoint(since_ts: int, to_ts: int, rows) -> None:
+    CHECKPOINT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = CHECKPOINT_PATH.with_suffix(".json.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(
+            {"version": CHECKPOINT_VERSION, "since_ts": since_ts, "to_ts": to_ts, "rows": rows},
+            f,
+            separators=(",", ":"),
+        )
+    tmp_path.replace(CHECKPOINT_PATH)
+
+
+def clear_checkpoint() -> None:
+    CHECKPOINT_PATH.unlink(missing_ok=True)
+
+
+def cryptocompare_history(since_ts: int, limit: int = BATCH_LIMIT, checkpoint: bool = False):
+    """
+    Pagini CryptoCompare înapoi de la ziua curentă până la since_ts.
+    Cu checkpoint=True progresul se salvează după fiecare pagină și o
+    rulare întreruptă reia paginarea de la ultima pagină reușită.
+    """
     all_rows = []
+    head = []
     to_ts = int(time.time())
 
+    cp = load_checkpoint(since_ts) if checkpoint else None
+    if cp is not None:
+        all_rows = cp["rows"]
+        to_ts = cp["to_ts"]
+        newest = max(r["date"] for r in all_rows)
+        print(
+            f"[INFO] Reiau backfill-ul din checkpoint: {len(all_rows)} zile "
+            f"({min(r['date'] for r in all_rows)} – {newest})"
+        )
+        # zilele apărute de la checkpoint încoace (+ suprapunere)
+        head_since = date_to_ts(newest) - OVERLAP_DAYS * DAY
+        head = cryptocompare_history(head_since, limit=days_until_now(head_since))
+
     while True:
-        batch = fetch_cryptocompare_batch(to_ts)
+        batch = fetch_cryptocompare_batch(to_ts, limit)
         if not batch:
             break
 
@@ -61,18 +147,37 @@ def cryptocompare_full_history():
             })
 
         oldest_ts = batch[0]["time"]
-        if oldest_ts < START_TS:
+        if oldest_ts <= since_ts:
             break
-        to_ts = oldest_ts - 86400
+        to_ts = oldest_ts - DAY
+        if checkpoint:
+            save_checkpoint(since_ts, to_ts, all_rows)
         time.sleep(0.2)
 
-    return all_rows
+    return merge_rows(all_rows, head) if head else all_rows
+
+
+def cryptocompare_full_history():
+    print("[INFO] Fetch CryptoCompare full history...")
+    return cryptocompare_history(START_TS, checkpoint=True)
+
+
+def days_until_now(since_ts: int) -> int:
+    """Câte zile (limit CryptoCompare) acoperă intervalul since_ts – acum."""
+    days = (int(time.time()) - since_ts) // DAY + 1
+    return max(1, min(BATCH_LIMIT, days))
+
+
+def cryptocompare_since(last_date: str):
+    since_ts = date_to_ts(last_date) - OVERLAP_DAYS * DAY
+    print(f"[INFO] Fetch CryptoCompare sync de la {datetime.fromtimestamp(since_ts, timezone.utc):%Y-%m-%d}...")
+    return cryptocompare_history(since_ts, limit=days_until_now(since_ts))
 
 
 def kraken_recent_daily():
     print("[INFO] Fetch Kraken public recent daily candles fallback...")
-    url = "https://api.kraken.com/0/public/OHLC?pair=XBTUSD&interval=1440"
-    data = fetch_json(url)
+    url = f"{KRAKEN_URL}/0/public/OHLC?pair=XBTUSD&interval=1440"
+    data = fetch_json(url, ttl=KRAKEN_TTL)
     if data.get("error"):
         raise RuntimeError(data.get("error"))
 
@@ -133,40 +238,146 @@ def merge_rows(existing, fresh):
 def write_rows(rows):
     OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
     rows.sort(key=lambda r: r["date"])
-    with OUT_PATH.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["date", "open", "high", "low", "close", "volume"])
+    tmp_path = OUT_PATH.with_suffix(".csv.tmp")
+    with tmp_path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
         writer.writeheader()
         for r in rows:
             writer.writerow(r)
+    tmp_path.replace(OUT_PATH)
     print(f"[INFO] Total zile: {len(rows)}")
     print(f"[INFO] Scris în {OUT_PATH}")
 
 
-def main():
+def format_rows(rows) -> bytes:
+    buf = io.StringIO(newline="")
+    writer = csv.DictWriter(buf, fieldnames=FIELDS)
+    for r in rows:
+        writer.writerow(r)
+    return buf.getvalue().encode("utf-8")
+
+
+def row_offset(data: bytes, date: str) -> int:
+    """Offset-ul (bytes) primului rând de date cu data >= `date`."""
+    pos = data.find(b"\n") + 1  # după header
+    key = date.encode("utf-8")
+    while pos < len(data):
+        end = data.find(b"\n", pos)
+        end = len(data) if end < 0 else end + 1
+        if data[pos:pos + len(key)] >= key:
+            return pos
+        pos = end
+    return len(data)
+
+
+def sync_rows(existing, fresh):
+    """
+    Combină rândurile noi cu cele existente (merge_rows) și scrie doar coada
+    fișierului: de la prima zi care diferă (revizie / zi nouă) încolo.
+    Scrierea e atomică: prefixul neschimbat + coada nouă -> tmp -> rename.
+    """
+    merged = merge_rows(existing, fresh)
+    k = 0
+    n = min(len(existing), len(merged))
+    while k < n and existing[k] == merged[k]:
+        k += 1
+    tail = merged[k:]
+    if not tail:
+        print(f"[INFO] Nicio zi nouă sau revizuită; {OUT_PATH} rămâne neschimbat.")
+        return merged
+
+    data = OUT_PATH.read_bytes()
+    offset = len(data) if k == len(existing) else row_offset(data, existing[k]["date"])
+    tmp_path = OUT_PATH.with_suffix(".csv.tmp")
+    with tmp_path.open("wb") as f:
+        f.write(data[:offset])
+        f.write(format_rows(tail))
+    tmp_path.replace(OUT_PATH)
+
+    print(
+        f"[INFO] Sync: {len(merged) - len(existing)} zile noi, "
+        f"{len(existing) - k} rânduri rescrise (de la {tail[0]['date']})"
+    )
+    print(f"[INFO] Total zile: {len(merged)}")
+    print(f"[INFO] Scris în {OUT_PATH}")
+    return merged
+
+
+def _source(name, label, fetch):
+    """
+    Sursă pentru hedge: eroarea / lipsa rândurilor se loghează ca înainte
+    și se numără în coeziv_prom (coeziv_source_failures{source=name}).
+    """
+    def run():
+        try:
+            rows = fetch()
+            if not rows:
+                raise RuntimeError(f"{label} returned no rows")
+            return rows
+        except Exception as exc:
+            print(f"[WARN] {label} failed: {exc}")
+            coeziv_prom.source_failure(name)
+            raise
+    return run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Descarcă istoricul zilnic BTC/USD.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="backfill complet de la START_TS (reia din checkpoint dacă există)",
+    )
+    args = parser.parse_args(argv)
+    coeziv_prom.start_job("fetch_btc_daily")
+
     existing = load_existing_rows()
+    sync = bool(existing) and not args.full
+    last_date = existing[-1]["date"] if existing else None
+
+    def cryptocompare():
+        return cryptocompare_since(last_date) if sync else cryptocompare_full_history()
+
     try:
-        fresh = cryptocompare_full_history()
-        if not fresh:
-            raise RuntimeError("CryptoCompare returned no rows")
-        final_rows = fresh
+        with metrics_stage("download") as st:
+            source, fresh = hedge(
+                [
+                    ("cryptocompare", _source("cryptocompare", "CryptoCompare", cryptocompare)),
+                    ("kraken", _source("kraken", "Kraken fallback", kraken_recent_daily)),
+                ],
+                delay=HEDGE_DELAY if sync else None,
+            )
+            st.rows = len(fresh)
+    except HedgeError as exc:
+        if existing:
+            print("[WARN] All live sources failed. Keeping existing data/btc_daily.csv.")
+            coeziv_prom.freshness("btc_daily", existing[-1]["date"])
+            coeziv_prom.output(OUT_PATH)
+            coeziv_prom.write_job(success=False)
+            return
+        coeziv_prom.write_job(success=False)
+        raise RuntimeError("All BTC data sources failed and no existing CSV is available") from exc
+
+    if source == "cryptocompare":
         print("[OK] CryptoCompare source used.")
-    except Exception as exc:
-        print(f"[WARN] CryptoCompare failed: {exc}")
-        try:
-            fresh = kraken_recent_daily()
-            if not fresh:
-                raise RuntimeError("Kraken returned no rows")
-            final_rows = merge_rows(existing, fresh)
-            print("[OK] Kraken fallback used and merged with existing CSV.")
-        except Exception as exc2:
-            print(f"[WARN] Kraken fallback failed: {exc2}")
-            if existing:
-                final_rows = existing
-                print("[WARN] All live sources failed. Keeping existing data/btc_daily.csv.")
-            else:
-                raise RuntimeError("All BTC data sources failed and no existing CSV is available") from exc2
-
-    write_rows(final_rows)
+    else:
+        print("[OK] Kraken fallback used and merged with existing CSV.")
+
+    with metrics_stage("write", rows=len(fresh)):
+        if existing and (sync or source == "kraken"):
+            rows = sync_rows(existing, fresh)
+        else:
+            # backfill complet: CryptoCompare înlocuiește tot istoricul
+            rows = merge_rows([], fresh)
+            write_rows(rows)
+    if source == "cryptocompare" and not sync:
+        clear_checkpoint()
+
+    coeziv_prom.source_used(source)
+    if rows:
+        coeziv_prom.freshness("btc_daily", rows[-1]["date"])
+    coeziv_prom.output(OUT_PATH)
+    coeziv_prom.write_job()
 
 
 if __name__ == "__main__":
@@ -6,9 +6,10 @@ update_btc_state_latest_from_daily.py
 Script Coeziv: calculează starea BTC pe baza datelor daily
 și salvează un snapshot "btc_state_latest.json" folosit în front-end.
 
-Pași (backend pur, fără dependențe exotice):
+Pași (backend pur, doar NumPy):
 - citește data/btc_daily.csv (minim coloanele: date, close)
 - calculează log-return-uri, EMA50 / EMA200, volatilitate pe 30 de zile
+  (prin motorul comun coeziv_indicators.py, vectorizat cu NumPy)
 - derivă indici IC_BTC structural & ICD_BTC direcțional (0–100)
   folosind normalizare pe istoric (percentile)
 - clasifică regimul coeziv (acumulare, bull structural, bear structural etc.)
@@ -21,13 +22,18 @@ Rulezi scriptul după ce ai actualizat deja btc_daily.csv.
 
 from __future__ import annotations
 
+import argparse
 import json
-import math
 from dataclasses import dataclass
-from datetime import datetime
 from pathlib import Path
-from statistics import mean, stdev
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import coeziv_prom
+from coeziv_btc_daily import load_btc_close
+from coeziv_metrics import metrics_stage
+from coeziv_indicators import WINDOW_DIR, compute_btc_indicators, percentile_rank
 
 
 ROOT = Path(__file__).resolve().parent.parent
@@ -40,73 +46,6 @@ GLOBAL_STATE_FILE = DATA_GLOBAL / "global_coeziv_state.json"
 
 # ---------- utilitare numerice ----------
 
-def ema(series: List[float], period: int) -> List[Optional[float]]:
-    """
-    EMA clasică. Returnează o listă de aceeași lungime cu valori None la început
-    până când se umple fereastra.
-    """
-    if period <= 0:
-        raise ValueError("period trebuie să fie > 0")
-    if len(series) == 0:
-        return []
-
-    k = 2 / (period + 1.0)
-    out: List[Optional[float]] = [None] * len(series)
-
-    # seed = media simplă pe primele `period` valori
-    if len(series) < period:
-        return out
-
-    sma = sum(series[:period]) / period
-    out[period - 1] = sma
-    prev = sma
-
-    for i in range(period, len(series)):
-        price = series[i]
-        prev = price * k + prev * (1 - k)
-        out[i] = prev
-
-    return out
-
-
-def rolling_std(series: List[float], window: int) -> List[Optional[float]]:
-    """
-    Deviație standard rulantă (similar cu pandas.Series.rolling.std).
-    """
-    if window <= 1:
-        raise ValueError("window trebuie să fie > 1")
-    n = len(series)
-    out: List[Optional[float]] = [None] * n
-    if n < window:
-        return out
-
-    for i in range(window - 1, n):
-        chunk = series[i - window + 1 : i + 1]
-        if len(chunk) < 2:
-            out[i] = None
-        else:
-            out[i] = stdev(chunk)  # type: ignore[arg-type]
-    return out
-
-
-def percentile_rank(history: List[float], value: float) -> float:
-    """
-    Percentila poziției lui `value` într-un istoric.
-    0 = cel mai mic, 100 = cel mai mare.
-    """
-    if not history:
-        return 50.0
-    sorted_vals = sorted(history)
-    # număr de valori <= value
-    count = 0
-    for v in sorted_vals:
-        if v <= value:
-            count += 1
-        else:
-            break
-    return 100.0 * count / len(sorted_vals)
-
-
 def clamp(x: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, x))
 
@@ -121,6 +60,55 @@ class Regime:
     color: str  # doar pentru front-end: "green", "red", "orange", etc.
 
 
+# toate regimurile posibile, în ordinea stabilă folosită și pentru codurile
+# întregi din formatul columnar (export_ic_btc_series.py)
+REGIME_TABLE: List[Regime] = [
+    Regime(
+        code="accum_bear",
+        label="Acumulare bearish / bază descendentă",
+        short="Structură foarte slabă, cu flux ușor orientat în jos.",
+        color="red",
+    ),
+    Regime(
+        code="accum_bull",
+        label="Acumulare bullish / bază ascendentă",
+        short="Bază slabă, dar cu bias ușor pozitiv al fluxului.",
+        color="green",
+    ),
+    Regime(
+        code="bull_struct",
+        label="Bull structural",
+        short="Trend ascendent în formare / consolidare structurală.",
+        color="green",
+    ),
+    Regime(
+        code="bear_struct",
+        label="Bear structural",
+        short="Trend descendent în formare / structură în răcire.",
+        color="red",
+    ),
+    Regime(
+        code="bull_late",
+        label="Bull târziu / început de top structural",
+        short="Structură puternic ascendentă, dar matură, cu risc de epuizare.",
+        color="orange",
+    ),
+    Regime(
+        code="bear_late",
+        label="Bear târziu / capitulare",
+        short="Structură descendentă avansată, cu risc de mișcări extreme.",
+        color="orange",
+    ),
+    Regime(
+        code="mixed",
+        label="Regim mixt / de tranziție",
+        short="Configurație neclară: structură și direcționalitate amestecate.",
+        color="grey",
+    ),
+]
+REGIMES: Dict[str, Regime] = {r.code: r for r in REGIME_TABLE}
+
+
 def classify_regime(ic_struct: float, ic_dir: float) -> Regime:
     """
     Clasificare coezivă a regimului BTC pe baza indicilor structurali & direcționali.
@@ -137,176 +125,68 @@ def classify_regime(ic_struct: float, ic_dir: float) -> Regime:
     dir_ = ic_dir
 
     if struct < 20 and dir_ < 45:
-        return Regime(
-            code="accum_bear",
-            label="Acumulare bearish / bază descendentă",
-            short="Structură foarte slabă, cu flux ușor orientat în jos.",
-            color="red",
-        )
+        return REGIMES["accum_bear"]
     if struct < 20 and dir_ > 55:
-        return Regime(
-            code="accum_bull",
-            label="Acumulare bullish / bază ascendentă",
-            short="Bază slabă, dar cu bias ușor pozitiv al fluxului.",
-            color="green",
-        )
+        return REGIMES["accum_bull"]
     if 20 <= struct < 60 and dir_ > 55:
-        return Regime(
-            code="bull_struct",
-            label="Bull structural",
-            short="Trend ascendent în formare / consolidare structurală.",
-            color="green",
-        )
+        return REGIMES["bull_struct"]
     if 20 <= struct < 60 and dir_ < 45:
-        return Regime(
-            code="bear_struct",
-            label="Bear structural",
-            short="Trend descendent în formare / structură în răcire.",
-            color="red",
-        )
+        return REGIMES["bear_struct"]
     if struct >= 60 and dir_ > 55:
-        return Regime(
-            code="bull_late",
-            label="Bull târziu / început de top structural",
-            short="Structură puternic ascendentă, dar matură, cu risc de epuizare.",
-            color="orange",
-        )
+        return REGIMES["bull_late"]
     if struct >= 60 and dir_ < 45:
-        return Regime(
-            code="bear_late",
-            label="Bear târziu / capitulare",
-            short="Structură descendentă avansată, cu risc de mișcări extreme.",
-            color="orange",
-        )
+        return REGIMES["bear_late"]
     # fallback – când ICD ~ 50 sau struct între zone
-    return Regime(
-        code="mixed",
-        label="Regim mixt / de tranziție",
-        short="Configurație neclară: structură și direcționalitate amestecate.",
-        color="grey",
-    )
+    return REGIMES["mixed"]
 
 
 # ---------- citire date BTC ----------
 
-def read_btc_daily(path: Path) -> Tuple[List[datetime], List[float]]:
-    if not path.exists():
-        raise FileNotFoundError(f"Nu am găsit fișierul {path}")
-
-    dates: List[datetime] = []
-    closes: List[float] = []
-
-    with path.open("r", encoding="utf-8") as f:
-        header = f.readline().strip().split(",")
-        # căutăm coloanele de interes
-        try:
-            date_idx = header.index("date")
-        except ValueError:
-            date_idx = header.index("Date")  # alternativă
-        try:
-            close_idx = header.index("close")
-        except ValueError:
-            close_idx = header.index("Close")
-
-        for line in f:
-            if not line.strip():
-                continue
-            parts = line.strip().split(",")
-            try:
-                d = datetime.fromisoformat(parts[date_idx])
-            except Exception:
-                # suport și pentru format gen 2025-01-31 00:00:00
-                d = datetime.strptime(parts[date_idx].split()[0], "%Y-%m-%d")
-            try:
-                c = float(parts[close_idx])
-            except ValueError:
-                continue
-            dates.append(d)
-            closes.append(c)
-
-    # sortăm în caz că nu sunt deja ordonate
-    combined = sorted(zip(dates, closes), key=lambda x: x[0])
-    dates_sorted, closes_sorted = zip(*combined)
-    return list(dates_sorted), list(closes_sorted)
+def read_btc_daily(path: Path) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (date datetime64[D], close float64), sortate după dată, prin loader-ul
+    comun coeziv_btc_daily (parsare vectorizată + cache pe mtime/mărime).
+    """
+    return load_btc_close(path)
 
 
 # ---------- calcule pentru IC / volatilitate ----------
 
 def compute_state_from_prices(
-    dates: List[datetime], closes: List[float]
+    dates: np.ndarray, closes: np.ndarray
 ) -> Dict[str, float]:
     if len(dates) != len(closes):
         raise ValueError("dates și closes trebuie să aibă aceeași lungime")
     if len(closes) < 260:
         raise RuntimeError("Prea puține date BTC pentru a calcula indicii (~260 zile).")
 
-    # log-return-uri
-    log_ret: List[float] = [0.0]
-    for i in range(1, len(closes)):
-        if closes[i - 1] <= 0 or closes[i] <= 0:
-            log_ret.append(0.0)
-        else:
-            log_ret.append(math.log(closes[i] / closes[i - 1]))
-
-    # EMA-uri pentru structură
-    ema50 = ema(closes, 50)
-    ema200 = ema(closes, 200)
+    ind = compute_btc_indicators(closes)
 
     # "trend_strength" ca distanță EMA50–EMA200 raportată la volatilitatea pe 200 zile
-    spread: List[float] = []
-    for i in range(len(closes)):
-        if ema50[i] is None or ema200[i] is None:
-            spread.append(0.0)
-        else:
-            spread.append(abs(ema50[i] - ema200[i]))
-
-    vol200 = rolling_std(closes, 200)
-    trend_strength_hist: List[float] = []
-    for i in range(len(closes)):
-        if vol200[i] is None or vol200[i] == 0:
-            continue
-        trend_strength_hist.append(spread[i] / vol200[i])
-
-    if not trend_strength_hist:
+    trend_strength_hist = ind.trend_strength[~np.isnan(ind.trend_strength)]
+    if len(trend_strength_hist) == 0:
         raise RuntimeError("Nu am putut calcula trend_strength_hist.")
 
-    latest_trend_strength = trend_strength_hist[-1]
+    latest_trend_strength = float(trend_strength_hist[-1])
     ic_struct = percentile_rank(trend_strength_hist, latest_trend_strength)
 
     # directionalitate: folosim randamentul cumulat pe 60 de zile, normalizat pe istoric
-    window_dir = 60
-    cum_ret_hist: List[float] = []
-    for i in range(window_dir, len(closes)):
-        base = closes[i - window_dir]
-        if base <= 0:
-            continue
-        cum_ret_hist.append(closes[i] / base - 1.0)
-
-    if not cum_ret_hist:
+    cum_ret_hist = ind.cum_ret[~np.isnan(ind.cum_ret)]
+    if len(cum_ret_hist) == 0:
         raise RuntimeError("Nu am putut calcula istoric pentru ICD_BTC.")
 
-    latest_base = closes[-window_dir]
+    latest_base = closes[-WINDOW_DIR]
     latest_cum_ret = closes[-1] / latest_base - 1.0
     pct = percentile_rank(cum_ret_hist, latest_cum_ret)
     # transformăm percentila 0–100 într-un index 0–100, dar centrat în jurul lui 50
     ic_dir = pct
 
     # volatilitate pe 30 de zile (annualizată, %)
-    if len(log_ret) < 30:
+    vol30_hist = ind.vol30[~np.isnan(ind.vol30)]
+    if len(vol30_hist) == 0:
         raise RuntimeError("Prea puține date pentru volatilitate 30d.")
-    vol30_hist: List[float] = []
-    window_vol = 30
-    for i in range(window_vol, len(log_ret)):
-        chunk = log_ret[i - window_vol + 1 : i + 1]
-        if len(chunk) < 2:
-            continue
-        s = stdev(chunk)  # type: ignore[arg-type]
-        vol30_hist.append(s * math.sqrt(365.0) * 100.0)
-
-    latest_chunk = log_ret[-window_vol:]
-    latest_std = stdev(latest_chunk)  # type: ignore[arg-type]
-    latest_vol30 = latest_std * math.sqrt(365.0) * 100.0
 
+    latest_vol30 = float(vol30_hist[-1])
     vol30_index = percentile_rank(vol30_hist, latest_vol30)
 
     return {
@@ -409,9 +289,15 @@ def build_context_short(
     }
 
 
-def main() -> None:
-    dates, closes = read_btc_daily(INPUT_DAILY)
-    metrics = compute_state_from_prices(dates, closes)
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Snapshot btc_state_latest.json din btc_daily.csv.")
+    parser.parse_args(argv)
+    coeziv_prom.start_job("update_btc_state_latest_from_daily")
+    with metrics_stage("load") as st:
+        dates, closes = read_btc_daily(INPUT_DAILY)
+        st.rows = len(dates)
+    with metrics_stage("ic", rows=len(dates)):
+        metrics = compute_state_from_prices(dates, closes)
     ic_struct = metrics["ic_struct"]
     ic_dir = metrics["ic_dir"]
     vol30_ann_pct = metrics["vol30_ann_pct"]
@@ -424,10 +310,10 @@ def main() -> None:
     )
 
     last_date = dates[-1]
-    last_close = closes[-1]
+    last_close = float(closes[-1])
 
     state = {
-        "as_of": last_date.strftime("%Y-%m-%d"),
+        "as_of": str(last_date),
         "close": round(last_close, 2),
         # indici coezivi
         "ic_struct": round(ic_struct, 2),
@@ -443,11 +329,15 @@ def main() -> None:
         "context_short": context_short,
     }
 
-    OUTPUT_STATE.parent.mkdir(parents=True, exist_ok=True)
-    with OUTPUT_STATE.open("w", encoding="utf-8") as f:
-        json.dump(state, f, ensure_ascii=False, indent=2)
+    with metrics_stage("write"):
+        OUTPUT_STATE.parent.mkdir(parents=True, exist_ok=True)
+        with OUTPUT_STATE.open("w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
 
     print(f"[Coeziv] Am salvat starea BTC în {OUTPUT_STATE}")
+    coeziv_prom.freshness("btc_state_latest", last_date)
+    coeziv_prom.output(OUTPUT_STATE)
+    coeziv_prom.write_job()
 
 
 if __name__ == "__main__":
@@ -26,6 +26,29 @@ Formatul final este obligatoriu:
     2009-01-05,927.45
     ...
 
+Descărcare:
+- seriile se descarcă în paralel (thread pool, MAX_WORKERS), fiecare cu
+  timeout per request, retry cu backoff exponențial cu jitter și un termen
+  limită per serie (TICKER_DEADLINE);
+- rezultatele sunt per serie: o serie eșuată își păstrează ultimul CSV bun,
+  celelalte se actualizează; rularea eșuează doar dacă au eșuat toate;
+- sursa implicită este yfinance; `--source chart` (sau
+  COEZIV_GLOBAL_SOURCE=chart) folosește API-ul chart Yahoo direct, prin
+  coeziv_http (CHART_BASE_URL, suprascris cu COEZIV_CHART_URL pentru un
+  server HTTP local de test). Sursa chart e opțională până la validarea pe
+  API-ul live: Yahoo poate răspunde cu 429 clienților care nu sunt yfinance.
+
+Mod incremental (implicit când CSV-ul există):
+- se cere doar intervalul de la ultima zi stocată minus OVERLAP_DAYS;
+- zilele din fereastra de suprapunere se compară cu valorile stocate;
+  dacă diferă (revizie) sau fereastra nu are zile comune, seria se
+  redescarcă complet de la START_DATE;
+- ultima zi stocată nu intră în comparație: poate fi o sesiune încă
+  deschisă la ora rulării (GC=F, CL=F, DX-Y.NYB se tranzacționează la
+  08:35 UTC), deci se înlocuiește cu valoarea din sursă;
+- altfel zilele noi se adaugă atomic la finalul CSV-ului;
+- `--full` forțează redescărcarea completă a tuturor seriilor.
+
 Important:
 - NU salvează index numeric 0,1,2,3...
 - NU salvează timestamp fals.
@@ -34,12 +57,29 @@ Important:
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import argparse
+import csv
+import math
+import os
+import random
+import shutil
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import coeziv_prom
+from coeziv_http import get_json
+from coeziv_metrics import metrics_stage
+
+if TYPE_CHECKING:
+    import pandas as pd
 
-import pandas as pd
-import yfinance as yf
+# pandas / yfinance se importă leneș, doar pe calea de descărcare:
+# importul modulului (ex. din coeziv.py) rămâne ieftin
 
 
 # ---------------------------------------------------------------------------
@@ -59,6 +99,29 @@ SERIES: Dict[str, str] = {
     "oil": "CL=F",
 }
 
+# sursa opțională `chart`: API-ul chart Yahoo (același backend ca yfinance),
+# prin coeziv_http. URL-ul se poate înlocui cu un server HTTP local de test:
+#   COEZIV_GLOBAL_SOURCE=chart COEZIV_CHART_URL=http://127.0.0.1:8765/chart \
+#       python scripts/update_global_coeziv_state.py
+CHART_BASE_URL = os.environ.get(
+    "COEZIV_CHART_URL", "https://query1.finance.yahoo.com/v8/finance/chart"
+)
+SOURCE_ENV = "COEZIV_GLOBAL_SOURCE"
+DEFAULT_SOURCE = os.environ.get(SOURCE_ENV, "").strip() or "yfinance"
+USER_AGENT = "Mozilla/5.0 (Coeziv-Global-Monitor/1.0)"
+
+MAX_WORKERS = 5          # câte serii se descarcă simultan
+REQUEST_TIMEOUT = 20.0   # secunde per request
+MAX_ATTEMPTS = 4         # încercări per serie
+TICKER_DEADLINE = 90.0   # nu mai începem încercări noi după atâtea secunde
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 20.0
+
+# mod incremental: cerem doar ultimele zile + o fereastră de suprapunere
+# verificată față de valorile stocate; o diferență = revizie -> refetch complet
+OVERLAP_DAYS = 10
+REVISION_RTOL = 1e-6
+
 
 # ---------------------------------------------------------------------------
 # Utils
@@ -82,6 +145,8 @@ def normalize_downloaded_frame(df: pd.DataFrame, name: str, ticker: str) -> pd.D
     - elimină duplicatele
     - sortează cronologic
     """
+    import pandas as pd
+
     if df is None or df.empty:
         raise RuntimeError(f"{name}/{ticker}: yfinance a returnat DataFrame gol.")
 
@@ -150,53 +215,413 @@ def normalize_downloaded_frame(df: pd.DataFrame, name: str, ticker: str) -> pd.D
     return out[["date", "close"]]
 
 
-def download_series(name: str, ticker: str) -> pd.DataFrame:
-    log(f"Descarc {ticker} pentru {name} din Yahoo Finance (începând cu {START_DATE})...")
+Row = Tuple[str, float]
+
+
+# ---------------------------------------------------------------------------
+# Surse
+# ---------------------------------------------------------------------------
+
+def clean_rows(rows: Sequence[Row], name: str, ticker: str) -> List[Row]:
+    """
+    Aceleași protecții ca normalize_downloaded_frame, pe listă de (date, close):
+    fără valori lipsă, o singură valoare pe zi (ultima), ordine cronologică,
+    fără date de tip 1970 (index / timestamp greșit).
+    """
+    by_date: Dict[str, float] = {}
+    for date, close in rows:
+        if date and close is not None and math.isfinite(close):
+            by_date[date] = float(close)
+
+    if not by_date:
+        raise RuntimeError(f"{name}/{ticker}: nu au rămas date valide după curățare.")
+
+    out = sorted(by_date.items())
+    if out[0][0].startswith("1970") and out[-1][0].startswith("1970"):
+        raise RuntimeError(
+            f"{name}/{ticker}: datele arată ca timestamp/index greșit: "
+            f"{out[0][0]} – {out[-1][0]}"
+        )
+    return out
+
+
+def chart_url(ticker: str, start: str = START_DATE, base_url: Optional[str] = None) -> str:
+    period1 = int(datetime.strptime(start, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+    period2 = int(time.time()) + 86400
+    query = urllib.parse.urlencode(
+        {
+            "period1": period1,
+            "period2": period2,
+            "interval": "1d",
+            "events": "div,splits",
+            "includeAdjustedClose": "true",
+        }
+    )
+    base = (base_url or CHART_BASE_URL).rstrip("/")
+    return f"{base}/{urllib.parse.quote(ticker, safe='')}?{query}"
+
+
+def parse_chart_payload(payload: Dict[str, Any], name: str, ticker: str) -> List[Row]:
+    """
+    Răspunsul Yahoo chart v8 -> (date, close). Ca la yfinance cu
+    auto_adjust=False, preferăm Adj Close, altfel Close. Data este ziua
+    calendaristică a bursei (timestamp + gmtoffset), nu data UTC.
+    """
+    chart = payload.get("chart") or {}
+    if chart.get("error"):
+        raise RuntimeError(f"{name}/{ticker}: {chart['error']}")
+    results = chart.get("result") or []
+    if not results:
+        raise RuntimeError(f"{name}/{ticker}: răspuns chart fără rezultate.")
+
+    res = results[0]
+    stamps = res.get("timestamp") or []
+    offset = int((res.get("meta") or {}).get("gmtoffset") or 0)
+    indicators = res.get("indicators") or {}
+    adj = (indicators.get("adjclose") or [{}])[0].get("adjclose")
+    close = (indicators.get("quote") or [{}])[0].get("close")
+    values = adj if adj else close
+    if not stamps or not values:
+        raise RuntimeError(f"{name}/{ticker}: răspuns chart fără prețuri.")
+
+    rows = [
+        (datetime.fromtimestamp(ts + offset, timezone.utc).strftime("%Y-%m-%d"), v)
+        for ts, v in zip(stamps, values)
+    ]
+    return clean_rows(rows, name, ticker)
+
+
+def fetch_chart(
+    name: str, ticker: str, start: str = START_DATE, timeout: float = REQUEST_TIMEOUT
+) -> List[Row]:
+    """
+    Un request către API-ul chart (CHART_BASE_URL), fără dependențe externe;
+    conexiunile keep-alive către Yahoo se refolosesc între serii (coeziv_http).
+    """
+    payload = get_json(chart_url(ticker, start), headers={"User-Agent": USER_AGENT}, timeout=timeout)
+    return parse_chart_payload(payload, name, ticker)
+
+
+def fetch_yfinance(
+    name: str, ticker: str, start: str = START_DATE, timeout: float = REQUEST_TIMEOUT
+) -> List[Row]:
+    """Sursa istorică: yfinance (import leneș), un ticker per apel."""
+    import yfinance as yf
 
     df = yf.download(
         ticker,
-        start=START_DATE,
+        start=start,
         progress=False,
         auto_adjust=False,
         threads=False,
+        timeout=timeout,
     )
 
     out = normalize_downloaded_frame(df, name=name, ticker=ticker)
+    return clean_rows(zip(out["date"].tolist(), out["close"].tolist()), name, ticker)
 
-    log(
-        f"  • {name}: {len(out)} puncte | "
-        f"{out['date'].iloc[0]} – {out['date'].iloc[-1]}"
-    )
 
-    return out
+SOURCES: Dict[str, Callable[..., List[Row]]] = {
+    "chart": fetch_chart,
+    "yfinance": fetch_yfinance,
+}
+
+
+# ---------------------------------------------------------------------------
+# Descărcare concurentă cu retry
+# ---------------------------------------------------------------------------
+
+@dataclass
+class SeriesResult:
+    name: str
+    ticker: str
+    rows: Optional[List[Row]] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.rows is not None
+
+
+def backoff_delay(attempt: int, rng: random.Random) -> float:
+    """Backoff exponențial cu jitter: BACKOFF_BASE * 2^attempt * [0.5, 1.5), plafonat."""
+    return min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)) * rng.uniform(0.5, 1.5)
+
+
+def download_with_retry(
+    name: str,
+    ticker: str,
+    fetch: Callable[..., List[Row]],
+    start: str = START_DATE,
+    attempts: int = MAX_ATTEMPTS,
+    timeout: float = REQUEST_TIMEOUT,
+    deadline: float = TICKER_DEADLINE,
+    rng: Optional[random.Random] = None,
+) -> SeriesResult:
+    """
+    Descarcă o serie cu maximum `attempts` încercări. Fiecare request are
+    `timeout` secunde; nu se mai începe o încercare nouă după `deadline`
+    secunde de la start. Nu aruncă excepții: eroarea ajunge în rezultat.
+    """
+    rng = rng or random.Random()
+    result = SeriesResult(name=name, ticker=ticker)
+    t0 = time.monotonic()
+
+    for attempt in range(attempts):
+        result.attempts = attempt + 1
+        try:
+            result.rows = fetch(name, ticker, start=start, timeout=timeout)
+            result.error = None
+            break
+        except Exception as exc:
+            result.error = f"{type(exc).__name__}: {exc}"
+            log(f"  • {name}: încercarea {attempt + 1}/{attempts} a eșuat ({result.error})")
+
+        delay = backoff_delay(attempt, rng)
+        if attempt + 1 >= attempts or time.monotonic() - t0 + delay > deadline:
+            break
+        time.sleep(delay)
+
+    result.seconds = time.monotonic() - t0
+    return result
+
+
+def download_all(
+    series: Dict[str, str],
+    fetch: Callable[..., List[Row]],
+    max_workers: int = MAX_WORKERS,
+    starts: Optional[Dict[str, str]] = None,
+    **retry_kwargs: Any,
+) -> Dict[str, SeriesResult]:
+    """
+    Descarcă toate seriile în paralel (thread pool); un rezultat per serie.
+    `starts[name]` este prima zi cerută (implicit START_DATE).
+    """
+    starts = starts or {}
+    results: Dict[str, SeriesResult] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(series)))) as pool:
+        futures = {
+            pool.submit(
+                download_with_retry, name, ticker, fetch,
+                start=starts.get(name, START_DATE), **retry_kwargs,
+            ): name
+            for name, ticker in series.items()
+        }
+        for future in as_completed(futures):
+            res = future.result()
+            results[res.name] = res
+    return {name: results[name] for name in series}
+
+
+def series_path(name: str) -> Path:
+    return DATA_GLOBAL / f"{name}.csv"
+
 
+def format_rows(rows: Iterable[Row]) -> str:
+    return "".join(f"{date},{close!r}\n" for date, close in rows)
 
-def save_series(name: str, df: pd.DataFrame) -> None:
+
+def save_series(name: str, rows: Sequence[Row]) -> None:
+    """Scrie atomic data_global/<name>.csv (date,close)."""
     DATA_GLOBAL.mkdir(parents=True, exist_ok=True)
 
-    path = DATA_GLOBAL / f"{name}.csv"
-    df.to_csv(path, index=False, encoding="utf-8")
+    path = series_path(name)
+    tmp_path = path.with_suffix(".csv.tmp")
+    with tmp_path.open("w", encoding="utf-8", newline="") as f:
+        f.write("date,close\n")
+        f.write(format_rows(rows))
+    tmp_path.replace(path)
+
+    log(f"✔ Salvat {name}.csv cu {len(rows)} puncte în {path}")
+
+
+# ---------------------------------------------------------------------------
+# Mod incremental
+# ---------------------------------------------------------------------------
+
+def load_stored_rows(name: str) -> List[Row]:
+    """Rândurile din data_global/<name>.csv; [] dacă lipsește sau nu se poate citi."""
+    path = series_path(name)
+    if not path.exists():
+        return []
+    rows: List[Row] = []
+    with path.open("r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header != ["date", "close"]:
+            return []
+        for row in reader:
+            try:
+                rows.append((row[0], float(row[1])))
+            except (IndexError, ValueError):
+                continue
+    return rows
+
+
+def incremental_start(stored: Sequence[Row]) -> str:
+    """Prima zi cerută în modul incremental: ultima zi stocată minus OVERLAP_DAYS."""
+    last = datetime.strptime(stored[-1][0], "%Y-%m-%d")
+    return (last - timedelta(days=OVERLAP_DAYS)).strftime("%Y-%m-%d")
+
+
+def verify_overlap(stored: Sequence[Row], fresh: Sequence[Row], start: str) -> Optional[str]:
+    """
+    Compară zilele comune din fereastra de suprapunere, fără ultima zi
+    stocată (poate fi o sesiune neterminată, vezi apply_incremental).
+    Întoarce motivul pentru un refetch complet (revizie / fereastră fără
+    zile comune) sau None.
+    """
+    last = stored[-1][0]
+    old = {d: c for d, c in stored if start <= d < last}
+    new = {d: c for d, c in fresh if d < last}
+    common = sorted(set(old) & set(new))
+    if not common:
+        return "nicio zi comună în fereastra de suprapunere"
+    for d in common:
+        if not math.isclose(old[d], new[d], rel_tol=REVISION_RTOL, abs_tol=0.0):
+            return f"revizie la {d}: {old[d]!r} -> {new[d]!r}"
+    missing = sorted(set(old) - set(new))
+    if missing:
+        return f"zile stocate lipsă din sursă: {', '.join(missing[:3])}"
+    return None
+
+
+def append_series(name: str, stored: Sequence[Row], new_rows: Sequence[Row]) -> None:
+    """
+    Adaugă atomic rândurile noi la finalul CSV-ului: copie + append într-un
+    fișier temporar, apoi rename (un crash nu lasă un rând pe jumătate).
+    """
+    path = series_path(name)
+    tmp_path = path.with_suffix(".csv.tmp")
+    shutil.copyfile(path, tmp_path)
+    with tmp_path.open("a", encoding="utf-8", newline="") as f:
+        f.write(format_rows(new_rows))
+    tmp_path.replace(path)
+
+    log(
+        f"✔ Adăugat {len(new_rows)} puncte la {name}.csv "
+        f"({new_rows[0][0]} – {new_rows[-1][0]}, total {len(stored) + len(new_rows)})"
+    )
 
-    log(f"✔ Salvat {name}.csv cu {len(df)} puncte în {path}")
+
+def apply_incremental(
+    name: str, stored: Sequence[Row], fresh: Sequence[Row], start: str
+) -> Optional[str]:
+    """
+    Verifică suprapunerea și adaugă zilele noi. Ultima zi stocată se
+    înlocuiește cu valoarea din sursă (close-ul final al unei sesiuni care
+    era încă deschisă la rularea anterioară). Întoarce motivul pentru care
+    seria trebuie redescărcată complet, sau None dacă e la zi.
+    """
+    problem = verify_overlap(stored, fresh, start)
+    if problem is not None:
+        return problem
+    last = stored[-1][0]
+    tail = [(d, c) for d, c in fresh if d >= last]
+    if tail and tail[0][0] == last and tail[0][1] != stored[-1][1]:
+        save_series(name, list(stored[:-1]) + tail)
+        log(f"  • {name}: {last} actualizat ({stored[-1][1]!r} -> {tail[0][1]!r}).")
+        return None
+    new_rows = [(d, c) for d, c in tail if d > last]
+    if new_rows:
+        append_series(name, stored, new_rows)
+    else:
+        log(f"  • {name}: nicio zi nouă după {last}.")
+    return None
 
 
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
 
-def main() -> None:
-    log("Pornesc update_global_coeziv_state.py")
+def log_result(res: SeriesResult) -> None:
+    log(
+        f"  • {res.name}: {len(res.rows)} puncte | {res.rows[0][0]} – {res.rows[-1][0]} "
+        f"({res.attempts} încercări, {res.seconds:.1f}s)"
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Descarcă seriile macro globale.")
+    parser.add_argument(
+        "--source",
+        choices=sorted(SOURCES),
+        default=DEFAULT_SOURCE,
+        help=f"sursa datelor (implicit: yfinance, sau {SOURCE_ENV})",
+    )
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT, help="secunde per request")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help=f"redescarcă toate seriile de la {START_DATE} (altfel: incremental)",
+    )
+    args = parser.parse_args(argv)
+    if args.source not in SOURCES:
+        parser.error(f"{SOURCE_ENV}={args.source}: sursă necunoscută ({', '.join(sorted(SOURCES))})")
+
+    coeziv_prom.start_job("update_global_coeziv_state")
+    mode = "complet" if args.full else "incremental"
+    log(f"Pornesc update_global_coeziv_state.py (sursă: {args.source}, mod {mode})")
 
     DATA_GLOBAL.mkdir(parents=True, exist_ok=True)
+    fetch = SOURCES[args.source]
 
-    for name, ticker in SERIES.items():
-        try:
-            df = download_series(name, ticker)
-            save_series(name, df)
-        except Exception as exc:
-            raise RuntimeError(f"Eroare la seria {name} ({ticker}): {exc}") from exc
+    stored = {} if args.full else {name: load_stored_rows(name) for name in SERIES}
+    starts = {name: incremental_start(rows) for name, rows in stored.items() if rows}
+
+    with metrics_stage("download", rows=len(SERIES)):
+        results = download_all(
+            SERIES, fetch, max_workers=args.workers, starts=starts, timeout=args.timeout
+        )
 
-    log("✅ Update global coeziv – seriile macro descărcate cu succes.")
+    # seriile cu revizii detectate se redescarcă complet
+    refetch: Dict[str, str] = {}
+    for res in results.values():
+        if not res.ok or res.name not in starts:
+            continue
+        log_result(res)
+        problem = apply_incremental(res.name, stored[res.name], res.rows, starts[res.name])
+        if problem is not None:
+            log(f"  • {res.name}: {problem} – redescarc complet.")
+            refetch[res.name] = SERIES[res.name]
+    if refetch:
+        with metrics_stage("refetch", rows=len(refetch)):
+            results.update(
+                download_all(refetch, fetch, max_workers=args.workers, timeout=args.timeout)
+            )
+
+    failed = []
+    for res in results.values():
+        if res.ok:
+            if res.name in starts and res.name not in refetch:
+                continue  # deja aplicat incremental
+            log_result(res)
+            save_series(res.name, res.rows)
+        else:
+            failed.append(res)
+            coeziv_prom.source_failure(args.source, series=res.name)
+            kept = "păstrez CSV-ul existent" if series_path(res.name).exists() else "fără CSV existent"
+            log(f"✖ {res.name} ({res.ticker}): {res.error} – {kept}")
+
+    if coeziv_prom.enabled():
+        # prospețimea pe serie, din CSV-urile finale (inclusiv cele păstrate)
+        for name in SERIES:
+            rows = load_stored_rows(name)
+            if rows:
+                coeziv_prom.freshness(f"global:{name}", rows[-1][0])
+            coeziv_prom.output(series_path(name))
+
+    if len(failed) == len(results):
+        coeziv_prom.write_job(success=False)
+        raise RuntimeError("Toate seriile macro au eșuat; nu am actualizat nimic.")
+    if failed:
+        log(f"⚠ Update global coeziv parțial: {len(failed)}/{len(results)} serii au eșuat.")
+    else:
+        log("✅ Update global coeziv – seriile macro actualizate cu succes.")
+    coeziv_prom.write_job()
 
 
 if __name__ == "__main__":